@@ -0,0 +1,4 @@
+"""
+OFFLINE BENCHMARK + LOAD TOOLS
+Local Google Sheets stand-in and headless drivers for main.py
+"""
@@ -0,0 +1,113 @@
+"""
+SAVED-SEARCH CHANGE FEED - COST VS CHANGESET SIZE
+For each inventory size, publishes a base snapshot, then versions with N
+rows added / edited, and times the diff and the match of the changed rows
+against S random saved searches. The baseline re-runs every search over
+the whole inventory (what agents did by hand).
+
+    python -m bench.change_feed_bench --sizes 20000,200000 --changes 10,1000,10000 --searches 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+os.environ.setdefault("ERP_SAVED_SEARCHES_PATH", os.path.join(tempfile.mkdtemp(), "saved_searches.json"))
+
+import numpy as np
+import pandas as pd
+
+from bench.fake_sheets import AREAS, UNIT_TYPES, make_properties
+from erp.change_feed import ChangeFeed, Snapshot, diff_snapshots
+from erp.filters import FilterSignature, apply_filters
+from erp.searches import SAVED_SEARCHES
+
+
+def random_signature(rng: np.random.Generator) -> FilterSignature:
+    low = float(rng.integers(5, 40) * 100_000)
+    return FilterSignature(
+        ranges=(("price_total", low, low + float(rng.integers(5, 60) * 100_000)), ("area_sqm", None, None)),
+        selections=(("area", tuple(sorted(rng.choice(AREAS, size=int(rng.integers(1, 4)), replace=False)))),
+                    ("unit_type", tuple(sorted(rng.choice(UNIT_TYPES, size=int(rng.integers(1, 3)), replace=False))))),
+        keyword=str(rng.choice(["", "", "", "بحري", "جراج"])),
+    )
+
+
+def mutate(df: pd.DataFrame, changes: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Half the changes are new units, half are price edits on existing ones"""
+    added = make_properties(len(df) + changes // 2, seed=int(rng.integers(1 << 30))).iloc[len(df):]
+    edited = df.copy()
+    rows = rng.choice(len(df), size=changes - changes // 2, replace=False)
+    edited.loc[edited.index[rows], "price_total"] = edited["price_total"].iloc[rows].to_numpy() * 0.95
+    return pd.concat([edited, added], ignore_index=True)
+
+
+def run_size(rows: int, change_counts: List[int], n_searches: int) -> List[Dict]:
+    rng = np.random.default_rng(5)
+    base = make_properties(rows)
+    signatures = [random_signature(rng) for _ in range(n_searches)]
+    for i, signature in enumerate(signatures):
+        SAVED_SEARCHES.save(f"bench-{i}", f"agent{i % 40:03d}", signature)
+
+    start = time.perf_counter()
+    for signature in signatures:
+        apply_filters(base, signature)
+    full_s = time.perf_counter() - start
+
+    base_snapshot = Snapshot.of("base", base)
+    results = []
+    for changes in change_counts:
+        new = mutate(base, changes, rng)
+        start = time.perf_counter()
+        new_snapshot = Snapshot.of(f"v{changes}", new)
+        snapshot_s = time.perf_counter() - start
+        start = time.perf_counter()
+        changeset = diff_snapshots(base_snapshot, new_snapshot)
+        diff_s = time.perf_counter() - start
+        start = time.perf_counter()
+        notifications = ChangeFeed().process(changeset, new)
+        match_s = time.perf_counter() - start
+        results.append({
+            "rows": rows, "changes": changes, "searches": n_searches,
+            "changed_rows": int(changeset.positions.size), "notifications": len(notifications),
+            "snapshot_ms": snapshot_s * 1000, "diff_ms": diff_s * 1000, "match_ms": match_s * 1000,
+            "full_rerun_ms": full_s * 1000,
+        })
+    for i in range(n_searches):
+        SAVED_SEARCHES.delete(f"agent{i % 40:03d}", f"bench-{i}")
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="20000,200000")
+    parser.add_argument("--changes", default="10,1000,10000")
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    changes = [int(c) for c in args.changes.split(",") if c.strip()]
+    results = []
+    for rows in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        results.extend(run_size(rows, changes, args.searches))
+
+    print(f"\n{'rows':>9}{'changes':>9}{'searches':>10}{'notified':>10}"
+          f"{'snapshot_ms':>13}{'diff_ms':>9}{'match_ms':>10}{'full_rerun_ms':>15}")
+    for r in results:
+        print(f"{r['rows']:>9,}{r['changes']:>9,}{r['searches']:>10}{r['notifications']:>10}"
+              f"{r['snapshot_ms']:>13.1f}{r['diff_ms']:>9.1f}{r['match_ms']:>10.1f}{r['full_rerun_ms']:>15.1f}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+COLD START + RERUN COST
+Measures, in a fresh interpreter each time, the time-to-first-paint of the
+login page and the per-rerun script execution time (login page and a
+logged-in sales dashboard).
+
+    python -m bench.cold_start --trials 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The stand-in runs in the parent so the child starts with only AppTest loaded
+CHILD = r"""
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ["STREAMLIT_LOGGER_LEVEL"] = "error"
+os.environ["ERP_SHEETS_BASE_URL"] = {base_url!r}
+from streamlit.testing.v1 import AppTest
+
+HEAVY = ("pandas", "numpy", "plotly", "openpyxl")
+before = {{m for m in HEAVY if m in sys.modules}}
+at = AppTest.from_file({app!r}, default_timeout=300)
+at.secrets["google_sheets"] = {secrets!r}
+t = time.perf_counter(); at.run(); first_paint = time.perf_counter() - t
+imported_by_login = sorted(m for m in HEAVY if m in sys.modules and m not in before)
+
+login_reruns = []
+for _ in range({reruns}):
+    t = time.perf_counter(); at.run(); login_reruns.append(time.perf_counter() - t)
+
+at.text_input[0].input("agent001"); at.text_input[1].input("bench-pass")
+next(b for b in at.button if b.label == "Login").click(); at.run()
+dashboard_reruns = []
+for _ in range({reruns}):
+    t = time.perf_counter(); at.run(); dashboard_reruns.append(time.perf_counter() - t)
+
+print(json.dumps({{
+    "first_paint_s": first_paint,
+    "login_rerun_s": sorted(login_reruns)[len(login_reruns) // 2],
+    "dashboard_rerun_s": sorted(dashboard_reruns)[len(dashboard_reruns) // 2],
+    "heavy_imports_on_login": imported_by_login,
+}}))
+"""
+
+
+def run_trial(reruns: int, base_url: str, secrets: dict) -> dict:
+    code = CHILD.format(root=str(ROOT), app=str(ROOT / "main.py"), reruns=reruns,
+                        base_url=base_url, secrets=secrets)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=5, help="fresh interpreters to start")
+    parser.add_argument("--reruns", type=int, default=10, help="warm reruns measured per trial")
+    parser.add_argument("--out", default=None, help="optional JSON output path")
+    args = parser.parse_args(argv)
+
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from bench.fake_sheets import FakeSheetsServer, make_dataset, register_dataset
+
+    with FakeSheetsServer() as server:
+        secrets = register_dataset(server, make_dataset(1000))
+        trials = [run_trial(args.reruns, server.base_url, secrets) for _ in range(args.trials)]
+    summary = {
+        key: statistics.median(t[key] for t in trials)
+        for key in ("first_paint_s", "login_rerun_s", "dashboard_rerun_s")
+    }
+    summary["heavy_imports_on_login"] = ", ".join(trials[-1]["heavy_imports_on_login"]) or "none"
+
+    for key, value in summary.items():
+        print(f"{key:<26}{value:.4f}" if isinstance(value, float) else f"{key:<26}{value}")
+    if args.out:
+        Path(args.out).write_text(json.dumps({"trials": trials, "summary": summary}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+COMPARABLES ENGINE - INDEX BUILD + TOP-K QUERY LATENCY
+Builds the per-version index over synthetic properties and times random
+top-k queries with and without the area / unit_type constraints.
+
+    python -m bench.comparables_bench --sizes 10000,200000 --queries 200
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from bench.fake_sheets import make_properties
+from erp import comparables, datasets
+
+CONSTRAINTS = {
+    "area+type": (True, True),
+    "type_only": (False, True),
+    "unconstrained": (False, False),
+}
+
+
+def run_size(rows: int, queries: int, k: int) -> List[Dict]:
+    handle = datasets.REGISTRY.publish("properties", f"bench-comparables-{rows}", make_properties(rows))
+    start = time.perf_counter()
+    comparables.get_index(handle)
+    build_s = time.perf_counter() - start
+
+    positions = np.random.default_rng(3).integers(0, rows, queries)
+    results = []
+    for name, (same_area, same_type) in CONSTRAINTS.items():
+        timings = []
+        for position in positions:
+            start = time.perf_counter()
+            comparables.find_comparables(handle, int(position), k, same_area, same_type)
+            timings.append((time.perf_counter() - start) * 1000)
+        results.append({"rows": rows, "constraint": name, "k": k, "build_s": build_s,
+                        "p50_ms": float(np.percentile(timings, 50)),
+                        "p95_ms": float(np.percentile(timings, 95))})
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,200000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=20)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    for rows in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        results.extend(run_size(rows, args.queries, args.k))
+
+    print(f"\n{'rows':>10}{'constraint':>16}{'build_s':>10}{'p50_ms':>10}{'p95_ms':>10}")
+    for r in results:
+        print(f"{r['rows']:>10,}{r['constraint']:>16}{r['build_s']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+NEAR-DUPLICATE DETECTION - ACCURACY + FULL VS INCREMENTAL BUILD
+Injects a known share of re-listed units (new unit ID, price ±5%, a word
+added to the notes, an alef variant in the address) into a synthetic
+sheet, then times a full build_index() and an incremental refresh after
+editing the notes of a few rows. Recall counts injected copies clustered
+with their original; precision counts clustered rows that belong to an
+injected pair.
+
+    python -m bench.dedup_bench --sizes 20000,200000 --dup-rate 0.02 --edits 100
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from bench.fake_sheets import make_properties
+from erp.dedup import build_index
+
+
+def with_duplicates(rows: int, dup_rate: float, rng: np.random.Generator):
+    """(sheet, original row positions) - copies are appended after the originals"""
+    df = make_properties(rows)
+    source = rng.choice(rows, size=int(rows * dup_rate), replace=False)
+    copies = df.iloc[source].copy()
+    copies["unit_id"] = [f"DUP{i:07d}" for i in range(len(copies))]
+    copies["price_total"] = (copies["price_total"] * rng.uniform(0.95, 1.05, len(copies))).astype("int64")
+    copies["notes"] = copies["notes"] + " " + rng.choice(["فرصة", "عاجل", "للبيع"], len(copies))
+    copies["address"] = copies["address"].str.replace("ا", "أ", n=1)
+    return pd.concat([df, copies], ignore_index=True), source
+
+
+def run_size(rows: int, dup_rate: float, edits: int) -> Dict:
+    rng = np.random.default_rng(11)
+    df, source = with_duplicates(rows, dup_rate, rng)
+    copies = rows + np.arange(source.size)
+
+    start = time.perf_counter()
+    index = build_index("bench-v1", df)
+    full_s = time.perf_counter() - start
+
+    labels = index.labels
+    recall = float(((labels[source] >= 0) & (labels[source] == labels[copies])).mean())
+    clustered = labels >= 0
+    true_rows = np.zeros(len(df), dtype=bool)
+    true_rows[source] = true_rows[copies] = True
+    precision = float(true_rows[clustered].mean()) if clustered.any() else 1.0
+
+    edited = df.copy()
+    rows_edited = rng.choice(len(df), size=edits, replace=False)
+    edited.loc[rows_edited, "notes"] = edited.loc[rows_edited, "notes"] + " تم التحديث"
+    start = time.perf_counter()
+    refreshed = build_index("bench-v2", edited, index)
+    incremental_s = time.perf_counter() - start
+
+    return {
+        "rows": len(df), "injected": int(source.size), "recall": recall, "precision": precision,
+        "clusters": index.stats["clusters"], "candidate_pairs": index.stats["candidate_pairs"],
+        "full_s": full_s, "edits": edits, "incremental_mode": refreshed.stats["mode"],
+        "incremental_s": incremental_s,
+        "same_clusters": bool(refreshed.stats["clusters"] == index.stats["clusters"]),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="20000,200000")
+    parser.add_argument("--dup-rate", type=float, default=0.02)
+    parser.add_argument("--edits", type=int, default=100)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    results = [run_size(int(s), args.dup_rate, args.edits) for s in args.sizes.split(",") if s.strip()]
+
+    print(f"\n{'rows':>9}{'injected':>10}{'recall':>8}{'precision':>11}{'clusters':>10}"
+          f"{'candidates':>12}{'full_s':>8}{'edits':>7}{'refresh_s':>11}")
+    for r in results:
+        print(f"{r['rows']:>9,}{r['injected']:>10,}{r['recall']:>8.3f}{r['precision']:>11.3f}{r['clusters']:>10,}"
+              f"{r['candidate_pairs']:>12,}{r['full_s']:>8.2f}{r['edits']:>7}{r['incremental_s']:>11.2f}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
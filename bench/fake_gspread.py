@@ -0,0 +1,127 @@
+"""
+LOCAL gspread STAND-IN
+Just enough of gspread's client for erp.writeback: open_by_key(id)
+.get_worksheet(0).batch_update(data) / .batch_get(["C:C"]). Updates land in a FakeSheetsServer
+frame (so the next export shows them), with optional per-call latency,
+a per-minute write quota answered with 429 and random 503s.
+
+    client = FakeGspreadClient(server, quota_per_minute=60)
+    WRITEBACK.set_backend(GspreadBackend(lambda: client))
+"""
+
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from bench.fake_sheets import FakeSheetsServer
+
+A1_PATTERN = re.compile(r"^([A-Z]+)(\d+)$")
+
+
+class FakeAPIError(Exception):
+    """Shaped like gspread.exceptions.APIError - carries the HTTP status as .code"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+def parse_a1(a1: str):
+    """'C12' → (row 12, col 3), both 1-based"""
+    match = A1_PATTERN.match(a1)
+    if match is None:
+        raise FakeAPIError(400, f"Unable to parse range: {a1}")
+    col = 0
+    for ch in match.group(1):
+        col = col * 26 + ord(ch) - 64
+    return int(match.group(2)), col
+
+
+class FakeWorksheet:
+    def __init__(self, client: "FakeGspreadClient", sheet_id: str):
+        self.client = client
+        self.sheet_id = sheet_id
+
+    def batch_update(self, data: List[Dict], value_input_option: str = "RAW", **kwargs):
+        self.client._call(self.sheet_id, data)
+        return {"totalUpdatedCells": len(data)}
+
+    def batch_get(self, ranges: List[str], **kwargs) -> List[List[List[str]]]:
+        """Whole-column ranges ("C:C") only - header row first, formatted as strings"""
+        with self.client.server._lock:
+            df = self.client.server.frames[self.sheet_id]
+        out = []
+        for a1 in ranges:
+            _, col = parse_a1(a1.split(":")[0] + "1")
+            column = df.columns[col - 1]
+            out.append([[str(column)]] + [["" if pd.isna(v) else str(v)] for v in df[column]])
+        return out
+
+
+class FakeSpreadsheet:
+    def __init__(self, client: "FakeGspreadClient", sheet_id: str):
+        self.client = client
+        self.id = sheet_id
+
+    def get_worksheet(self, index: int) -> FakeWorksheet:
+        return FakeWorksheet(self.client, self.id)
+
+
+class FakeGspreadClient:
+    def __init__(self, server: FakeSheetsServer, latency_ms: float = 0.0,
+                 quota_per_minute: Optional[int] = None, error_rate: float = 0.0, seed: int = 3):
+        self.server = server
+        self.latency_ms = latency_ms
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.cells_written = 0
+        self.rejected = {429: 0, 503: 0}
+        self._window = deque()
+        self._lock = threading.Lock()
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        with self.server._lock:
+            if key not in self.server.frames:
+                raise FakeAPIError(404, f"Requested entity was not found: {key}")
+        return FakeSpreadsheet(self, key)
+
+    def _call(self, sheet_id: str, data: List[Dict]):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            while self._window and now - self._window[0] > 60:
+                self._window.popleft()
+            if self.quota_per_minute is not None and len(self._window) >= self.quota_per_minute:
+                self.rejected[429] += 1
+                raise FakeAPIError(429, "Quota exceeded for quota metric 'Write requests'")
+            self._window.append(now)
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.rejected[503] += 1
+                raise FakeAPIError(503, "The service is currently unavailable.")
+            self._apply(sheet_id, data)
+            self.cells_written += len(data)
+
+    def _apply(self, sheet_id: str, data: List[Dict]):
+        df = self.server.frames[sheet_id].copy()
+        for item in data:
+            row, col = parse_a1(item["range"])
+            if row < 2 or col > len(df.columns):
+                raise FakeAPIError(400, f"Range outside the data: {item['range']}")
+            label, column = row - 2, df.columns[col - 1]
+            if label >= len(df):
+                raise FakeAPIError(400, f"Range outside the data: {item['range']}")
+            value = item["values"][0][0]
+            if pd.api.types.is_numeric_dtype(df[column]) and isinstance(value, str):
+                df[column] = df[column].astype(object)
+            df.iat[label, col - 1] = value
+        # Export rebuilt on the next request, not per write
+        self.server.register(sheet_id, df, prebuild=False)
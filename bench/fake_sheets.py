@@ -0,0 +1,301 @@
+"""
+LOCAL GOOGLE SHEETS STAND-IN
+Generates users / properties / mother_clients / transactions workbooks and
+serves them from /spreadsheets/d/<id>/export?format=xlsx|csv
+"""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
+AREAS = ["المعادي", "مدينة نصر", "التجمع الخامس", "الشيخ زايد", "الزمالك", "المهندسين", "6 أكتوبر", "العبور"]
+UNIT_TYPES = ["شقة", "دوبلكس", "فيلا", "استوديو", "محل", "مكتب"]
+LISTING_TYPES = ["بيع", "إيجار"]
+UNIT_STATUSES = ["متاح", "محجوز", "مباع"]
+YES_NO = ["نعم", "لا"]
+NOTE_WORDS = ["بحري", "مرخصة", "قسط", "ناصية", "جراج", "عداد كهرباء", "الترا سوبر لوكس", "تشطيب", "فيو", "قريب من المترو"]
+STREETS = ["شارع 9", "شارع التسعين", "شارع مصطفى النحاس", "شارع عباس العقاد", "شارع جامعة الدول", "محور 26 يوليو"]
+
+BENCH_PASSWORD = "bench-pass"
+ROLES = ("owner", "manager", "sales")
+
+# ============================================
+# DATA GENERATORS
+# ============================================
+def make_users(n_sales: int = 40) -> pd.DataFrame:
+    """One owner, one manager, n sales agents - all share BENCH_PASSWORD"""
+    rows = [
+        {"username": "owner", "password": BENCH_PASSWORD, "role": "owner", "full_name": "Bench Owner"},
+        {"username": "manager", "password": BENCH_PASSWORD, "role": "manager", "full_name": "Bench Manager"},
+    ]
+    for i in range(n_sales):
+        rows.append({
+            "username": f"agent{i:03d}",
+            "password": BENCH_PASSWORD,
+            "role": "sales",
+            "full_name": f"Sales Agent {i:03d}",
+        })
+    return pd.DataFrame(rows)
+
+
+def make_properties(n: int, seed: int = 7, n_agents: int = 40) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    area_sqm = rng.integers(40, 400, n)
+    price_per_m = rng.integers(8_000, 45_000, n)
+    notes = [
+        " ".join(rng.choice(NOTE_WORDS, size=3, replace=False))
+        for _ in range(n)
+    ]
+    df = pd.DataFrame({
+        "unit_id": [f"U{i:07d}" for i in range(n)],
+        "area": rng.choice(AREAS, n),
+        "unit_type": rng.choice(UNIT_TYPES, n),
+        "listing_type": rng.choice(LISTING_TYPES, n, p=[0.7, 0.3]),
+        "price_total": (area_sqm * price_per_m // 1000 * 1000).astype("int64"),
+        "area_sqm": area_sqm,
+        "floor_number": rng.integers(0, 20, n),
+        "rooms": rng.integers(1, 6, n),
+        "bathrooms": rng.integers(1, 4, n),
+        "unit_status": rng.choice(UNIT_STATUSES, n, p=[0.7, 0.1, 0.2]),
+        "electricity": rng.choice(YES_NO, n),
+        "water": rng.choice(YES_NO, n),
+        "gas": rng.choice(YES_NO, n),
+        "elevator": rng.choice(YES_NO, n),
+        "garage": rng.choice(YES_NO, n),
+        "address": [f"{s} - عمارة {b}" for s, b in zip(rng.choice(STREETS, n), rng.integers(1, 300, n))],
+        "notes": notes,
+        "link": [f"https://example.com/units/U{i:07d}" for i in range(n)],
+        "agent": [f"agent{i:03d}" for i in rng.integers(0, n_agents, n)],
+    })
+    return df
+
+
+def make_mother_clients(n: int, seed: int = 11, n_agents: int = 40) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    budget_min = rng.integers(5, 80, n) * 100_000
+    return pd.DataFrame({
+        "client_id": [f"C{i:07d}" for i in range(n)],
+        "client_name": [f"عميل {i}" for i in range(n)],
+        "phone": [f"01{rng.integers(0, 3)}{i:08d}" for i in range(n)],
+        "assigned_to": [f"agent{i:03d}" for i in rng.integers(0, n_agents, n)],
+        "budget_min": budget_min,
+        "budget_max": budget_min + rng.integers(5, 40, n) * 100_000,
+        "preferred_area": rng.choice(AREAS, n),
+        "unit_type": rng.choice(UNIT_TYPES, n),
+        "rooms": rng.integers(1, 6, n),
+        "status": rng.choice(["جديد", "متابعة", "مغلق"], n),
+    })
+
+
+def make_transactions(n: int, n_units: int, seed: int = 13, n_agents: int = 40) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 600, n), unit="D")
+    return pd.DataFrame({
+        "transaction_id": [f"T{i:07d}" for i in range(n)],
+        "unit_id": [f"U{i:07d}" for i in rng.integers(0, max(n_units, 1), n)],
+        "agent": [f"agent{i:03d}" for i in rng.integers(0, n_agents, n)],
+        "amount": rng.integers(5, 150, n) * 100_000,
+        "date": dates.strftime("%Y-%m-%d"),
+    })
+
+
+def make_dataset(rows: int, seed: int = 7) -> Dict[str, pd.DataFrame]:
+    """All five sheets for one benchmark size"""
+    return {
+        "users": make_users(),
+        "login": make_users(),
+        "properties": make_properties(rows, seed),
+        "mother_clients": make_mother_clients(max(rows // 10, 100), seed + 4),
+        "transactions": make_transactions(rows, rows, seed + 6),
+    }
+
+# ============================================
+# WORKBOOK BYTES - CACHED ON DISK
+# ============================================
+def to_xlsx_bytes(df: pd.DataFrame) -> bytes:
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False, engine="openpyxl")
+    return buffer.getvalue()
+
+
+def workbook_bytes(df: pd.DataFrame, fmt: str = "xlsx", cache: bool = True) -> bytes:
+    """Serialize once per content hash - 100k+ row workbooks are slow to write"""
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if not cache:
+        return to_xlsx_bytes(df)
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
+    path = CACHE_DIR / f"{digest}.xlsx"
+    if path.exists():
+        return path.read_bytes()
+    content = to_xlsx_bytes(df)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(content)
+    tmp.replace(path)
+    return content
+
+# ============================================
+# HTTP SERVER - MIMICS THE EXPORT ENDPOINT
+# ============================================
+class FakeSheetsServer:
+    """Serve registered sheets at /spreadsheets/d/<id>/export?format=...
+
+    with FakeSheetsServer(latency_ms=150) as server:
+        url = server.register("properties", df)
+    """
+
+    def __init__(self, latency_ms: float = 0.0, bandwidth_mbps: Optional[float] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.latency_ms = latency_ms
+        self.bandwidth_mbps = bandwidth_mbps
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self.payloads: Dict[tuple, bytes] = {}
+        self.requests = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def sheet_url(self, sheet_id: str) -> str:
+        return f"{self.base_url}/spreadsheets/d/{sheet_id}/edit"
+
+    def register(self, sheet_id: str, df: pd.DataFrame, prebuild: bool = True) -> str:
+        """Publish (or replace) a sheet - returns its edit URL"""
+        with self._lock:
+            self.frames[sheet_id] = df
+            for key in [k for k in self.payloads if k[0] == sheet_id]:
+                del self.payloads[key]
+        if prebuild:
+            self.payload(sheet_id, "xlsx")
+        return self.sheet_url(sheet_id)
+
+    def payload(self, sheet_id: str, fmt: str) -> Optional[bytes]:
+        key = (sheet_id, fmt)
+        with self._lock:
+            if key in self.payloads:
+                return self.payloads[key]
+            df = self.frames.get(sheet_id)
+        if df is None:
+            return None
+        content = workbook_bytes(df, fmt)
+        with self._lock:
+            self.payloads[key] = content
+        return content
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip("/").split("/")
+                if len(parts) != 4 or parts[:2] != ["spreadsheets", "d"] or parts[3] != "export":
+                    self.send_error(404)
+                    return
+                fmt = parse_qs(parsed.query).get("format", ["xlsx"])[0]
+                if fmt not in ("xlsx", "csv"):
+                    self.send_error(400)
+                    return
+                content = server.payload(parts[2], fmt)
+                if content is None:
+                    self.send_error(404)
+                    return
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000)
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type",
+                    "text/csv" if fmt == "csv"
+                    else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self._write(content)
+                with server._lock:
+                    server.requests += 1
+                    server.bytes_served += len(content)
+
+            def _write(self, content: bytes):
+                if not server.bandwidth_mbps:
+                    self.wfile.write(content)
+                    return
+                chunk = 64 * 1024
+                per_chunk = chunk * 8 / (server.bandwidth_mbps * 1e6)
+                for i in range(0, len(content), chunk):
+                    self.wfile.write(content[i:i + chunk])
+                    time.sleep(per_chunk)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeSheetsServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-sheets", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def secrets_for(server: FakeSheetsServer, suffix: str = "") -> Dict[str, str]:
+    """st.secrets["google_sheets"] block pointing every sheet at the stand-in"""
+    return {
+        f"{name}_sheet_url": server.sheet_url(f"bench-{name}{suffix}")
+        for name in ("users", "properties", "mother_clients", "login", "transactions")
+    }
+
+
+def register_dataset(server: FakeSheetsServer, dataset: Dict[str, pd.DataFrame], suffix: str = "") -> Dict[str, str]:
+    for name, df in dataset.items():
+        server.register(f"bench-{name}{suffix}", df)
+    return secrets_for(server, suffix)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve generated sheets until interrupted")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with FakeSheetsServer(latency_ms=args.latency_ms, port=args.port) as srv:
+        urls = register_dataset(srv, make_dataset(args.rows))
+        print(f"export ERP_SHEETS_BASE_URL={srv.base_url}")
+        print("[google_sheets]")
+        for key, value in urls.items():
+            print(f'{key} = "{value}"')
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
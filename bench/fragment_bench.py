@@ -0,0 +1,96 @@
+"""
+PER-INTERACTION WORK - FULL RERUN VS FRAGMENT RERUN
+For each widget interaction, compares the whole-script work (what every
+interaction cost before fragments: navigation, all tabs, every export) with
+the work inside the fragment that owns the widget (what a browser rerun now
+recomputes). AppTest always reruns the full script, so both numbers come
+from the perf stage timers recorded during that run.
+
+    python -m bench.fragment_bench --sizes 1000,10000
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.fake_sheets import FakeSheetsServer, make_dataset, register_dataset
+from bench.run_bench import KEYWORD_LABEL, AppSession
+from erp import perf
+
+
+def stage_totals() -> Dict[str, float]:
+    return {row["stage"]: row["total_s"] for row in perf.REGISTRY.stage_summary()}
+
+
+def measure(session: AppSession, action: Callable, fragment: str) -> Dict[str, float]:
+    before = stage_totals()
+    session.timed_run(action)
+    after = stage_totals()
+    delta = lambda stage: after.get(stage, 0.0) - before.get(stage, 0.0)
+    full, scoped = delta("script_run"), delta(fragment)
+    return {"full_rerun_ms": full * 1000, "fragment_ms": scoped * 1000,
+            "saved_pct": (1 - scoped / full) * 100 if full else 0.0}
+
+
+def run_size(server: FakeSheetsServer, rows: int, repeat: int) -> List[Dict]:
+    secrets = register_dataset(server, make_dataset(rows), suffix=f"-{rows}")
+    interactions = {
+        "price_filter": (lambda at: at.number_input(key="p_from").set_value(at.number_input(key="p_from").value + 100_000),
+                         "fragment_property_search"),
+        "area_multiselect": (lambda at: at.multiselect(key="ms_area").set_value(list(at.multiselect(key="ms_area").options)[:2]),
+                             "fragment_property_search"),
+        "keyword": (lambda at: next(t for t in at.text_input if t.label == KEYWORD_LABEL).input("بحري"),
+                    "fragment_property_search"),
+        "link_search": (lambda at: at.text_input(key="link_search").input("U00001"),
+                        "fragment_link_finder"),
+    }
+    samples: Dict[str, List[Dict]] = {name: [] for name in interactions}
+    for _ in range(repeat):
+        session = AppSession(secrets)
+        session.timed_run()
+        session.login("agent001")
+        session.click("sales_load_props")
+        for name, (action, fragment) in interactions.items():
+            samples[name].append(measure(session, action, fragment))
+
+    results = []
+    for name, runs in samples.items():
+        med = lambda key: sorted(r[key] for r in runs)[len(runs) // 2]
+        results.append({"interaction": name, "rows": rows,
+                        "full_rerun_ms": med("full_rerun_ms"), "fragment_ms": med("fragment_ms"),
+                        "saved_pct": med("saved_pct")})
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    with FakeSheetsServer() as server:
+        os.environ["ERP_SHEETS_BASE_URL"] = server.base_url
+        for rows in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            results.extend(run_size(server, rows, args.repeat))
+
+    print(f"\n{'interaction':<20}{'rows':>10}{'full_rerun_ms':>16}{'fragment_ms':>14}{'saved':>8}")
+    for r in results:
+        print(f"{r['interaction']:<20}{r['rows']:>10,}{r['full_rerun_ms']:>16.1f}"
+              f"{r['fragment_ms']:>14.1f}{r['saved_pct']:>7.0f}%")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+INVENTORY HISTORY - DELTA LOG SIZE, RECORD / REBUILD TIME, UNIT QUERIES
+Records S snapshots of a synthetic properties sheet into a fresh
+HistoryStore, where each snapshot reprices / sells / edits a share of the
+units and adds / removes a few. Compares disk use with keeping every
+snapshot whole (one Parquet file or one xlsx export each), times rebuilding
+the sheet at the middle and the last snapshot (checked equal to the frame
+that was recorded), and times a unit's price history from the event index
+against replaying every snapshot.
+
+    python -m bench.history_bench --units 50000 --snapshots 30
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from bench.fake_sheets import make_properties, workbook_bytes
+from erp.history import HistoryStore
+
+
+def evolve(df: pd.DataFrame, step: int, change_rate: float, rng) -> pd.DataFrame:
+    """Next snapshot: repriced / sold / edited units, a few listed and removed"""
+    df = df.copy()
+    n = len(df)
+    changed = int(n * change_rate)
+    repriced = rng.choice(n, changed, replace=False)
+    df.loc[repriced, "price_total"] = (df.loc[repriced, "price_total"] * rng.uniform(0.9, 1.1, changed)).round(-3)
+    df.loc[rng.choice(n, changed // 4, replace=False), "unit_status"] = "مباع"
+    df.loc[rng.choice(n, changed // 4, replace=False), "notes"] = f"تحديث {step}"
+    removed = rng.choice(n, max(1, n // 1000), replace=False)
+    df = df.drop(index=df.index[removed])
+    listed = make_properties(max(1, n // 500), seed=1000 + step)
+    listed["unit_id"] = [f"S{step:03d}-{i:05d}" for i in range(len(listed))]
+    return pd.concat([df, listed], ignore_index=True)
+
+
+def replay_unit(frames: List[pd.DataFrame], unit_id: str) -> List:
+    """The naive answer: look the unit up in every snapshot"""
+    prices = []
+    for df in frames:
+        rows = df.loc[df["unit_id"] == unit_id, "price_total"]
+        prices.append(rows.iloc[-1] if len(rows) else None)
+    return prices
+
+
+def same_frame(got: pd.DataFrame, expected: pd.DataFrame) -> bool:
+    try:
+        pd.testing.assert_frame_equal(got.set_index("unit_id").sort_index(),
+                                      expected.set_index("unit_id").sort_index())
+        return True
+    except AssertionError:
+        return False
+
+
+def run(units: int, snapshots: int, change_rate: float, checkpoint_every: int, xlsx: bool) -> Dict:
+    rng = np.random.default_rng(7)
+    root = tempfile.mkdtemp(prefix="erp_history_")
+    store = HistoryStore(root, checkpoint_every=checkpoint_every)
+    start_at = datetime(2025, 1, 1)
+    frames, record_s, full_parquet = [], [], 0
+    df = make_properties(units)
+    try:
+        for step in range(snapshots):
+            if step:
+                df = evolve(df, step, change_rate, rng)
+            frames.append(df)
+            start = time.perf_counter()
+            store.record("properties", f"v{step}", df, taken_at=start_at + timedelta(days=step))
+            record_s.append(time.perf_counter() - start)
+            buffer = BytesIO()
+            df.to_parquet(buffer, compression="zstd")
+            full_parquet += buffer.tell()
+        full_xlsx = len(workbook_bytes(frames[-1])) * snapshots if xlsx else None
+
+        segments = store.segments("properties")
+        history_bytes = sum(s["bytes"] for s in segments)
+        rebuild = {}
+        for label, seq in (("middle", snapshots // 2), ("last", snapshots)):
+            start = time.perf_counter()
+            got = store.snapshot_at("properties", seq=seq)
+            rebuild[label] = (time.perf_counter() - start, same_frame(got, frames[seq - 1]))
+
+        sample = rng.choice(frames[0]["unit_id"].to_numpy(), 20, replace=False)
+        store.events()  # first call loads the index
+        start = time.perf_counter()
+        histories = [store.unit_history(uid) for uid in sample]
+        index_ms = (time.perf_counter() - start) / len(sample) * 1000
+        start = time.perf_counter()
+        replayed = [replay_unit(frames, uid) for uid in sample[:3]]
+        replay_ms = (time.perf_counter() - start) / 3 * 1000
+        # The index's price events must match the replayed price sequence
+        index_ok = all(
+            [p for p in h.loc[h["event"].isin(["listed", "price"]), "price"]]
+            == [p for i, p in enumerate(r) if p is not None and (i == 0 or p != r[i - 1])]
+            for h, r in zip(histories, replayed)
+        )
+        return {
+            "units": units, "snapshots": snapshots, "change_rate": change_rate,
+            "checkpoints": sum(s["kind"] == "checkpoint" for s in segments),
+            "record_ms_avg": float(np.mean(record_s[1:])) * 1000 if snapshots > 1 else record_s[0] * 1000,
+            "history_mb": history_bytes / 1e6,
+            "full_parquet_mb": full_parquet / 1e6,
+            "full_xlsx_mb": full_xlsx / 1e6 if full_xlsx else None,
+            "rebuild_middle_ms": rebuild["middle"][0] * 1000, "rebuild_middle_ok": rebuild["middle"][1],
+            "rebuild_last_ms": rebuild["last"][0] * 1000, "rebuild_last_ok": rebuild["last"][1],
+            "unit_index_ms": index_ms, "unit_replay_ms": replay_ms, "unit_index_ok": index_ok,
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=50_000)
+    parser.add_argument("--snapshots", type=int, default=30)
+    parser.add_argument("--change-rate", type=float, default=0.02, help="share of units repriced per snapshot")
+    parser.add_argument("--checkpoint-every", type=int, default=24)
+    parser.add_argument("--xlsx", action="store_true", help="also size one xlsx export per snapshot (slow)")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    r = run(args.units, args.snapshots, args.change_rate, args.checkpoint_every, args.xlsx)
+    print(f"\n{args.units:,} units, {args.snapshots} snapshots, {args.change_rate:.0%} repriced per snapshot")
+    print(f"  checkpoints              {r['checkpoints']}")
+    print(f"  record / snapshot        {r['record_ms_avg']:.0f} ms")
+    print(f"  history on disk          {r['history_mb']:.2f} MB")
+    print(f"  full Parquet each        {r['full_parquet_mb']:.2f} MB")
+    if r["full_xlsx_mb"] is not None:
+        print(f"  full xlsx each           {r['full_xlsx_mb']:.2f} MB")
+    print(f"  rebuild middle / last    {r['rebuild_middle_ms']:.0f} / {r['rebuild_last_ms']:.0f} ms"
+          f"  (exact: {r['rebuild_middle_ok']} / {r['rebuild_last_ok']})")
+    print(f"  unit history: index      {r['unit_index_ms']:.2f} ms  (matches replay: {r['unit_index_ok']})")
+    print(f"  unit history: replay     {r['unit_replay_ms']:.0f} ms")
+    if args.out:
+        Path(args.out).write_text(json.dumps(r, indent=2))
+    return 0 if r["rebuild_middle_ok"] and r["rebuild_last_ok"] and r["unit_index_ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""
+MULTI-USER LOAD GENERATOR
+Simulates N concurrent owner/manager/sales sessions against main() with the
+local sheets stand-in, spread over worker processes (threads inside each, like
+one Streamlit server process). Reports throughput, tail latency per operation,
+per-process RSS and CPU for every session count in the sweep.
+
+    python -m bench.load_test --sessions 1,10,40 --processes 2 --rows 10000
+    python -m bench.load_test --sessions 40 --mix owner:1,manager:2,sales:37
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from bench.fake_sheets import FakeSheetsServer, make_dataset, register_dataset
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+KEYWORDS = ["بحري", "مرخصة", "قسط", "ناصية", "جراج"]
+
+# ============================================
+# PROCESS METRICS - LINUX /proc
+# ============================================
+def read_rss_kb() -> Tuple[int, int]:
+    """(current RSS, peak RSS) in kB for this process"""
+    rss = hwm = 0
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+            elif line.startswith("VmHWM:"):
+                hwm = int(line.split()[1])
+    return rss, hwm
+
+
+class ResourceSampler(threading.Thread):
+    """Sample RSS on an interval while the worker runs"""
+
+    def __init__(self, interval: float = 0.25):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.samples: List[int] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append(read_rss_kb()[0])
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+# ============================================
+# SESSION SCRIPTS PER ROLE
+# ============================================
+def sales_script(session, rng: random.Random, username: str):
+    yield "login", lambda: session.login(username)
+    yield "load_properties", lambda: session.click("sales_load_props")
+    p_from = session.widget_value("p_from")
+    yield "filter_price", lambda: session.set_number("p_from", p_from + rng.randint(1, 20) * 100_000)
+    area = session.at.multiselect(key="ms_area")
+    if area.options:
+        picked = rng.sample(list(area.options), k=min(2, len(area.options)))
+        yield "filter_area", lambda: session.timed_run(lambda at: at.multiselect(key="ms_area").set_value(picked))
+    yield "search", lambda: session.set_text("ادخل الكلمات الدليلية هنا...", rng.choice(KEYWORDS))
+    # Export bytes are built only on the download click - time that directly
+    yield "export", lambda: session.export_properties()
+
+
+def owner_script(session, rng: random.Random, username: str):
+    yield "login", lambda: session.login(username)
+    yield "dashboard_render", lambda: session.timed_run()
+    yield "load_properties", lambda: session.click("owner_load_props")
+    yield "load_clients", lambda: session.click("owner_load_clients")
+
+
+def manager_script(session, rng: random.Random, username: str):
+    yield "login", lambda: session.login(username)
+    yield "load_properties", lambda: session.click("mgr_load_props")
+    yield "load_clients", lambda: session.click("mgr_load_clients")
+    yield "load_transactions", lambda: session.click("mgr_load_transactions")
+
+
+SCRIPTS = {"sales": sales_script, "owner": owner_script, "manager": manager_script}
+
+
+def assign_roles(n: int, mix: Dict[str, float]) -> List[str]:
+    """Deterministic role list proportional to mix (largest remainder)"""
+    total = sum(mix.values())
+    quotas = {role: n * w / total for role, w in mix.items()}
+    counts = {role: int(q) for role, q in quotas.items()}
+    leftovers = sorted(quotas, key=lambda r: quotas[r] - counts[r], reverse=True)
+    for role in leftovers[: n - sum(counts.values())]:
+        counts[role] += 1
+    roles = [role for role, c in counts.items() for _ in range(c)]
+    random.Random(0).shuffle(roles)
+    return roles
+
+# ============================================
+# WORKER PROCESS
+# ============================================
+def run_session(index: int, role: str, secrets: Dict[str, str], args: Dict, ops: List[Dict]):
+    from bench.run_bench import AppSession
+
+    rng = random.Random(index)
+    time.sleep(rng.uniform(0, args["ramp_s"]))
+    username = {"owner": "owner", "manager": "manager"}.get(role, f"agent{index % 40:03d}")
+    try:
+        session = AppSession(secrets)
+        session.timed_run()
+        for _ in range(args["iterations"]):
+            for op, action in SCRIPTS[role](session, rng, username):
+                start = time.perf_counter()
+                error = None
+                try:
+                    action()
+                except Exception as e:
+                    error = repr(e)[:200]
+                ops.append({"role": role, "op": op, "seconds": time.perf_counter() - start,
+                            "ok": error is None, "error": error})
+                if args["think_ms"]:
+                    time.sleep(rng.uniform(0.5, 1.5) * args["think_ms"] / 1000)
+            session = AppSession(secrets)
+            session.timed_run()
+    except Exception as e:
+        ops.append({"role": role, "op": "session_error", "seconds": 0.0, "ok": False, "error": repr(e)[:200]})
+
+
+def worker_main(worker_id: int, sessions: List[Tuple[int, str]], secrets: Dict[str, str],
+                base_url: str, args: Dict, out: "mp.Queue"):
+    os.environ["ERP_SHEETS_BASE_URL"] = base_url
+    # Import Streamlit before measuring so baseline RSS reflects an idle server
+    from bench import run_bench  # noqa: F401
+
+    baseline_rss, _ = read_rss_kb()
+    cpu_start = os.times()
+    sampler = ResourceSampler()
+    sampler.start()
+    wall_start = time.perf_counter()
+
+    ops: List[Dict] = []
+    threads = [
+        threading.Thread(target=run_session, args=(i, role, secrets, args, ops), daemon=True)
+        for i, role in sessions
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    wall = time.perf_counter() - wall_start
+    sampler.stop()
+    cpu_end = os.times()
+    rss, hwm = read_rss_kb()
+    cpu = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    out.put({
+        "worker": worker_id,
+        "pid": os.getpid(),
+        "sessions": len(sessions),
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "cpu_util": cpu / wall if wall else 0.0,
+        "rss_baseline_mb": baseline_rss / 1024,
+        "rss_end_mb": rss / 1024,
+        "rss_peak_mb": max(sampler.samples + [hwm]) / 1024,
+        "rss_mean_mb": (sum(sampler.samples) / len(sampler.samples) / 1024) if sampler.samples else rss / 1024,
+        "ops": ops,
+    })
+
+# ============================================
+# DRIVER
+# ============================================
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    arr = np.asarray(values)
+    return {
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+    }
+
+
+def run_level(n_sessions: int, processes: int, secrets: Dict[str, str], base_url: str,
+              mix: Dict[str, float], args: Dict) -> Dict:
+    roles = assign_roles(n_sessions, mix)
+    buckets: List[List[Tuple[int, str]]] = [[] for _ in range(min(processes, n_sessions))]
+    for i, role in enumerate(roles):
+        buckets[i % len(buckets)].append((i, role))
+
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    start = time.perf_counter()
+    procs = [
+        ctx.Process(target=worker_main, args=(w, bucket, secrets, base_url, args, queue))
+        for w, bucket in enumerate(buckets)
+    ]
+    for p in procs:
+        p.start()
+    workers = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - start
+
+    ops = [op for w in workers for op in w.pop("ops")]
+    ok_ops = [op for op in ops if op["ok"]]
+    by_op: Dict[str, List[float]] = {}
+    for op in ok_ops:
+        by_op.setdefault(op["op"], []).append(op["seconds"])
+    failures: Dict[str, Dict[str, int]] = {}
+    for op in ops:
+        if not op["ok"]:
+            per_op = failures.setdefault(op["op"], {})
+            per_op[op["error"]] = per_op.get(op["error"], 0) + 1
+
+    return {
+        "sessions": n_sessions,
+        "processes": len(procs),
+        "wall_s": wall,
+        "ops_total": len(ops),
+        "ops_failed": len(ops) - len(ok_ops),
+        "throughput_ops_s": len(ok_ops) / wall if wall else 0.0,
+        "latency_s": percentiles([op["seconds"] for op in ok_ops]),
+        "latency_by_op_s": {op: percentiles(v) for op, v in sorted(by_op.items())},
+        "failures_by_op": failures,
+        "workers": sorted(workers, key=lambda w: w["worker"]),
+        "rss_peak_total_mb": sum(w["rss_peak_mb"] for w in workers),
+        "cpu_total_s": sum(w["cpu_s"] for w in workers),
+    }
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        role, _, weight = part.partition(":")
+        if role.strip() not in SCRIPTS:
+            raise SystemExit(f"unknown role in --mix: {role}")
+        mix[role.strip()] = float(weight or 1)
+    return mix
+
+
+def print_summary(levels: List[Dict]):
+    print(f"\n{'sessions':>9}{'procs':>7}{'ops/s':>9}{'p50_s':>9}{'p95_s':>9}{'p99_s':>9}"
+          f"{'failed':>8}{'rss_peak_mb':>13}{'rss/proc_mb':>13}{'cpu_s':>9}")
+    for lvl in levels:
+        lat = lvl["latency_s"]
+        per_proc = lvl["rss_peak_total_mb"] / lvl["processes"]
+        print(f"{lvl['sessions']:>9}{lvl['processes']:>7}{lvl['throughput_ops_s']:>9.2f}"
+              f"{lat['p50']:>9.3f}{lat['p95']:>9.3f}{lat['p99']:>9.3f}{lvl['ops_failed']:>8}"
+              f"{lvl['rss_peak_total_mb']:>13.1f}{per_proc:>13.1f}{lvl['cpu_total_s']:>9.1f}")
+    last = levels[-1]
+    print(f"\nper-operation latency at {last['sessions']} sessions:")
+    for op, lat in last["latency_by_op_s"].items():
+        print(f"  {op:<20} p50={lat['p50']:.3f}s p95={lat['p95']:.3f}s p99={lat['p99']:.3f}s")
+    for op, errors in last["failures_by_op"].items():
+        for error, count in errors.items():
+            print(f"  FAILED {op:<13} x{count}: {error}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1,10,40", help="comma separated session counts to sweep")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes (Streamlit servers)")
+    parser.add_argument("--mix", default="owner:1,manager:2,sales:7", help="role weights")
+    parser.add_argument("--rows", type=int, default=10_000, help="properties rows served")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="simulated export latency")
+    parser.add_argument("--iterations", type=int, default=1, help="script repetitions per session")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between operations")
+    parser.add_argument("--ramp-s", type=float, default=2.0, help="spread session starts over this window")
+    parser.add_argument("--out", default=None, help="results JSON path")
+    args = parser.parse_args(argv)
+
+    levels_n = [int(s) for s in args.sessions.split(",") if s.strip()]
+    mix = parse_mix(args.mix)
+    session_args = {"iterations": args.iterations, "think_ms": args.think_ms, "ramp_s": args.ramp_s}
+
+    levels = []
+    with FakeSheetsServer(latency_ms=args.latency_ms) as server:
+        secrets = register_dataset(server, make_dataset(args.rows))
+        for n in levels_n:
+            print(f"running {n} session(s) on {min(args.processes, n)} process(es) ...", flush=True)
+            levels.append(run_level(n, args.processes, secrets, server.base_url, mix, session_args))
+
+    print_summary(levels)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "rows": args.rows,
+            "latency_ms": args.latency_ms,
+            "mix": mix,
+            **session_args,
+        },
+        "levels": levels,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\nresults written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
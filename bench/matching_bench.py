@@ -0,0 +1,53 @@
+"""
+CLIENT ↔ INVENTORY MATCHING - THROUGHPUT INLINE VS PROCESS POOL
+Times match_clients() on synthetic mother clients × properties for each
+size pair and worker count.
+
+    python -m bench.matching_bench --pairs 1000x10000,10000x100000 --workers 1,4
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.fake_sheets import make_mother_clients, make_properties
+from erp import matching
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", default="1000x10000,10000x100000", help="clientsxunits, comma separated")
+    parser.add_argument("--workers", default="1,4")
+    parser.add_argument("--top-k", type=int, default=matching.DEFAULT_TOP_K)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    for pair in [p for p in args.pairs.split(",") if p.strip()]:
+        n_clients, n_units = (int(x) for x in pair.lower().split("x"))
+        clients, units = make_mother_clients(n_clients), make_properties(n_units)
+        for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+            start = time.perf_counter()
+            matches = matching.match_clients(clients, units, args.top_k, workers=workers)
+            elapsed = time.perf_counter() - start
+            results.append({"clients": n_clients, "units": n_units, "workers": workers, "seconds": elapsed,
+                            "matches": len(matches), "matched_clients": int(matches["client_row"].nunique()),
+                            "pairs_per_s": n_clients * n_units / elapsed})
+
+    print(f"\n{'clients':>10}{'units':>10}{'workers':>9}{'seconds':>10}{'matches':>10}{'M pairs/s':>12}")
+    for r in results:
+        print(f"{r['clients']:>10,}{r['units']:>10,}{r['workers']:>9}{r['seconds']:>10.2f}"
+              f"{r['matches']:>10,}{r['pairs_per_s'] / 1e6:>12,.0f}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
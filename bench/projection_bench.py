@@ -0,0 +1,138 @@
+"""
+ROLE-BASED COLUMN PROJECTION - PARSE TIME + MEMORY PER VIEW
+Widens the synthetic properties sheet with the owner-only columns a real
+inventory carries (owner contact, commission, payment plan, long
+descriptions...) and parses its xlsx export the way each role now does:
+sales and manager decode only their view's columns, the owner reads every
+column. Also times pd.read_excel on the whole sheet (what every role did
+before), the first lazy decode of notes + address, and assembling full
+rows for an export.
+
+    python -m bench.projection_bench --sizes 5000,50000
+"""
+
+import argparse
+import json
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from bench.fake_sheets import AREAS, NOTE_WORDS, STREETS, make_properties, workbook_bytes
+from erp.projection import WIDE_TEXT_COLUMNS, view_spec
+from erp.xlsx_reader import read_columns
+
+VIEWS = ("sales", "manager", "owner")
+FINISHES = ["نصف تشطيب", "تشطيب كامل", "سوبر لوكس", "الترا سوبر لوكس", "على الطوب"]
+SOURCES = ["فيسبوك", "ترشيح", "زيارة", "موقع", "OLX"]
+
+
+def make_wide_properties(n: int, seed: int = 17) -> pd.DataFrame:
+    """make_properties plus 22 owner-only columns (41 in all)"""
+    rng = np.random.default_rng(seed)
+    df = make_properties(n)
+    price = df["price_total"].to_numpy()
+    sentences = [" ".join(rng.choice(NOTE_WORDS, size=12)) for _ in range(64)]
+    extra = {
+        "owner_name": [f"مالك {i:05d}" for i in rng.integers(0, n // 3 + 1, n)],
+        "owner_phone": [f"010{p:08d}" for p in rng.integers(0, 10**8, n)],
+        "owner_email": [f"owner{i}@example.com" for i in rng.integers(0, n, n)],
+        "owner_national_no": [f"{p:014d}" for p in rng.integers(10**13, 3 * 10**13, n)],
+        "commission_pct": rng.choice([1.0, 1.5, 2.0, 2.5], n),
+        "commission_value": (price * 0.02).astype("int64"),
+        "down_payment": (price * rng.uniform(0.1, 0.4, n)).astype("int64"),
+        "installment_years": rng.integers(0, 10, n),
+        "maintenance_fee": rng.integers(0, 50_000, n),
+        "finishing": rng.choice(FINISHES, n),
+        "compound": rng.choice(["", "كمبوند النخيل", "كمبوند الياسمين", "دار مصر"], n),
+        "street": rng.choice(STREETS, n),
+        "building_no": rng.integers(1, 300, n),
+        "apartment_no": rng.integers(1, 60, n),
+        "district": rng.choice(AREAS, n),
+        "source": rng.choice(SOURCES, n),
+        "priority": rng.integers(1, 5, n),
+        "listed_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 700, n), unit="D"),
+        "updated_at": pd.Timestamp("2025-06-01") + pd.to_timedelta(rng.integers(0, 300, n), unit="D"),
+        "price_history": [f"{p};{int(p * 1.05)};{int(p * 1.1)}" for p in price],
+        "description": [sentences[i] + " - " + sentences[j] for i, j in rng.integers(0, 64, (n, 2))],
+        "internal_notes": [sentences[i] for i in rng.integers(0, 64, n)],
+    }
+    return df.assign(**extra)
+
+
+def frame_mb(df: pd.DataFrame) -> float:
+    return float(df.memory_usage(deep=True, index=False).sum()) / 1e6
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_size(rows: int, repeat: int, baseline: bool) -> List[Dict]:
+    df = make_wide_properties(rows)
+    content = workbook_bytes(df)
+    header = list(df.columns)
+    results = []
+
+    if baseline:
+        seconds, full = timed(lambda: pd.read_excel(BytesIO(content)), 1)
+        results.append({"rows": rows, "view": "read_excel (before)", "columns": len(full.columns),
+                        "parse_s": seconds, "memory_mb": frame_mb(full)})
+
+    for view in VIEWS:
+        spec = view_spec("properties", view)
+        columns = spec.columns(header) if spec is not None else None
+        seconds, frame = timed(lambda: read_columns(content, columns), repeat)
+        results.append({"rows": rows, "view": view, "columns": len(frame.columns),
+                        "parse_s": seconds, "memory_mb": frame_mb(frame)})
+
+    seconds, text = timed(lambda: read_columns(content, WIDE_TEXT_COLUMNS), repeat)
+    results.append({"rows": rows, "view": "lazy notes+address", "columns": len(text.columns),
+                    "parse_s": seconds, "memory_mb": frame_mb(text)})
+    sales = view_spec("properties", "sales").columns(header)
+    rest = [col for col in header if col not in sales]
+    seconds, remainder = timed(lambda: read_columns(content, rest), repeat)
+    results.append({"rows": rows, "view": "full rows for export", "columns": len(remainder.columns),
+                    "parse_s": seconds, "memory_mb": frame_mb(remainder)})
+    for r in results:
+        r["export_mb"] = len(content) / 1e6
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5000,50000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-baseline", action="store_true", help="skip the (slow) pd.read_excel baseline")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    for rows in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        results.extend(run_size(rows, args.repeat, not args.no_baseline))
+        print(f"  {rows:,} rows done", flush=True)
+
+    print(f"\n{'rows':>8}  {'view':<22}{'columns':>8}{'parse s':>9}{'memory MB':>11}{'export MB':>11}")
+    for r in results:
+        print(f"{r['rows']:>8,}  {r['view']:<22}{r['columns']:>8}{r['parse_s']:>9.2f}"
+              f"{r['memory_mb']:>11.1f}{r['export_mb']:>11.1f}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
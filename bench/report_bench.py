@@ -0,0 +1,110 @@
+"""
+BULK CLIENT REPORTS - REPORTS / SEC, SERIAL VS PROCESS POOL
+One report per synthetic mother-sheet client (budget, area, type, rooms
+turned into a FilterSignature) over a synthetic inventory. Times the batch
+generator (erp.reports) with one process and with a worker pool, against
+the month-end routine it replaces: filter, then the raw DataFrame.to_excel
+dump of the agent export button, one client at a time.
+
+The inventory is parsed the way the reports tab loads it (--view, default
+the manager's projection), a few amenity searches ride along with the
+clients, and every batch's unit count is checked against apply_filters on
+the full rows.
+
+    python -m bench.report_bench --units 50000 --clients 300 --workers 1,4
+"""
+
+import argparse
+import json
+import sys
+import time
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.fake_sheets import make_mother_clients, make_properties, workbook_bytes
+from erp.datasets import REGISTRY
+from erp.exports import to_excel_bytes
+from erp.filters import FilterSignature, apply_filters
+from erp.loaders import content_version
+from erp.projection import SOURCES, view_spec
+from erp.reports import ReportRequest, generate_reports, requests_from_clients
+from erp.searches import FILTER_CACHE
+from erp.xlsx_reader import read_columns
+
+# Saved searches on the columns the manager's projection leaves out
+AMENITY_SEARCHES = [
+    ReportRequest(f"amenity {column}", FilterSignature(selections=((column, ("نعم",)),)))
+    for column in ("electricity", "water", "gas", "elevator", "garage")
+]
+
+
+def raw_dumps(units, requests) -> float:
+    """The export button, once per client"""
+    start = time.perf_counter()
+    for request in requests:
+        to_excel_bytes(units.iloc[apply_filters(units, request.signature)], "bench_raw")
+    return time.perf_counter() - start
+
+
+def publish_view(units, view: str):
+    """Publish units parsed from their export with view's projection, as load_sheet_handle does"""
+    content = workbook_bytes(units)
+    version = content_version(content)
+    SOURCES.remember(version, content)
+    spec = view_spec("properties", view)
+    return REGISTRY.publish("properties", version, read_columns(content, spec.columns if spec else None))
+
+
+def run(n_units: int, n_clients: int, workers: List[int], baseline: bool, view: str) -> List[Dict]:
+    units = make_properties(n_units)
+    handle = publish_view(units, view)
+    requests = requests_from_clients(make_mother_clients(n_clients)) + AMENITY_SEARCHES
+    full = read_columns(workbook_bytes(units))
+    expected = sum(len(apply_filters(full, request.signature)) for request in requests)
+    results = []
+    if baseline:
+        seconds = raw_dumps(units, requests)
+        results.append({"mode": "raw dump per client", "workers": 1, "reports": len(requests),
+                        "seconds": seconds, "reports_per_s": len(requests) / seconds, "zip_mb": None})
+    for n in workers:
+        FILTER_CACHE.clear()
+        batch = generate_reports(handle, requests, workers=n)
+        members = zipfile.ZipFile(BytesIO(batch.zip_bytes)).namelist()
+        assert len(members) == len(requests) and not batch.failed, batch.failed[:3]
+        assert batch.units == expected, f"{batch.units:,} units listed, apply_filters on full rows: {expected:,}"
+        results.append({"mode": "generate_reports", "workers": batch.workers, "reports": batch.reports,
+                        "units_listed": batch.units, "seconds": batch.seconds,
+                        "reports_per_s": batch.reports_per_second, "zip_mb": len(batch.zip_bytes) / 1e6})
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--workers", default="1,4")
+    parser.add_argument("--view", default="manager", help="projection the inventory is parsed with")
+    parser.add_argument("--no-baseline", action="store_true")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    workers = [int(w) for w in args.workers.split(",") if w.strip()]
+    results = run(args.units, args.clients, workers, not args.no_baseline, args.view)
+    print(f"\n{args.units:,} units, {args.clients} clients")
+    print(f"{'mode':<22}{'workers':>8}{'reports':>9}{'seconds':>9}{'reports/s':>11}{'zip MB':>8}")
+    for r in results:
+        zip_mb = f"{r['zip_mb']:.1f}" if r["zip_mb"] is not None else "-"
+        print(f"{r['mode']:<22}{r['workers']:>8}{r['reports']:>9}{r['seconds']:>9.2f}{r['reports_per_s']:>11.1f}{zip_mb:>8}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
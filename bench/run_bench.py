@@ -0,0 +1,239 @@
+"""
+OFFLINE BENCHMARK SUITE
+Drives main.py headlessly with Streamlit's AppTest against the local sheets
+stand-in and records per-scenario latency (plus per-stage timings) to JSON.
+
+    python -m bench.run_bench --sizes 1000,10000 --latency-ms 50
+    python -m bench.run_bench --sizes 1000 --compare bench/results/previous.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from streamlit.testing.v1 import AppTest
+
+from bench.fake_sheets import BENCH_PASSWORD, FakeSheetsServer, make_dataset, register_dataset
+from erp import perf
+
+APP_PATH = str(ROOT / "main.py")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+KEYWORD_LABEL = "ادخل الكلمات الدليلية هنا..."
+
+# ============================================
+# APPTEST DRIVER
+# ============================================
+class AppSession:
+    """One headless browser session against main.py"""
+
+    def __init__(self, secrets: Dict[str, str], timeout: float = 900):
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.at.secrets["google_sheets"] = secrets
+
+    def timed_run(self, action: Optional[Callable] = None) -> float:
+        start = time.perf_counter()
+        if action is not None:
+            action(self.at)
+        self.at.run()
+        elapsed = time.perf_counter() - start
+        if self.at.exception:
+            raise RuntimeError(f"App raised: {self.at.exception[0].value}")
+        return elapsed
+
+    def login(self, username: str, password: str = BENCH_PASSWORD) -> float:
+        def submit(at):
+            at.text_input[0].input(username)
+            at.text_input[1].input(password)
+            next(b for b in at.button if b.label == "Login").click()
+        elapsed = self.timed_run(submit)
+        if self.at.session_state["user"] is None:
+            raise RuntimeError(f"Login failed for {username}")
+        return elapsed
+
+    def click(self, key: str) -> float:
+        return self.timed_run(lambda at: at.button(key=key).click())
+
+    def set_number(self, key: str, value: float) -> float:
+        return self.timed_run(lambda at: at.number_input(key=key).set_value(value))
+
+    def set_text(self, label: str, value: str) -> float:
+        def fill(at):
+            next(t for t in at.text_input if t.label == label).input(value)
+        return self.timed_run(fill)
+
+    def widget_value(self, key: str):
+        return self.at.number_input(key=key).value
+
+    def export_properties(self) -> float:
+        """Download-button click: full rows + xlsx are built only then, from the session's handle"""
+        from erp.exports import to_excel_bytes
+        from erp.projection import full_rows
+        start = time.perf_counter()
+        to_excel_bytes(full_rows(self.at.session_state["sales_property_handle"]), "sales_filtered")
+        return time.perf_counter() - start
+
+# ============================================
+# SCENARIOS
+# ============================================
+def sales_flow(secrets: Dict[str, str]) -> Dict[str, float]:
+    session = AppSession(secrets)
+    timings = {"login_page": session.timed_run()}
+    timings["login"] = session.login("agent001")
+    timings["load"] = session.click("sales_load_props")
+    p_from = session.widget_value("p_from")
+    timings["filter"] = session.set_number("p_from", p_from + 1_000_000)
+    timings["search"] = session.set_text(KEYWORD_LABEL, "بحري")
+    timings["export"] = session.export_properties()
+    return timings
+
+
+def owner_flow(secrets: Dict[str, str]) -> Dict[str, float]:
+    session = AppSession(secrets)
+    session.timed_run()
+    session.login("owner")
+    timings = {"dashboard_render": session.timed_run()}
+    timings["owner_load_properties"] = session.click("owner_load_props")
+    return timings
+
+
+def stage_snapshot() -> Dict[str, Dict]:
+    return {
+        row["stage"]: {k: v for k, v in row.items() if k != "stage"}
+        for row in perf.REGISTRY.stage_summary()
+    }
+
+
+def run_size(server: FakeSheetsServer, rows: int, repeat: int) -> List[Dict]:
+    t0 = time.perf_counter()
+    secrets = register_dataset(server, make_dataset(rows), suffix=f"-{rows}")
+    print(f"  generated + serialized {rows:,} rows in {time.perf_counter() - t0:.1f}s", flush=True)
+
+    samples: Dict[str, List[float]] = {}
+    perf.REGISTRY.reset()
+    for _ in range(repeat):
+        for flow in (sales_flow, owner_flow):
+            for scenario, seconds in flow(secrets).items():
+                samples.setdefault(scenario, []).append(seconds)
+    stages = stage_snapshot()
+
+    results = [_result(scenario, rows, values) for scenario, values in samples.items()]
+    for result in results:
+        result["stages"] = stages
+    return results
+
+
+def _result(scenario: str, rows: int, values: List[float]) -> Dict:
+    ordered = sorted(values)
+    return {
+        "scenario": scenario,
+        "rows": rows,
+        "runs": len(values),
+        "median_s": statistics.median(values),
+        "min_s": ordered[0],
+        "max_s": ordered[-1],
+        "p95_s": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "samples_s": values,
+    }
+
+# ============================================
+# REPORTING + REGRESSION COMPARISON
+# ============================================
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Scenarios whose median grew by more than threshold (ratio)"""
+    base = {(r["scenario"], r["rows"]): r["median_s"] for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'scenario':<24}{'rows':>10}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for r in current["results"]:
+        before = base.get((r["scenario"], r["rows"]))
+        if not before:
+            continue
+        ratio = r["median_s"] / before
+        flag = "  <-- regression" if ratio > threshold else ""
+        print(f"{r['scenario']:<24}{r['rows']:>10,}{before:>12.4f}{r['median_s']:>12.4f}{ratio:>8.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(f"{r['scenario']}@{r['rows']}")
+    return regressions
+
+
+def print_table(results: List[Dict]):
+    print(f"\n{'scenario':<24}{'rows':>10}{'median_s':>12}{'p95_s':>12}")
+    for r in results:
+        print(f"{r['scenario']:<24}{r['rows']:>10,}{r['median_s']:>12.4f}{r['p95_s']:>12.4f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000",
+                        help="comma separated property row counts, e.g. 1000,10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated export latency")
+    parser.add_argument("--bandwidth-mbps", type=float, default=None, help="simulated download bandwidth")
+    parser.add_argument("--out", default=None, help="results JSON path (default bench/results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="regression ratio threshold")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    server = FakeSheetsServer(latency_ms=args.latency_ms, bandwidth_mbps=args.bandwidth_mbps).start()
+    os.environ["ERP_SHEETS_BASE_URL"] = server.base_url
+
+    results = []
+    try:
+        for rows in sizes:
+            print(f"benchmarking {rows:,} rows ...", flush=True)
+            results.extend(run_size(server, rows, args.repeat))
+    finally:
+        server.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+            "bandwidth_mbps": args.bandwidth_mbps,
+            "repeat": args.repeat,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    print_table(results)
+    print(f"\nresults written to {out}")
+
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
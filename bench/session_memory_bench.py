@@ -0,0 +1,138 @@
+"""
+SESSION MEMORY - HELD BYTES UNDER A BUDGET VS ONE COPY PER SESSION
+Simulates --sessions owner / agent sessions that each load the properties
+and mother-clients sheets (owners) or their own slice of clients (agents),
+then browse at random for --steps accesses while some go idle. Compares
+the bytes st.session_state used to hold (every load kept until logout)
+with erp.session_memory under a per-session and a global budget: peak
+and final bytes held, evictions, reloads (served from the shared dataset
+registry) and what each reload / deep-size measurement costs.
+
+    python -m bench.session_memory_bench --sessions 40 --units 50000 --budget-mb 16 --global-mb 64
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from bench.fake_sheets import make_mother_clients, make_properties
+from erp.datasets import REGISTRY
+from erp.session_memory import SessionMemory, deep_size
+
+
+def run(n_sessions: int, n_units: int, steps: int, budget_mb: float, global_mb: float,
+        idle_share: float) -> Dict:
+    rng = np.random.default_rng(5)
+    properties = make_properties(n_units)
+    clients = make_mother_clients(max(1000, n_units // 10))
+    handles = {
+        "owner_properties_data": REGISTRY.publish("properties", "bench-mem-props", properties),
+        "owner_clients_data": REGISTRY.publish("mother_clients", "bench-mem-clients", clients),
+    }
+    clock = [0.0]
+    memory = SessionMemory(int(budget_mb * 1e6), int(global_mb * 1e6), idle_seconds=600,
+                           clock=lambda: clock[0])
+    reloads = [0]
+    reload_s = []
+
+    def shared(key):
+        def reload():
+            reloads[0] += 1
+            return handles[key]
+        return reload
+
+    def agent_slice(agent):
+        def reload():
+            reloads[0] += 1
+            return clients[clients["assigned_to"] == agent].copy()
+        return reload
+
+    unbounded = 0
+    peak = 0
+    measure_s = []
+    keys = {}
+    for i in range(n_sessions):
+        sid = f"session-{i:03d}"
+        if i % 4 == 0:
+            loads = {key: (handles[key].frame().copy(), shared(key)) for key in handles}
+        else:
+            agent = f"agent{i % 40:03d}"
+            loads = {"sales_clients_data": (clients[clients["assigned_to"] == agent].copy(), agent_slice(agent))}
+        for key, (df, reload) in loads.items():
+            clock[0] += 1
+            start = time.perf_counter()
+            size = deep_size(df)
+            measure_s.append(time.perf_counter() - start)
+            unbounded += size
+            memory.put(sid, key, df, reload)
+            peak = max(peak, memory.totals()["private_bytes"])
+        keys[sid] = list(loads)
+
+    sids = list(keys)
+    active = sids[: max(1, int(len(sids) * (1 - idle_share)))]
+    hits = misses = 0
+    for _ in range(steps):
+        clock[0] += 1
+        sid = active[rng.integers(len(active))]
+        key = keys[sid][rng.integers(len(keys[sid]))]
+        before = reloads[0]
+        start = time.perf_counter()
+        assert memory.get(sid, key) is not None
+        if reloads[0] == before:
+            hits += 1
+        else:
+            misses += 1
+            reload_s.append(time.perf_counter() - start)
+        peak = max(peak, memory.totals()["private_bytes"])
+
+    clock[0] += memory.idle_seconds + 1
+    for sid in active:
+        memory.touch(sid)
+    emptied, _ = memory.reap()
+    totals = memory.totals()
+    return {
+        "sessions": n_sessions, "units": n_units, "steps": steps,
+        "session_state_mb": unbounded / 1e6, "peak_mb": peak / 1e6, "after_reap_mb": totals["private_bytes"] / 1e6,
+        "shared_registry_mb": REGISTRY.nbytes() / 1e6, "evictions": totals["evictions"],
+        "hit_rate": hits / max(1, hits + misses), "reloads": misses, "sessions_reaped": emptied,
+        "reload_ms_mean": 1e3 * float(np.mean(reload_s)) if reload_s else 0.0,
+        "deep_size_ms_mean": 1e3 * float(np.mean(measure_s)),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--units", type=int, default=50_000)
+    parser.add_argument("--steps", type=int, default=2_000)
+    parser.add_argument("--budget-mb", type=float, default=16)
+    parser.add_argument("--global-mb", type=float, default=64)
+    parser.add_argument("--idle-share", type=float, default=0.5, help="share of sessions that go idle")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    r = run(args.sessions, args.units, args.steps, args.budget_mb, args.global_mb, args.idle_share)
+    print(f"\n{r['sessions']} sessions, {r['units']:,} units, {r['steps']:,} accesses")
+    print(f"  one copy per session (session_state)  {r['session_state_mb']:>9.1f} MB")
+    print(f"  budgeted - peak held                  {r['peak_mb']:>9.1f} MB")
+    print(f"  budgeted - after idle reap            {r['after_reap_mb']:>9.1f} MB")
+    print(f"  shared dataset registry               {r['shared_registry_mb']:>9.1f} MB")
+    print(f"  evictions {r['evictions']:,} · reloads {r['reloads']:,} · hit rate {r['hit_rate']:.1%}"
+          f" · sessions reaped {r['sessions_reaped']}")
+    print(f"  reload {r['reload_ms_mean']:.2f} ms mean · deep size {r['deep_size_ms_mean']:.2f} ms mean")
+    if args.out:
+        Path(args.out).write_text(json.dumps(r, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+SHARED DATASET STORE - MEMORY VS WORKER COUNT + VERSION SWAP LATENCY
+Starts N worker processes that each hold the same properties sheet, either
+as a private copy (what every Streamlit process does today) or attached
+zero-copy from erp.shared_store. Each worker touches every column, then
+reports its memory growth from /proc/self/smaps_rollup. PSS splits shared
+pages between the processes mapping them, so the PSS sum is the real host
+cost. In shared mode the parent then announces a new version and times
+until every worker's DatasetRegistry has swapped to it.
+
+    python -m bench.shared_store_bench --rows 200000 --workers 1,2,4,8
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.fake_sheets import make_properties
+from erp.shared_store import SharedDatasetStore
+
+MEMORY_FIELDS = ("Rss", "Pss", "Anonymous", "Pss_Shmem")
+
+
+def memory_mb() -> Dict[str, float]:
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in MEMORY_FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+
+def touch(df) -> float:
+    """Read every column once, as the dashboards do"""
+    total = 0.0
+    for col in df.columns:
+        series = df[col]
+        total += float(series.str.len().sum()) if series.dtype == "str" else float(series.sum())
+    return total
+
+
+def worker(mode: str, root: str, version: str, next_version: str, ready, results, interval: float):
+    import pyarrow as pa
+
+    from erp.datasets import REGISTRY
+
+    gc.collect()
+    before = memory_mb()
+    store = SharedDatasetStore(root)
+    if mode == "private":
+        with pa.OSFile(store.path_for(version)) as f:
+            df = pa.ipc.open_file(f).read_all().to_pandas()
+    else:
+        df = store.attach(version, "properties")
+        # What load_sheet_handle does - the watcher only refreshes sheets a worker holds
+        REGISTRY.publish("properties", version, df)
+        store.poll(REGISTRY)
+    touch(df)
+    gc.collect()
+    after = memory_mb()
+    results.put(("memory", {k: after[k] - before.get(k, 0.0) for k in after}))
+    ready.wait()
+
+    if mode == "shared":
+        while REGISTRY.latest("properties").version != next_version:
+            store.poll(REGISTRY)
+            time.sleep(interval)
+        results.put(("swapped", time.time()))
+    ready.wait()
+
+
+def run(mode: str, workers: int, root: str, versions: List[str], interval: float) -> Dict:
+    ctx = mp.get_context("spawn")
+    ready = ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, root, versions[0], versions[1], ready, results, interval))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    memory = [results.get(timeout=600)[1] for _ in procs]
+    ready.wait()
+
+    swap_ms = None
+    if mode == "shared":
+        announced = time.time()
+        SharedDatasetStore(root).announce("properties", versions[1], 0)
+        swap_ms = (max(results.get(timeout=60)[1] for _ in procs) - announced) * 1000
+    ready.wait()
+    for p in procs:
+        p.join()
+    return {
+        "mode": mode, "workers": workers,
+        "pss_total_mb": sum(m["Pss"] for m in memory),
+        "rss_total_mb": sum(m["Rss"] for m in memory),
+        "private_total_mb": sum(m["Anonymous"] for m in memory),
+        "swap_ms": swap_ms,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--root", default=None, help="store directory (default: a temp dir in /dev/shm)")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    root = args.root or tempfile.mkdtemp(prefix="erp-bench-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    store = SharedDatasetStore(root)
+    df = make_properties(args.rows)
+    versions = ["bench-v1", "bench-v2"]
+    store.share("properties", versions[0], df)
+    store.write(versions[1], df.assign(price_total=df["price_total"] + 1000))
+    data_mb = os.path.getsize(store.path_for(versions[0])) / 1e6
+    del df
+
+    results = []
+    try:
+        for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+            for mode in ("private", "shared"):
+                store.announce("properties", versions[0], args.rows)
+                results.append(run(mode, workers, root, versions, args.poll_interval))
+                print(f"  {mode:<8} x{workers} done", flush=True)
+    finally:
+        if args.root is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print(f"\nArrow file: {data_mb:,.1f} MB ({args.rows:,} rows)")
+    print(f"{'mode':<9}{'workers':>8}{'PSS sum MB':>12}{'RSS sum MB':>12}{'private MB':>12}{'swap ms':>9}")
+    for r in results:
+        swap = f"{r['swap_ms']:>9.0f}" if r["swap_ms"] is not None else f"{'-':>9}"
+        print(f"{r['mode']:<9}{r['workers']:>8}{r['pss_total_mb']:>12.1f}{r['rss_total_mb']:>12.1f}"
+              f"{r['private_total_mb']:>12.1f}{swap}")
+    if args.out:
+        Path(args.out).write_text(json.dumps({"data_mb": data_mb, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+TRANSACTIONS ↔ PROPERTIES JOIN - COLD BUILD, RERUN, INCREMENTAL REFRESH
+Times the indexed join (erp.unit_sales) against what a rerun would cost
+with pandas alone - parse dates, groupby the whole transactions sheet and
+merge it onto the properties every time:
+
+  cold           transaction index + join for a new version pair
+  rerun          same version pair again (process cache)
+  tx append      a transactions version with --changed new rows appended
+  units edit     a properties version with --changed rows repriced / sold
+
+Every result is checked against the pandas merge.
+
+    python -m bench.unit_sales_bench --transactions 1000000 --units 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from bench.fake_sheets import make_properties, make_transactions
+from erp import unit_sales
+from erp.datasets import REGISTRY
+
+
+def pandas_join(units: pd.DataFrame, transactions: pd.DataFrame) -> pd.DataFrame:
+    """The baseline: groupby + merge on every rerun"""
+    tx = transactions.assign(sold_at=pd.to_datetime(transactions["date"]))
+    tx = tx.sort_values(["unit_id", "sold_at"], kind="stable")
+    per_unit = tx.groupby("unit_id").agg(transactions=("amount", "size"), sold_at=("sold_at", "min"),
+                                         realized_price=("amount", "last"))
+    return units[["unit_id", "price_total"]].merge(per_unit, left_on="unit_id", right_index=True, how="left")
+
+
+def matches(joined: unit_sales.UnitSales, units: pd.DataFrame, expected: pd.DataFrame) -> bool:
+    got = joined.frame(units)
+    return bool(
+        (got["transactions"].to_numpy() == expected["transactions"].fillna(0).to_numpy()).all()
+        and np.allclose(got["realized_price"].to_numpy(), expected["realized_price"].to_numpy(), equal_nan=True)
+        and (got["sold_at"].isna().to_numpy() == expected["sold_at"].isna().to_numpy()).all()
+    )
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(n_tx: int, n_units: int, changed: int) -> List[Dict]:
+    rng = np.random.default_rng(3)
+    units = make_properties(n_units)
+    transactions = make_transactions(n_tx, int(n_units * 1.2))
+    units_v = REGISTRY.publish("properties", "bench-units-0", units)
+    tx_v = REGISTRY.publish("transactions", "bench-tx-0", transactions)
+    results = []
+
+    def step(label: str, units_df, tx_df, units_handle, tx_handle):
+        seconds, joined = timed(lambda: unit_sales.get_unit_sales(units_handle, tx_handle))
+        baseline_s, expected = timed(lambda: pandas_join(units_df, tx_df))
+        results.append({
+            "step": label, "transactions": len(tx_df), "units": len(units_df),
+            "seconds": seconds, "pandas_merge_s": baseline_s,
+            "index_mode": joined.index.stats["mode"], "rows_aggregated": joined.index.stats["rows_aggregated"],
+            "join_mode": joined.stats["mode"], "rows_looked_up": joined.stats["rows_looked_up"],
+            "correct": matches(joined, units_df, expected),
+        })
+
+    step("cold", units, transactions, units_v, tx_v)
+    step("rerun", units, transactions, units_v, tx_v)
+
+    appended = make_transactions(changed, int(n_units * 1.2), seed=99)
+    appended["transaction_id"] = "N" + appended["transaction_id"]
+    transactions = pd.concat([transactions, appended], ignore_index=True)
+    tx_v = REGISTRY.publish("transactions", "bench-tx-1", transactions)
+    step("tx append", units, transactions, units_v, tx_v)
+
+    units = units.copy()
+    rows = rng.choice(len(units), changed, replace=False)
+    units.loc[rows, "price_total"] = units.loc[rows, "price_total"] * 2
+    units.loc[rows[: changed // 2], "unit_status"] = "مباع"
+    units_v = REGISTRY.publish("properties", "bench-units-1", units)
+    step("units edit", units, transactions, units_v, tx_v)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--units", type=int, default=100_000)
+    parser.add_argument("--changed", type=int, default=5_000, help="rows appended / edited per refresh")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    results = run(args.transactions, args.units, args.changed)
+    print(f"\n{'step':<12}{'tx':>11}{'units':>9}{'join s':>9}{'pandas s':>10}"
+          f"{'aggregated':>12}{'looked up':>11}  correct")
+    for r in results:
+        print(f"{r['step']:<12}{r['transactions']:>11,}{r['units']:>9,}{r['seconds']:>9.3f}{r['pandas_merge_s']:>10.2f}"
+              f"{r['rows_aggregated']:>12,}{r['rows_looked_up']:>11,}  {r['correct']}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+    return 0 if all(r["correct"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+REAL ESTATE ERP - SUPPORT PACKAGE
+Shared modules imported by the Streamlit entry script (main.py)
+"""
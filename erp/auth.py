@@ -0,0 +1,127 @@
+"""
+USERS SHEET + AUTHENTICATION + LOGIN PAGE
+Kept free of pandas at import time so the login page paints without it;
+the loader is imported on first use.
+"""
+
+from typing import Dict, Optional
+
+import streamlit as st
+
+from erp.state import track_activity
+
+# ============================================
+# USERS SHEET - OWNER ONLY CONFIGURATION
+# ============================================
+def configure_users_sheet():
+    """Users Sheet configuration - OWNER ONLY, SINGLE SETUP"""
+    if not st.session_state.users_sheet_configured:
+        st.markdown("### 👤 Configure Users Sheet")
+        st.info("Users Sheet must be configured before anyone can login")
+
+        users_url = st.text_input(
+            "Users Registry URL",
+            placeholder="https://docs.google.com/spreadsheets/d/...",
+            key="users_sheet_setup"
+        )
+
+        if st.button("✅ Set Users Sheet", use_container_width=True):
+            if users_url:
+                from erp.loaders import load_google_sheet
+
+                # Test the sheet
+                test_df = load_google_sheet(users_url, "users_test", False, share=False)
+                if not test_df.empty:
+                    st.session_state.sheets_urls['users'] = users_url
+                    st.session_state.users_sheet_configured = True
+                    track_activity("users_sheet_configured", {"url": users_url[:50] + "..."})
+                    st.success("✅ Users Sheet configured successfully!")
+                    st.rerun()
+                else:
+                    st.error("❌ Could not load Users Sheet. Check URL and sharing settings.")
+    else:
+        st.success("✅ Users Sheet is configured")
+
+def authenticate_user(username: str, password: str) -> Optional[Dict]:
+    """Authenticate user against Google Sheets users database"""
+    if not st.session_state.users_sheet_configured:
+        return None
+
+    from erp.loaders import load_google_sheet
+
+    users_df = load_google_sheet(st.session_state.sheets_urls.get('users', ''), "users", False, share=False)
+
+    if users_df.empty:
+        return None
+
+    # Dynamic column detection
+    username_col = None
+    password_col = None
+    role_col = None
+    name_col = None
+
+    for col in users_df.columns:
+        col_lower = col.lower()
+        if 'username' in col_lower or 'user' in col_lower:
+            username_col = col
+        if 'password' in col_lower or 'pass' in col_lower:
+            password_col = col
+        if 'role' in col_lower:
+            role_col = col
+        if 'full_name' in col_lower or 'name' in col_lower:
+            name_col = col
+
+    if not username_col or not password_col:
+        return None
+
+    # Find user
+    user_row = users_df[users_df[username_col].astype(str).str.lower() == username.lower()]
+
+    if user_row.empty:
+        return None
+
+    stored_password = str(user_row.iloc[0][password_col]).strip()
+
+    if password == stored_password:
+        return {
+            "username": username,
+            "role": user_row.iloc[0][role_col].lower() if role_col else 'sales',
+            "full_name": user_row.iloc[0][name_col] if name_col else username,
+        }
+
+    return None
+
+# ============================================
+# LOGIN PAGE - SIMPLIFIED, NO DEMO
+# ============================================
+def render_login_page():
+    """Professional login page"""
+    st.markdown("<div class='main-header'>Real Estate ERP System</div>", unsafe_allow_html=True)
+
+    # Users Sheet Configuration - Only visible if not configured
+    if not st.session_state.users_sheet_configured:
+        configure_users_sheet()
+        st.stop()
+
+    st.markdown("### Professional Access Portal")
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+
+    with col2:
+        with st.form("login_form"):
+            username = st.text_input("Username", placeholder="Enter your username")
+            password = st.text_input("Password", type="password", placeholder="Enter your password")
+
+            login_button = st.form_submit_button("Login", use_container_width=True)
+
+        if login_button:
+            if username and password:
+                user = authenticate_user(username, password)
+                if user:
+                    st.session_state.user = user
+                    track_activity("login", {"username": username})
+                    st.rerun()
+                else:
+                    st.error("Invalid credentials")
+            else:
+                st.error("Username and password are required")
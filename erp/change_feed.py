@@ -0,0 +1,350 @@
+"""
+SAVED-SEARCH CHANGE FEED - NEW / UPDATED UNITS PER AGENT
+Every new properties version is diffed against the previous one by unit ID
+(one 64-bit hash per row, kept per version). Only the added and changed rows
+are evaluated against every saved search, as compiled vectorized
+predicates, so matching cost follows the size of the change, not the
+inventory. Hits become per-agent notifications in the sales dashboard.
+Registered as a DatasetRegistry publish listener on import; versions are
+snapshotted on a background thread, so widening a projected version to
+the feed's columns (lazy notes / address decode) never holds up the
+request that published it.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import REGISTRY as DATASETS, DatasetHandle
+from erp.filters import KEYWORD_COLUMNS, FilterSignature
+from erp.projection import add_columns, sheet_columns, view_spec
+from erp.searches import SAVED_SEARCHES, SavedSearch
+
+logger = logging.getLogger(__name__)
+
+WATCHED_SHEET = "properties"
+# Saved searches are built in the sales dashboard - snapshot its columns
+FEED_VIEW = "sales"
+
+# Notifications kept per agent (oldest dropped first)
+MAX_NOTIFICATIONS = 200
+# Unit IDs listed in one notification
+MAX_UNITS_PER_NOTIFICATION = 500
+
+# ============================================
+# CHANGESET - DIFF TWO SNAPSHOTS BY UNIT ID
+# ============================================
+def detect_id_column(df: pd.DataFrame) -> Optional[str]:
+    """Same detection as the link finder: unit_id first, else any *id* column"""
+    return next((col for col in df.columns if 'unit_id' in col.lower()), None) \
+        or next((col for col in df.columns if 'id' in col.lower()), None)
+
+
+@dataclass
+class Snapshot:
+    """Unit IDs + row hashes of one properties version (last row wins per ID)"""
+    version: str
+    ids: pd.Index
+    hashes: np.ndarray
+    positions: np.ndarray
+
+    @classmethod
+    def of(cls, version: str, df: pd.DataFrame) -> Optional["Snapshot"]:
+        id_col = detect_id_column(df)
+        if id_col is None:
+            return None
+        ids = df[id_col].astype(str).str.strip()
+        keep = ~ids.duplicated(keep="last").to_numpy()
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        return cls(version, pd.Index(ids.to_numpy()[keep]), hashes[keep], np.flatnonzero(keep))
+
+    def patched(self, version: str, df: pd.DataFrame, rows: np.ndarray) -> Tuple["Snapshot", np.ndarray]:
+        """This snapshot with only `rows` (positions, IDs unchanged) re-hashed
+
+        Returns the new snapshot and the positions whose hash really changed.
+        """
+        at = np.searchsorted(self.positions, rows)
+        kept = (at < self.positions.size) & (self.positions[np.minimum(at, self.positions.size - 1)] == rows)
+        rows, at = rows[kept], at[kept]
+        fresh = pd.util.hash_pandas_object(df.iloc[rows], index=False).to_numpy()
+        hashes = self.hashes.copy()
+        hashes[at] = fresh
+        return Snapshot(version, self.ids, hashes, self.positions), rows[fresh != self.hashes[at]]
+
+
+@dataclass
+class Changeset:
+    previous_version: str
+    version: str
+    added: np.ndarray      # row positions in the new frame
+    changed: np.ndarray    # row positions in the new frame
+    removed: int
+
+    @property
+    def positions(self) -> np.ndarray:
+        return np.concatenate([self.added, self.changed])
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Changeset:
+    at_old = old.ids.get_indexer(new.ids)
+    is_added = at_old < 0
+    is_changed = ~is_added & (old.hashes[np.maximum(at_old, 0)] != new.hashes)
+    return Changeset(old.version, new.version,
+                     added=new.positions[is_added], changed=new.positions[is_changed],
+                     removed=int(len(old.ids) - (~is_added).sum()))
+
+
+def feed_frame(handle: DatasetHandle) -> Optional[pd.DataFrame]:
+    """The columns saved searches read (sales view + its lazy text columns)
+
+    Versions parsed for different views carry different columns; hashing
+    the same set keeps the diff to real changes.
+    """
+    df = handle.frame()
+    spec = view_spec(handle.sheet_type, FEED_VIEW)
+    if df is None or spec is None:
+        return df
+    columns = spec.columns(sheet_columns(df), lazy=True)
+    df = add_columns(df, handle.version, columns)
+    return df[[col for col in columns if col in df.columns]]
+
+# ============================================
+# COMPILED SAVED SEARCHES - SHARED COLUMN CONVERSIONS
+# ============================================
+class ColumnCache:
+    """Per-column arrays of the changed rows, converted once for all searches"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._notna: Dict[str, np.ndarray] = {}
+        self._text: Dict[str, np.ndarray] = {}
+        self._keyword: Dict[str, np.ndarray] = {}
+
+    def notna(self, column: str) -> np.ndarray:
+        if column not in self._notna:
+            self._notna[column] = self.df[column].notna().to_numpy()
+        return self._notna[column]
+
+    def text(self, column: str) -> np.ndarray:
+        if column not in self._text:
+            self._text[column] = self.df[column].astype(str).to_numpy(dtype=object)
+        return self._text[column]
+
+    def keyword(self, query: str) -> np.ndarray:
+        if query not in self._keyword:
+            mask = np.zeros(len(self.df), dtype=bool)
+            for col in KEYWORD_COLUMNS:
+                if col in self.df.columns:
+                    mask |= self.df[col].astype(str).str.contains(query, case=False, na=False).to_numpy(dtype=bool)
+            self._keyword[query] = mask
+        return self._keyword[query]
+
+
+class CompiledSearch:
+    """A FilterSignature turned into mask steps (same semantics as apply_filters)"""
+
+    def __init__(self, search: SavedSearch):
+        self.search = search
+        signature: FilterSignature = search.signature
+        self.ranges = [(col, lo, hi) for col, lo, hi in signature.ranges]
+        self.selections = [(col, None if chosen is None else np.array(chosen, dtype=object))
+                           for col, chosen in signature.selections]
+        self.keyword = signature.keyword
+
+    def mask(self, columns: ColumnCache) -> np.ndarray:
+        df = columns.df
+        mask = np.ones(len(df), dtype=bool)
+        # A column the snapshot lacks matches nothing (apply_filters: empty cells)
+        for col, lo, hi in self.ranges:
+            if col not in df.columns:
+                return np.zeros(len(df), dtype=bool)
+            mask &= columns.notna(col)
+            if lo is not None:
+                mask &= (df[col] >= lo).to_numpy(dtype=bool, na_value=False)
+            if hi is not None:
+                mask &= (df[col] <= hi).to_numpy(dtype=bool, na_value=False)
+            if not mask.any():
+                return mask
+        for col, chosen in self.selections:
+            if col not in df.columns:
+                return np.zeros(len(df), dtype=bool)
+            mask &= columns.notna(col) if chosen is None else np.isin(columns.text(col), chosen)
+            if not mask.any():
+                return mask
+        if self.keyword:
+            mask &= columns.keyword(self.keyword)
+        return mask
+
+# ============================================
+# NOTIFICATIONS + FEED
+# ============================================
+@dataclass
+class MatchNotification:
+    search_name: str
+    search_owner: str
+    version: str
+    new_units: List[str]
+    updated_units: List[str]
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    read: bool = False
+
+    @property
+    def count(self) -> int:
+        return len(self.new_units) + len(self.updated_units)
+
+
+class ChangeFeed:
+    """Holds the last snapshot, the compiled searches and per-agent notifications"""
+
+    def __init__(self, sheet_type: str = WATCHED_SHEET):
+        self.sheet_type = sheet_type
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        self._compiled: Optional[Dict[Tuple[str, str], CompiledSearch]] = None
+        self._notifications: Dict[str, Deque[MatchNotification]] = {}
+        self.last_run: Dict = {}
+        self._queue: "queue.Queue[Tuple[Optional[str], DatasetHandle]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- saved searches ---
+    def _compiled_searches(self) -> List[CompiledSearch]:
+        # Outside the lock: picking up other workers' saves notifies on_search_event
+        searches = SAVED_SEARCHES.all()
+        with self._lock:
+            if self._compiled is None:
+                self._compiled = {s.key: CompiledSearch(s) for s in searches}
+            return list(self._compiled.values())
+
+    def on_search_event(self, event: str, search: SavedSearch):
+        with self._lock:
+            if self._compiled is None:
+                return
+            if event == "saved":
+                self._compiled[search.key] = CompiledSearch(search)
+            else:
+                self._compiled.pop(search.key, None)
+
+    # --- datasets ---
+    def on_publish(self, previous_version: Optional[str], handle: DatasetHandle):
+        if handle.sheet_type != self.sheet_type:
+            return
+        self._queue.put((previous_version, handle))
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            previous_version, handle = self._queue.get()
+            try:
+                self.update(previous_version, handle)
+            except Exception:
+                logger.exception("Change feed failed for %s", handle.version)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued version is processed"""
+        self._queue.join()
+
+    def update(self, previous_version: Optional[str], handle: DatasetHandle):
+        """Snapshot handle's version and notify on what changed since the last one"""
+        df = feed_frame(handle)
+        if df is None:
+            return
+        if self._on_overlay(handle, df):
+            return
+        with perf.timed("change_feed_snapshot"):
+            snapshot = Snapshot.of(handle.version, df)
+        with self._lock:
+            old, self._snapshot = self._snapshot, snapshot
+        if old is None and previous_version is not None:
+            # Feed imported after the previous version was published
+            previous_df = feed_frame(DatasetHandle(handle.sheet_type, previous_version, 0))
+            old = Snapshot.of(previous_version, previous_df) if previous_df is not None else None
+        if old is None or snapshot is None or old.version == snapshot.version:
+            return
+        self.process(diff_snapshots(old, snapshot), df)
+
+    def _on_overlay(self, handle: DatasetHandle, df: pd.DataFrame) -> bool:
+        """An optimistic edit of the last snapshot - re-hash and match the edited rows only"""
+        overlay = DATASETS.overlay(handle.version)
+        with self._lock:
+            old = self._snapshot
+        if overlay is None or old is None or old.version != overlay.parent \
+                or detect_id_column(df) in overlay.columns:
+            return False
+        with perf.timed("change_feed_snapshot"):
+            snapshot, changed = old.patched(handle.version, df, overlay.positions)
+        with self._lock:
+            if self._snapshot is not old:
+                return False
+            self._snapshot = snapshot
+        self.process(Changeset(old.version, handle.version, added=np.array([], dtype=np.int64),
+                               changed=changed, removed=0), df)
+        return True
+
+    @perf.timed("change_feed_match")
+    def process(self, changeset: Changeset, df: pd.DataFrame) -> List[MatchNotification]:
+        """Evaluate the changed rows against every saved search, notify owners"""
+        start = time.perf_counter()
+        positions = changeset.positions
+        searches = self._compiled_searches() if positions.size else []
+        id_col = detect_id_column(df)
+        changed_rows = df.iloc[positions]
+        columns = ColumnCache(changed_rows)
+        ids = changed_rows[id_col].astype(str).str.strip().to_numpy() if id_col else np.array([])
+        is_new = np.arange(positions.size) < changeset.added.size
+
+        notifications = []
+        for compiled in searches:
+            mask = compiled.mask(columns)
+            if not mask.any():
+                continue
+            notification = MatchNotification(
+                search_name=compiled.search.name,
+                search_owner=compiled.search.owner,
+                version=changeset.version,
+                new_units=ids[mask & is_new][:MAX_UNITS_PER_NOTIFICATION].tolist(),
+                updated_units=ids[mask & ~is_new][:MAX_UNITS_PER_NOTIFICATION].tolist(),
+            )
+            notifications.append(notification)
+
+        with self._lock:
+            for notification in notifications:
+                self._notifications.setdefault(
+                    notification.search_owner, deque(maxlen=MAX_NOTIFICATIONS)
+                ).appendleft(notification)
+            self.last_run = {
+                "version": changeset.version, "added": int(changeset.added.size),
+                "changed": int(changeset.changed.size), "removed": changeset.removed,
+                "searches": len(searches), "notifications": len(notifications),
+                "match_ms": (time.perf_counter() - start) * 1000,
+            }
+        perf.record_rows("change_feed_match", int(positions.size))
+        return notifications
+
+    def notifications_for(self, username: str, unread_only: bool = False) -> List[MatchNotification]:
+        with self._lock:
+            items = list(self._notifications.get(username, ()))
+        return [n for n in items if not (unread_only and n.read)]
+
+    def mark_read(self, username: str):
+        with self._lock:
+            for notification in self._notifications.get(username, ()):
+                notification.read = True
+
+
+FEED = ChangeFeed()
+DATASETS.add_listener(FEED.on_publish)
+SAVED_SEARCHES.add_listener(FEED.on_search_event)
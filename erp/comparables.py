@@ -0,0 +1,150 @@
+"""
+COMPARABLE UNITS - VECTORIZED kNN OVER THE PROPERTIES SHEET
+One normalized feature matrix per dataset version, rows grouped by
+(area, unit_type) so a constrained query only scans its own block.
+Distances are a single batched NumPy pass - no per-row Python.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import DatasetHandle
+
+NUMERIC_FEATURES = ["price_total", "area_sqm", "floor_number", "rooms", "bathrooms"]
+CATEGORICAL_FEATURES = ["area", "unit_type"]
+
+# Relative importance in the distance (after standardization)
+FEATURE_WEIGHTS = {"price_total": 2.0, "area_sqm": 1.5, "floor_number": 0.5, "rooms": 1.0, "bathrooms": 0.5}
+
+# Heavy-tailed columns compared on a log scale
+LOG_FEATURES = {"price_total", "area_sqm"}
+
+# Indexes kept in memory (one per properties version)
+MAX_INDEXES = 4
+
+
+class ComparablesIndex:
+    """Feature matrix + (area, unit_type) blocks for one properties version"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.features = [col for col in NUMERIC_FEATURES if col in df.columns]
+        self.categoricals = [col for col in CATEGORICAL_FEATURES if col in df.columns]
+        self.n = len(df)
+
+        # Unit ID -> row position, same column detection as the link finder
+        id_col = next((col for col in df.columns if 'unit_id' in col.lower()), None) \
+            or next((col for col in df.columns if 'id' in col.lower()), None)
+        self.ids = pd.Index(df[id_col].astype(str).str.strip()) if id_col else None
+
+        matrix = np.zeros((self.n, len(self.features)), dtype=np.float32)
+        for j, col in enumerate(self.features):
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            if col in LOG_FEATURES:
+                values = np.log1p(np.clip(values, 0, None))
+            center = np.nanmedian(values) if np.isfinite(values).any() else 0.0
+            values = np.where(np.isfinite(values), values, center)
+            scale = values.std() or 1.0
+            matrix[:, j] = (values - center) / scale * FEATURE_WEIGHTS.get(col, 1.0)
+
+        # Codes per categorical column, -1 for missing
+        self.codes = {
+            col: pd.factorize(df[col].astype(str).str.strip().where(df[col].notna()))[0].astype(np.int32)
+            for col in self.categoricals
+        }
+
+        # Sort rows by the combined category key; each block is a contiguous slice
+        key = np.zeros(self.n, dtype=np.int64)
+        for col in self.categoricals:
+            key = key * (int(self.codes[col].max()) + 2) + (self.codes[col] + 1)
+        self.order = np.argsort(key, kind="stable")
+        self.sorted_key = key[self.order]
+        self.sorted_matrix = matrix[self.order]
+        self.position_in_order = np.empty(self.n, dtype=np.int64)
+        self.position_in_order[self.order] = np.arange(self.n)
+        self.sorted_codes = {col: codes[self.order] for col, codes in self.codes.items()}
+        self.key = key
+
+    def position_of(self, unit_id: str) -> Optional[int]:
+        """Row position of a unit ID, None if unknown"""
+        if self.ids is None:
+            return None
+        position = self.ids.get_indexer([str(unit_id).strip()])[0] if self.ids.is_unique \
+            else next(iter(np.flatnonzero(self.ids == str(unit_id).strip())), -1)
+        return int(position) if position >= 0 else None
+
+    def query(self, position: int, k: int = 20, same_area: bool = True,
+              same_unit_type: bool = True) -> pd.DataFrame:
+        """k nearest rows to the row at `position` -> DataFrame(position, distance)"""
+        target = self.sorted_matrix[self.position_in_order[position]]
+
+        if same_area and same_unit_type and len(self.categoricals) == len(CATEGORICAL_FEATURES):
+            # Both constraints = exactly one contiguous block
+            lo = np.searchsorted(self.sorted_key, self.key[position], side="left")
+            hi = np.searchsorted(self.sorted_key, self.key[position], side="right")
+            candidates = np.arange(lo, hi)
+        else:
+            mask = np.ones(self.n, dtype=bool)
+            for col, wanted in (("area", same_area), ("unit_type", same_unit_type)):
+                if wanted and col in self.sorted_codes:
+                    mask &= self.sorted_codes[col] == self.codes[col][position]
+            candidates = np.flatnonzero(mask)
+
+        # Drop the unit itself
+        candidates = candidates[self.order[candidates] != position]
+        if candidates.size == 0:
+            return pd.DataFrame({"position": np.array([], dtype=np.int64), "distance": np.array([], dtype=np.float32)})
+
+        diff = self.sorted_matrix[candidates] - target
+        distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        k = min(k, candidates.size)
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return pd.DataFrame({"position": self.order[candidates[top]], "distance": distances[top]})
+
+# ============================================
+# PER-VERSION INDEX CACHE - SHARED BY ALL SESSIONS
+# ============================================
+_lock = threading.Lock()
+_indexes: "OrderedDict[str, ComparablesIndex]" = OrderedDict()
+
+
+def get_index(handle: DatasetHandle) -> Optional[ComparablesIndex]:
+    """Index for this properties version, built once and shared"""
+    with _lock:
+        index = _indexes.get(handle.version)
+        if index is not None:
+            _indexes.move_to_end(handle.version)
+    perf.record_cache("comparables_index", index is not None)
+    if index is not None:
+        return index
+
+    df = handle.frame()
+    if df is None:
+        return None
+    with perf.timed("comparables_build"):
+        index = ComparablesIndex(df)
+    perf.record_rows("comparables_build", len(df))
+    with _lock:
+        _indexes[handle.version] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+@perf.timed("comparables_query")
+def find_comparables(handle: DatasetHandle, position: int, k: int = 20,
+                     same_area: bool = True, same_unit_type: bool = True) -> pd.DataFrame:
+    """Top-k comparable units for the row at `position` (with a distance column)"""
+    index = get_index(handle)
+    df = handle.frame()
+    if index is None or df is None:
+        return pd.DataFrame()
+    hits = index.query(position, k, same_area, same_unit_type)
+    result = df.iloc[hits["position"].to_numpy()].copy()
+    result.insert(0, "distance", hits["distance"].round(3).to_numpy())
+    return result
@@ -0,0 +1,3 @@
+"""
+ROLE DASHBOARDS - imported by main.py only once a user is logged in
+"""
@@ -0,0 +1,73 @@
+"""
+TODAY'S ACTIVITY TAB - SHARED BY OWNER + MANAGER
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from erp.exports import XLSX_MIME, excel_download_data
+from erp.state import get_today_activity
+
+@st.fragment
+def render_today_activity(key_prefix: str):
+    """نشاط المستخدمين اليوم - key_prefix keeps widget keys per dashboard"""
+    st.markdown("### 👤 نشاط المستخدمين اليوم")
+    st.markdown("*آخر تحديث: يعتمد على نشاط الجلسة الحالية*")
+
+    today_activity = get_today_activity()
+
+    if today_activity:
+        df_today = pd.DataFrame(today_activity)
+
+        # فلترة حسب النشاط
+        col1, col2 = st.columns(2)
+        with col1:
+            show_logins = st.checkbox("عرض تسجيلات الدخول", value=True, key=f"{key_prefix}_show_logins")
+        with col2:
+            show_sheets = st.checkbox("عرض تحميل الشيتات", value=True, key=f"{key_prefix}_show_sheets")
+
+        filtered_df = df_today.copy()
+        if not show_logins:
+            filtered_df = filtered_df[~filtered_df['action'].isin(['login', 'logout'])]
+        if not show_sheets:
+            filtered_df = filtered_df[filtered_df['action'] != 'sheet_load']
+
+        # عرض الميتريكس
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
+            st.metric("إجمالي المستخدمين النشطين اليوم", len(set([log['username'] for log in today_activity])))
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        with col2:
+            logins_count = len([log for log in today_activity if log['action'] == 'login'])
+            st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
+            st.metric("تسجيلات الدخول", logins_count)
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        with col3:
+            actions_count = len(today_activity)
+            st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
+            st.metric("إجمالي النشاطات", actions_count)
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        # عرض الجدول
+        st.markdown("#### 📋 سجل النشاطات اليوم")
+        st.dataframe(
+            filtered_df[['timestamp', 'username', 'role', 'action', 'details']].sort_values('timestamp', ascending=False),
+            use_container_width=True,
+            height=500
+        )
+
+        # تصدير
+        st.download_button(
+            label="📥 تصدير نشاط اليوم (Excel)",
+            data=excel_download_data(filtered_df, "today_activity"),
+            file_name=f"today_activity_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            mime=XLSX_MIME,
+            use_container_width=True
+        )
+    else:
+        st.info("لا يوجد أي نشاط اليوم حتى الآن")
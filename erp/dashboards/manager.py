@@ -0,0 +1,163 @@
+"""
+MANAGER DASHBOARD - مع نشاط اليوم
+"""
+
+from datetime import datetime
+
+import streamlit as st
+
+from erp import perf
+from erp.dashboards.activity import render_today_activity
+from erp.loaders import load_google_sheet, load_sheet_handle
+from erp.projection import full_rows, visible
+from erp.state import track_activity
+
+def render_manager_dashboard():
+    """Manager Dashboard - View Only + Today's Activity"""
+    user = st.session_state.user
+    st.markdown("<div class='main-header'>Management Dashboard</div>", unsafe_allow_html=True)
+    st.markdown(f"**Welcome, {user['full_name']}** | *Manager Access*")
+
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Properties", "All Clients", "Transactions", "📦 تقارير العملاء", "📊 نشاط اليوم"])
+
+    with tab1:
+        render_manager_properties_tab()
+
+    with tab2:
+        render_manager_clients_tab()
+
+    with tab3:
+        render_manager_transactions_tab()
+
+    with tab4:
+        render_manager_reports_tab()
+
+    with tab5:
+        render_today_activity("mgr")
+
+# ============================================
+# MANAGER TABS - EACH ONE A FRAGMENT, RERUNS ON ITS OWN
+# ============================================
+@st.fragment
+@perf.timed("fragment_manager_properties_tab")
+def render_manager_properties_tab():
+    """Property Inventory - view only"""
+    st.markdown("#### Property Inventory")
+    if st.button("📥 Load Properties", key="mgr_load_props"):
+        handle = load_sheet_handle(
+            st.session_state.sheets_urls.get('properties', ''),
+            "properties",
+            view="manager"
+        )
+        if handle is not None:
+            st.session_state.mgr_property_handle = handle
+            st.success(f"Loaded {handle.rows} properties")
+            track_activity("manager_view_properties")
+        else:
+            st.info("No property data available")
+
+    handle = st.session_state.get('mgr_property_handle')
+    if handle is None:
+        return
+    properties_df = handle.frame()
+    if properties_df is None:
+        st.warning("Property data expired from the cache - please reload")
+        return
+    shown = visible(properties_df, "properties", "manager")
+    # Every sheet column, as before projection - decoded only when asked for
+    if st.checkbox("📋 عرض كل الأعمدة (العنوان، الملاحظات، المرافق)", key="mgr_show_all_columns"):
+        shown = full_rows(handle)
+        if shown is None:
+            st.warning("Property data expired from the cache - please reload")
+            return
+    st.dataframe(shown, use_container_width=True, height=500)
+
+@st.fragment
+@perf.timed("fragment_manager_clients_tab")
+def render_manager_clients_tab():
+    """All Clients - view only"""
+    st.markdown("#### All Clients")
+    if st.button("📥 Load All Clients", key="mgr_load_clients"):
+        clients_df = load_google_sheet(
+            st.session_state.sheets_urls.get('mother_clients', ''),
+            "mother_clients"
+        )
+        if not clients_df.empty:
+            st.success(f"Loaded {len(clients_df)} clients")
+            st.dataframe(clients_df, use_container_width=True, height=500)
+            track_activity("manager_view_clients")
+        else:
+            st.info("No client data available")
+
+@st.fragment
+@perf.timed("fragment_manager_transactions_tab")
+def render_manager_transactions_tab():
+    """Transactions - view only"""
+    st.markdown("#### Transactions")
+    if st.button("📥 Load Transactions", key="mgr_load_transactions"):
+        transactions_df = load_google_sheet(
+            st.session_state.sheets_urls.get('transactions', ''),
+            "transactions"
+        )
+        if not transactions_df.empty:
+            st.success(f"Loaded {len(transactions_df)} transactions")
+            st.dataframe(transactions_df, use_container_width=True, height=500)
+            track_activity("manager_view_transactions")
+        else:
+            st.info("No transactions available")
+
+@st.fragment
+@perf.timed("fragment_manager_reports_tab")
+def render_manager_reports_tab():
+    """Month-end client reports - one formatted workbook per client, zipped"""
+    from erp.reports import generate_reports, requests_from_clients, requests_from_searches
+    from erp.searches import SAVED_SEARCHES
+
+    st.markdown("#### 📦 Client Reports")
+    st.markdown("*One formatted workbook per client (summary + matching units), all in one zip*")
+    source = st.radio("المصدر", ["طلبات العملاء (الشيت الرئيسي)", "البحوث المحفوظة"],
+                      horizontal=True, key="mgr_report_source")
+
+    if st.button("📦 Generate Reports", key="mgr_generate_reports"):
+        # Signatures filter on the sales view's columns (utilities, elevator, garage...)
+        handle = load_sheet_handle(st.session_state.sheets_urls.get('properties', ''), "properties", view="sales")
+        if source == "البحوث المحفوظة":
+            requests = requests_from_searches(SAVED_SEARCHES.all())
+        else:
+            clients = load_sheet_handle(st.session_state.sheets_urls.get('mother_clients', ''), "mother_clients")
+            clients_df = clients.frame() if clients is not None else None
+            requests = requests_from_clients(clients_df) if clients_df is not None else []
+        if handle is None or not requests:
+            st.info("Properties and at least one client / saved search are required")
+        else:
+            bar = st.progress(0.0, text=f"0 / {len(requests)}")
+            batch = generate_reports(handle, requests,
+                                     progress=lambda done, total: bar.progress(done / total, text=f"{done} / {total}"))
+            if batch is None:
+                st.warning("Property data expired from the cache - please try again")
+            else:
+                st.session_state.mgr_report_batch = batch
+                track_activity("manager_bulk_reports", {"reports": batch.reports, "units": batch.units})
+
+    batch = st.session_state.get('mgr_report_batch')
+    if batch is None:
+        return
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Reports", f"{batch.reports:,}")
+    with col2:
+        st.metric("Units Listed", f"{batch.units:,}")
+    with col3:
+        st.metric("Time", f"{batch.seconds:.1f}s")
+    with col4:
+        st.metric("Reports / sec", f"{batch.reports_per_second:.1f}")
+    st.caption(f"{batch.workers} worker process(es) · zip {len(batch.zip_bytes) / 1e6:.1f} MB")
+    if batch.failed:
+        st.warning(f"{len(batch.failed)} report(s) failed: " + ", ".join(client for client, _ in batch.failed[:10]))
+    st.download_button(
+        label="📥 تحميل التقارير (ZIP)",
+        data=batch.zip_bytes,
+        file_name=f"client_reports_{datetime.now().strftime('%Y%m%d')}.zip",
+        mime="application/zip",
+        key="mgr_download_reports"
+    )
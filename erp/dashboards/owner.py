@@ -0,0 +1,601 @@
+"""
+OWNER DASHBOARD - مع نشاط اليوم + العقارات + العملاء + الموظفين
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from erp import perf
+from erp.dashboards.activity import render_today_activity
+from erp.dashboards.performance import render_performance_panel
+from erp.datasets import REGISTRY as DATASETS
+from erp.exports import XLSX_MIME, excel_download_data, to_excel_bytes
+from erp.loaders import load_google_sheet, load_sheet_handle
+from erp.session_memory import SESSION_MEMORY, runtime_active, session_get, session_put, shared_reload
+from erp.state import get_today_activity, track_activity
+
+def render_owner_dashboard():
+    """Owner Dashboard - Complete Monitoring System with Today's Activity"""
+    user = st.session_state.user
+    st.markdown(f"<div class='main-header'>Executive Monitoring Dashboard</div>", unsafe_allow_html=True)
+    st.markdown(f"**Welcome, {user['full_name']}** | *Owner Access*")
+
+    # ============ SESSION SHEETS LOADER (مخفي بشكل افتراضي) ============
+    with st.expander("📋 Session Sheets Loader", expanded=False):
+        st.markdown("### Load Sheets for This Session")
+        st.markdown("*All sheets are session-only and cleared on logout*")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            properties_url = st.text_input(
+                "🏢 Properties Sheet URL",
+                value=st.session_state.sheets_urls.get('properties', ''),
+                key="owner_properties",
+                placeholder="https://docs.google.com/spreadsheets/d/..."
+            )
+
+            mother_clients_url = st.text_input(
+                "👥 Mother Clients Sheet URL",
+                value=st.session_state.sheets_urls.get('mother_clients', ''),
+                key="owner_clients",
+                placeholder="https://docs.google.com/spreadsheets/d/..."
+            )
+
+        with col2:
+            transactions_url = st.text_input(
+                "💰 Transactions Sheet URL",
+                value=st.session_state.sheets_urls.get('transactions', ''),
+                key="owner_transactions",
+                placeholder="https://docs.google.com/spreadsheets/d/..."
+            )
+
+            sales_sheets = st.text_area(
+                "👤 Sales Agent Sheets URLs (one per line)",
+                value="\n".join(st.session_state.sheets_urls.get('sales_sheets', [])),
+                key="owner_sales",
+                placeholder="https://docs.google.com/spreadsheets/d/...\nhttps://docs.google.com/spreadsheets/d/..."
+            )
+
+        if st.button("💾 Load All Sheets", use_container_width=True):
+            st.session_state.sheets_urls['properties'] = properties_url
+            st.session_state.sheets_urls['mother_clients'] = mother_clients_url
+            st.session_state.sheets_urls['transactions'] = transactions_url
+
+            if sales_sheets:
+                st.session_state.sheets_urls['sales_sheets'] = [
+                    url.strip() for url in sales_sheets.split('\n') if url.strip()
+                ]
+
+            track_activity("sheets_loaded", {
+                "properties": bool(properties_url),
+                "clients": bool(mother_clients_url),
+                "transactions": bool(transactions_url)
+            })
+
+            st.success("✅ Sheets loaded successfully!")
+            st.rerun()
+
+    # ============ تبويبات المالك ============
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
+        "📊 نشاط اليوم",
+        "🏢 العقارات",
+        "👥 كل العملاء",
+        "👤 الموظفين",
+        "📁 Session Monitor",
+        "💰 Transactions",
+        "🎯 Matching",
+        "🧬 Duplicates",
+        "📈 History",
+        "⚡ Performance"
+    ])
+
+    with tab1:
+        render_today_activity("owner")
+
+    with tab2:
+        render_owner_properties_tab()
+
+    with tab3:
+        render_owner_clients_tab()
+
+    with tab4:
+        render_owner_employees_tab()
+
+    with tab5:
+        render_session_monitor_tab()
+
+    with tab6:
+        render_owner_transactions_tab()
+        st.markdown("---")
+        render_owner_unit_sales()
+
+    with tab7:
+        render_owner_matching_tab()
+
+    with tab8:
+        render_owner_duplicates_tab()
+
+    with tab9:
+        render_owner_history_tab()
+
+    with tab10:
+        render_performance_panel()
+
+# ============================================
+# OWNER TABS - EACH ONE A FRAGMENT, RERUNS ON ITS OWN
+# ============================================
+@st.fragment
+@perf.timed("fragment_owner_properties_tab")
+def render_owner_properties_tab():
+    """🏢 العقارات - load, view, export"""
+    st.markdown("### 🏢 Property Inventory")
+    if st.button("📥 Load Properties", key="owner_load_props"):
+        url = st.session_state.sheets_urls.get('properties', '')
+        handle = load_sheet_handle(url, "properties")
+        if handle is not None:
+            # A reference into the shared registry - no private copy per session
+            session_put("owner_properties_data", handle, shared_reload(url, "properties", handle.version))
+            st.success(f"Loaded {handle.rows} properties")
+            track_activity("owner_view_properties")
+        else:
+            st.info("No property data available")
+
+    properties_df = session_get("owner_properties_data")
+    if properties_df is not None:
+        st.dataframe(
+            properties_df,
+            use_container_width=True,
+            height=500
+        )
+
+        # تصدير Excel
+        st.download_button(
+            label="📥 تحميل العقارات (Excel)",
+            data=excel_download_data(properties_df, "properties"),
+            file_name=f"properties_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            mime=XLSX_MIME,
+            use_container_width=True
+        )
+
+@st.fragment
+@perf.timed("fragment_owner_clients_tab")
+def render_owner_clients_tab():
+    """👥 كل العملاء - load, view, export"""
+    st.markdown("### 👥 All Clients")
+    if st.button("📥 Load All Clients", key="owner_load_clients"):
+        url = st.session_state.sheets_urls.get('mother_clients', '')
+        handle = load_sheet_handle(url, "mother_clients")
+        if handle is not None:
+            # A reference into the shared registry - no private copy per session
+            session_put("owner_clients_data", handle, shared_reload(url, "mother_clients", handle.version))
+            st.success(f"Loaded {handle.rows} clients")
+            track_activity("owner_view_clients")
+        else:
+            st.info("No client data available")
+
+    clients_df = session_get("owner_clients_data")
+    if clients_df is not None:
+        st.dataframe(
+            clients_df,
+            use_container_width=True,
+            height=500
+        )
+
+        # تصدير Excel
+        st.download_button(
+            label="📥 تحميل العملاء (Excel)",
+            data=excel_download_data(clients_df, "clients"),
+            file_name=f"clients_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            mime=XLSX_MIME,
+            use_container_width=True
+        )
+
+@st.fragment
+@perf.timed("fragment_owner_employees_tab")
+def render_owner_employees_tab():
+    """👤 الموظفين - passwords masked on screen only"""
+    st.markdown("### 👤 Employees (Users Sheet)")
+    if st.button("📥 Load Employees", key="owner_load_users"):
+        users_df = load_google_sheet(
+            st.session_state.sheets_urls.get('users', ''),
+            "users",
+            share=False
+        )
+        if not users_df.empty:
+            # Private to this session - the users sheet never enters the shared registry
+            users_url = st.session_state.sheets_urls.get('users', '')
+            session_put("owner_users_data", users_df,
+                        lambda: load_google_sheet(users_url, "users", trigger_tracking=False, share=False))
+            st.success(f"Loaded {len(users_df)} employees")
+            track_activity("owner_view_employees")
+        else:
+            st.info("No employees data available")
+
+    users_df = session_get("owner_users_data")
+    if users_df is not None:
+        # إخفاء كلمة السر من العرض
+        df_display = users_df.copy()
+        password_cols = [col for col in df_display.columns if 'pass' in col.lower()]
+        for col in password_cols:
+            df_display[col] = "••••••••"
+
+        st.dataframe(
+            df_display,
+            use_container_width=True,
+            height=500
+        )
+
+        # تصدير Excel (بدون إخفاء كلمة السر)
+        st.download_button(
+            label="📥 تحميل الموظفين (Excel)",
+            data=excel_download_data(users_df, "employees"),
+            file_name=f"employees_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            mime=XLSX_MIME,
+            use_container_width=True
+        )
+
+@st.fragment
+@perf.timed("fragment_session_monitor_tab")
+def render_session_monitor_tab():
+    """📁 Session Monitor - sheets + today's sheet access"""
+    st.markdown("### 📊 Session Sheets Monitor")
+
+    monitor_data = []
+    for sheet_type, url in st.session_state.sheets_urls.items():
+        if url and sheet_type != 'users':
+            masked_url = url[:30] + "..." if len(url) > 30 else url
+            metadata = st.session_state.sheets_metadata.get(sheet_type, {})
+
+            monitor_data.append({
+                "Sheet Name": sheet_type.replace('_', ' ').title(),
+                "Type": sheet_type,
+                "Loaded By": metadata.get('loaded_by', 'Owner'),
+                "Load Time": metadata.get('load_time', 'N/A'),
+                "URL": masked_url
+            })
+
+    if monitor_data:
+        st.dataframe(pd.DataFrame(monitor_data), use_container_width=True)
+    else:
+        st.info("No sheets loaded yet")
+
+    st.markdown("### 📁 Sheet Access Monitor")
+    sheet_access = [log for log in get_today_activity() if log['action'] == 'sheet_load']
+
+    if sheet_access:
+        df_access = pd.DataFrame(sheet_access)
+        st.dataframe(df_access[['timestamp', 'username', 'details']], use_container_width=True)
+    else:
+        st.info("No sheet access today")
+
+    render_session_memory()
+
+def render_session_memory():
+    """🧠 Memory held per session, against the per-session and global budgets"""
+    st.markdown("### 🧠 Session Memory")
+    if st.button("🧹 Reap Idle Sessions", key="owner_reap_sessions"):
+        emptied, forgotten = SESSION_MEMORY.reap(runtime_active())
+        st.success(f"Emptied {emptied} idle session(s), forgot {forgotten} closed one(s)")
+
+    totals = SESSION_MEMORY.totals()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Sessions", totals["sessions"])
+    with col2:
+        st.metric("Session Data", f"{totals['private_bytes'] / 1e6:,.1f} MB",
+                  help=f"Global budget {SESSION_MEMORY.global_budget / 1e6:,.0f} MB, "
+                       f"{SESSION_MEMORY.session_budget / 1e6:,.0f} MB per session")
+    with col3:
+        st.metric("Shared Registry", f"{DATASETS.nbytes() / 1e6:,.1f} MB")
+    with col4:
+        st.metric("Evictions", f"{totals['evictions']:,}")
+    st.caption(f"Idle sessions emptied after {SESSION_MEMORY.idle_seconds / 60:.0f} min · "
+               f"evicted data reloads on next access · reaped so far: {totals['reaped']}")
+
+    rows = SESSION_MEMORY.breakdown()
+    if not rows:
+        st.info("No session data held")
+        return
+    breakdown = pd.DataFrame(rows)
+    per_session = (breakdown.groupby(["session", "user"], as_index=False)["mb"].sum()
+                   .sort_values("mb", ascending=False))
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.dataframe(per_session.round(2), use_container_width=True, hide_index=True)
+    with col2:
+        st.dataframe(breakdown.round(2), use_container_width=True, hide_index=True)
+
+@st.fragment
+@perf.timed("fragment_owner_transactions_tab")
+def render_owner_transactions_tab():
+    """💰 Transactions - load, view, totals"""
+    st.markdown("### 💰 Transactions Sheet Viewer")
+
+    if st.session_state.sheets_urls.get('transactions'):
+        if st.button("📥 Load Transactions Data", key="owner_load_transactions"):
+            transactions_df = load_google_sheet(
+                st.session_state.sheets_urls['transactions'],
+                "transactions"
+            )
+
+            if not transactions_df.empty:
+                st.success(f"Loaded {len(transactions_df)} transactions")
+                st.dataframe(transactions_df, use_container_width=True, height=400)
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Total Transactions", len(transactions_df))
+
+                amount_col = None
+                for col in transactions_df.columns:
+                    if 'amount' in col.lower() or 'price' in col.lower():
+                        amount_col = col
+                        break
+
+                if amount_col:
+                    with col2:
+                        total_amount = transactions_df[amount_col].sum()
+                        st.metric("Total Amount", f"${total_amount:,.0f}")
+                    with col3:
+                        avg_amount = transactions_df[amount_col].mean()
+                        st.metric("Average Amount", f"${avg_amount:,.0f}")
+
+                track_activity("owner_view_transactions", {"count": len(transactions_df)})
+            else:
+                st.warning("Could not load transactions data")
+    else:
+        st.info("No Transactions Sheet loaded")
+
+@st.fragment
+@perf.timed("fragment_owner_unit_sales")
+def render_owner_unit_sales():
+    """🔗 Transactions linked to units - sold status, days on market, realized price"""
+    from erp.unit_sales import STATUS_SOLD, get_unit_sales, summary_by
+
+    st.markdown("### 🔗 Sales Performance")
+    st.markdown("*Every unit linked to its transactions - conversion, time to sale, realized vs listing price*")
+    if st.button("🔗 Link Transactions to Units", key="owner_run_unit_sales"):
+        units = load_sheet_handle(st.session_state.sheets_urls.get('properties', ''), "properties")
+        transactions = load_sheet_handle(st.session_state.sheets_urls.get('transactions', ''), "transactions")
+        if units is None or transactions is None:
+            st.info("Properties and transactions sheets are both required")
+        else:
+            st.session_state.owner_unit_sales_handles = (units, transactions)
+            track_activity("owner_run_unit_sales", {"units": units.rows, "transactions": transactions.rows})
+
+    if 'owner_unit_sales_handles' not in st.session_state:
+        return
+    units, transactions = st.session_state.owner_unit_sales_handles
+    with st.spinner("Linking transactions..."):
+        joined = get_unit_sales(units, transactions)
+    units_df = units.frame()
+    if joined is None or units_df is None:
+        st.warning("Sheet data expired from the cache (or no unit ID column) - please run again")
+        return
+    sales = joined.frame(units_df)
+    sold = sales["status"] == STATUS_SOLD
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Units Sold", f"{int(sold.sum()):,} / {len(sales):,}")
+    with col2:
+        st.metric("Conversion", f"{sold.mean():.1%}" if len(sales) else "-")
+    with col3:
+        days = sales.loc[sold, "days_on_market"].median()
+        st.metric("Median Days to Sale", f"{days:,.0f}" if pd.notna(days) else "-")
+    with col4:
+        gap = sales["price_gap_pct"].median()
+        st.metric("Realized vs Listing", f"{gap:+.1f}%" if pd.notna(gap) else "-")
+    index_stats = joined.index.stats
+    st.caption(f"{index_stats['transactions']:,} transactions → {index_stats['units']:,} units "
+               f"({index_stats['mode']}, {index_stats['rows_aggregated']:,} aggregated) · "
+               f"join {joined.stats['mode']}, {joined.stats['rows_looked_up']:,} units looked up · "
+               f"listing date: {joined.listed_source or 'unknown'}")
+
+    group = st.radio("تجميع حسب", [c for c in ("area", "unit_type") if c in sales.columns] or ["area"],
+                     horizontal=True, key="owner_unit_sales_group")
+    st.dataframe(summary_by(sales, group).round(1), use_container_width=True, hide_index=True)
+
+    show = st.selectbox("الوحدات", ["الكل", "مباع", "متاح", "حالة الشيت مختلفة"], key="owner_unit_sales_filter")
+    if show == "حالة الشيت مختلفة":
+        view = sales[sales["status_mismatch"]]
+    elif show != "الكل":
+        view = sales[sales["status"] == show]
+    else:
+        view = sales
+    st.caption(f"{len(view):,} units")
+    st.dataframe(view.head(1000), use_container_width=True, hide_index=True, height=300)
+    st.download_button(
+        label="📥 تحميل أداء المبيعات (Excel)",
+        data=excel_download_data(view, "unit_sales"),
+        file_name=f"unit_sales_{datetime.now().strftime('%Y%m%d')}.xlsx",
+        mime=XLSX_MIME,
+        use_container_width=True
+    )
+
+@st.fragment
+@perf.timed("fragment_owner_matching_tab")
+def render_owner_matching_tab():
+    """🎯 Client ↔ inventory matching - summary per agent"""
+    from erp.matching import DEFAULT_TOP_K, agent_summary, cached_matches, match_details
+
+    st.markdown("### 🎯 Client ↔ Inventory Matching")
+    st.markdown(f"*Every mother-sheet client against the full inventory - top {DEFAULT_TOP_K} units each*")
+    if st.button("🎯 Run Matching", key="owner_run_matching"):
+        clients = load_sheet_handle(st.session_state.sheets_urls.get('mother_clients', ''), "mother_clients")
+        units = load_sheet_handle(st.session_state.sheets_urls.get('properties', ''), "properties")
+        if clients is None or units is None:
+            st.info("Properties and mother clients sheets are both required")
+        else:
+            st.session_state.owner_match_handles = (clients, units)
+            track_activity("owner_run_matching", {"clients": clients.rows, "units": units.rows})
+
+    if 'owner_match_handles' not in st.session_state:
+        return
+    clients, units = st.session_state.owner_match_handles
+    with st.spinner("Matching clients..."):
+        matches = cached_matches(clients, units)
+    if matches is None:
+        st.warning("Sheet data expired from the cache - please run again")
+        return
+
+    clients_df, units_df = clients.frame(), units.frame()
+    summary = agent_summary(matches, clients_df)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Clients", f"{clients.rows:,}")
+    with col2:
+        st.metric("Clients With Matches", f"{int(summary['matched_clients'].sum()):,}")
+    with col3:
+        st.metric("Total Matches", f"{len(matches):,}")
+
+    st.markdown("#### 👤 Per Agent")
+    st.dataframe(summary.round(2), use_container_width=True, hide_index=True)
+
+    st.download_button(
+        label="📥 تحميل كل الترشيحات (Excel)",
+        data=lambda: to_excel_bytes(match_details(matches, clients_df, units_df), "client_matches"),
+        file_name=f"client_matches_{datetime.now().strftime('%Y%m%d')}.xlsx",
+        mime=XLSX_MIME,
+        use_container_width=True
+    )
+
+@st.fragment
+@perf.timed("fragment_owner_duplicates_tab")
+def render_owner_duplicates_tab():
+    """🧬 Near-duplicate listings - clusters of the same unit listed twice"""
+    from erp.dedup import get_dedup
+
+    st.markdown("### 🧬 Duplicate Listings")
+    st.markdown("*Same unit listed more than once with slightly different address, notes or price*")
+    if st.button("🧬 Find Duplicates", key="owner_run_dedup"):
+        handle = load_sheet_handle(st.session_state.sheets_urls.get('properties', ''), "properties")
+        if handle is None:
+            st.info("No Properties Sheet loaded")
+        else:
+            st.session_state.owner_dedup_handle = handle
+            track_activity("owner_run_dedup", {"rows": handle.rows})
+
+    if 'owner_dedup_handle' not in st.session_state:
+        return
+    handle = st.session_state.owner_dedup_handle
+    with st.spinner("Comparing listings..."):
+        index = get_dedup(handle)
+    df = handle.frame()
+    if index is None or df is None:
+        st.warning("Sheet data expired from the cache - please run again")
+        return
+
+    stats = index.stats
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Listings", f"{stats['rows']:,}")
+    with col2:
+        st.metric("Duplicate Clusters", f"{stats['clusters']:,}")
+    with col3:
+        st.metric("Extra Listings", f"{stats['duplicate_rows']:,}")
+    with col4:
+        st.metric("Inventory Inflation", f"{stats['duplicate_rows'] / max(stats['rows'], 1):.1%}")
+    st.caption(f"{stats['mode']} build in {stats['seconds']:.2f}s - "
+               f"{stats['rows_hashed']:,} rows hashed, {stats['candidate_pairs']:,} candidate pairs")
+
+    clusters = index.clusters(df)
+    if clusters.empty:
+        st.success("✅ No duplicate listings found")
+        return
+    st.dataframe(clusters, use_container_width=True, hide_index=True, height=300)
+
+    labels = dict(zip(clusters["cluster"].tolist(), clusters["unit_ids"].tolist()))
+    cluster = st.selectbox("🔍 Cluster", list(labels), key="owner_dedup_cluster",
+                           format_func=lambda c: f"#{c} - {labels[c]}")
+    st.dataframe(df.iloc[index.labels == cluster], use_container_width=True, hide_index=True)
+
+    st.download_button(
+        label="📥 تحميل المكررات (Excel)",
+        data=excel_download_data(df.iloc[index.labels >= 0].assign(
+            duplicate_cluster=index.labels[index.labels >= 0]), "duplicate_listings"),
+        file_name=f"duplicate_listings_{datetime.now().strftime('%Y%m%d')}.xlsx",
+        mime=XLSX_MIME,
+        use_container_width=True
+    )
+
+@st.fragment
+@perf.timed("fragment_owner_history_tab")
+def render_owner_history_tab():
+    """📈 Price trends per area, one unit's timeline, the inventory at a past date"""
+    from erp.history import RECORDER, get_history
+
+    st.markdown("### 📈 Inventory History")
+    st.markdown("*A snapshot is recorded whenever a new properties / transactions version is loaded*")
+    store = get_history()
+    if store is None:
+        st.info("History is disabled (ERP_HISTORY_DIR is empty)")
+        return
+
+    if st.button("📸 Record Snapshot Now", key="owner_record_history"):
+        for sheet_type in ("properties", "transactions"):
+            load_sheet_handle(st.session_state.sheets_urls.get(sheet_type, ''), sheet_type)
+        with st.spinner("Recording..."):
+            RECORDER.flush()
+        track_activity("owner_record_history")
+
+    stats = store.stats()
+    if not stats:
+        st.info("No snapshots recorded yet")
+        return
+    st.dataframe(pd.DataFrame(stats).round(3), use_container_width=True, hide_index=True)
+
+    # Area trends - read from the manifest, no snapshot replay
+    trend = store.area_trend()
+    if not trend.empty:
+        import plotly.express as px
+
+        st.markdown("#### 📊 Price Trend per Area")
+        metrics = {"median_price": "متوسط السعر (الوسيط)", "median_price_sqm": "سعر المتر (الوسيط)", "units": "عدد الوحدات"}
+        metric = st.radio("المؤشر", list(metrics), format_func=metrics.get, horizontal=True, key="owner_trend_metric")
+        fig = px.line(trend, x="taken_at", y=metric, color="area", markers=True,
+                      labels={"taken_at": "", metric: metrics[metric], "area": "المنطقة"})
+        st.plotly_chart(fig, use_container_width=True)
+
+    # One unit - answered from the event index
+    st.markdown("#### 🏷️ Unit Price History")
+    unit_id = st.text_input("كود الوحدة", placeholder="مثلاً: U0000123", key="owner_history_unit")
+    if unit_id.strip():
+        events = store.unit_history(unit_id)
+        if events.empty:
+            st.warning(f"No history for unit {unit_id}")
+        else:
+            days = store.days_on_market(unit_id)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Price Changes", int((events["event"] == "price").sum()))
+            with col2:
+                st.metric("Last Price", f"{events['price'].ffill().iloc[-1]:,.0f}")
+            with col3:
+                st.metric("Days on Market", f"{days:,.0f}" if days is not None else "-")
+            st.dataframe(events.drop(columns=["seq"]), use_container_width=True, hide_index=True)
+
+    # Point in time - one checkpoint + its deltas
+    st.markdown("#### 🕰️ Inventory at a Past Date")
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        day = st.date_input("التاريخ", value=datetime.now().date(), key="owner_history_date")
+    with col2:
+        sheet_type = st.selectbox("الشيت", [row["sheet"] for row in stats], key="owner_history_sheet")
+    snapshot = store.snapshot_at(sheet_type, datetime.combine(day, datetime.max.time()))
+    if snapshot is None:
+        st.info("Nothing recorded on or before that date")
+        return
+    st.caption(f"{len(snapshot):,} rows")
+    st.dataframe(snapshot, use_container_width=True, hide_index=True, height=300)
+    st.download_button(
+        label="📥 تحميل اللقطة (Excel)",
+        data=excel_download_data(snapshot, f"history_{sheet_type}"),
+        file_name=f"{sheet_type}_{day.strftime('%Y%m%d')}.xlsx",
+        mime=XLSX_MIME,
+        use_container_width=True
+    )
@@ -0,0 +1,92 @@
+"""
+PERFORMANCE PANEL - OWNER ONLY
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from erp import perf
+from erp.change_feed import FEED
+from erp.projection import SOURCES
+from erp.state import track_activity
+from erp.writeback import WRITEBACK
+
+@st.fragment
+def render_performance_panel():
+    """Per-stage timings, bytes fetched and cache hit rates for this process"""
+    st.markdown("### ⚡ Performance")
+    started = datetime.fromtimestamp(perf.REGISTRY.started_at).strftime('%Y-%m-%d %H:%M:%S')
+    st.markdown(f"*Process-wide metrics since {started}*")
+
+    stages = perf.REGISTRY.stage_summary()
+    bytes_fetched = perf.REGISTRY.bytes_summary()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Instrumented Stages", len(stages))
+    with col2:
+        st.metric("Bytes Fetched", f"{sum(bytes_fetched.values()) / 1e6:,.2f} MB")
+    with col3:
+        st.metric("Rows Parsed", f"{perf.REGISTRY.rows_processed.get('sheet_parse', 0):,}")
+
+    st.markdown("#### ⏱️ Stage Timings (ms)")
+    if stages:
+        st.dataframe(
+            pd.DataFrame(stages).round(2),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info("No timings recorded yet")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### 📦 Bytes Fetched per Sheet")
+        if bytes_fetched:
+            st.dataframe(
+                pd.DataFrame(
+                    [{"sheet": k, "bytes": v} for k, v in sorted(bytes_fetched.items())]
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("No sheets fetched yet")
+    with col2:
+        st.markdown("#### 🎯 Cache Hit Rates")
+        caches = perf.REGISTRY.cache_summary()
+        if caches:
+            st.dataframe(pd.DataFrame(caches).round(3), use_container_width=True, hide_index=True)
+        else:
+            st.info("No cache lookups yet")
+
+    if FEED.last_run:
+        st.markdown("#### 🔔 Saved-Search Change Feed (last refresh)")
+        st.dataframe(pd.DataFrame([FEED.last_run]).round(2), use_container_width=True, hide_index=True)
+
+    sources = SOURCES.stats()
+    if sources["sources"]:
+        st.markdown("#### 🧩 Column Projection (export bytes + lazy columns)")
+        st.dataframe(pd.DataFrame([sources]).round(2), use_container_width=True, hide_index=True)
+
+    writeback = WRITEBACK.stats()
+    if writeback["submitted"]:
+        st.markdown("#### ✏️ Sheet Write-Back")
+        st.dataframe(pd.DataFrame([writeback]).round(2), use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Export Metrics (Prometheus)",
+            data=perf.REGISTRY.to_prometheus(),
+            file_name=f"erp_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prom",
+            mime="text/plain",
+            use_container_width=True
+        )
+    with col2:
+        if st.button("🔄 Reset Metrics", key="owner_reset_perf", use_container_width=True):
+            perf.REGISTRY.reset()
+            track_activity("perf_reset")
+            st.rerun()
@@ -0,0 +1,466 @@
+"""
+SALES DASHBOARD - ORIGINAL FILTERS + LINK FINDER
+"""
+
+from datetime import datetime
+
+import streamlit as st
+
+from erp import perf
+from erp.change_feed import FEED
+from erp.comparables import find_comparables, get_index
+from erp.datasets import REGISTRY as DATASETS, DatasetHandle
+from erp.exports import XLSX_MIME, excel_download_data
+from erp.filters import render_filter_widgets
+from erp.link_finder import PropertyLinkFinder
+from erp.loaders import load_google_sheet, load_sheet_handle
+from erp.projection import WIDE_TEXT_COLUMNS, full_rows, visible, with_columns
+from erp.searches import FILTER_CACHE, SAVED_SEARCHES
+from erp.session_memory import session_get, session_put
+from erp.state import track_activity
+from erp.writeback import WRITEBACK, apply_edits, cell_edits, publish_optimistic, rebase_edits
+
+def render_sales_dashboard():
+    """Sales Dashboard - Original Filters + Property Link Finder"""
+    user = st.session_state.user
+    st.markdown(f"<div class='main-header'>Sales Dashboard</div>", unsafe_allow_html=True)
+    st.markdown(f"**Welcome, {user['full_name']}** | *Sales Professional*")
+
+    render_match_notifications()
+
+    tab1, tab2, tab3 = st.tabs(["Property Search", "My Clients", "Property Link Finder"])
+
+    with tab1:
+        st.markdown("<div class='main-header'>Property Inventory Search</div>", unsafe_allow_html=True)
+
+        # LAZY LOADING - Only load when requested
+        if st.button("🔍 Load Property Data", key="sales_load_props", use_container_width=True):
+            handle = load_sheet_handle(
+                st.session_state.sheets_urls.get('properties', ''),
+                "properties",
+                view="sales"
+            )
+
+            if handle is not None:
+                st.session_state.sales_property_handle = handle
+                track_activity("sales_load_properties")
+                st.success(f"Loaded {handle.rows} properties")
+
+        if 'sales_property_handle' in st.session_state:
+            render_property_search(st.session_state.sales_property_handle)
+            render_comparables(st.session_state.sales_property_handle)
+            render_unit_status_editor(st.session_state.sales_property_handle)
+            render_saved_searches(st.session_state.sales_property_handle)
+
+    with tab2:
+        st.markdown("### My Clients")
+
+        if st.button("📥 Load My Clients", key="sales_load_clients", use_container_width=True):
+            # Try to find sales-specific sheet first
+            sales_sheets = st.session_state.sheets_urls.get('sales_sheets', [])
+            my_sheet = None
+
+            # Simple matching - assume sheet title contains username
+            for url in sales_sheets:
+                if user['username'].lower() in url.lower():
+                    my_sheet = url
+                    break
+
+            if my_sheet:
+                clients_df = load_google_sheet(my_sheet, f"sales_{user['username']}")
+                st.session_state.sales_clients_source = (my_sheet, f"sales_{user['username']}")
+            else:
+                # Fall back to filtered mother sheet
+                mother_df = load_google_sheet(
+                    st.session_state.sheets_urls.get('mother_clients', ''),
+                    "mother_clients"
+                )
+
+                if not mother_df.empty:
+                    assigned = agent_clients(mother_df, user['username'])
+                    if assigned is not None:
+                        clients_df = assigned
+                        st.session_state.sales_clients_source = (
+                            st.session_state.sheets_urls.get('mother_clients', ''), "mother_clients"
+                        )
+
+            if 'clients_df' in locals() and not clients_df.empty:
+                session_put("sales_clients_data", clients_df,
+                            clients_reload(*st.session_state.sales_clients_source, user['username']))
+                track_activity("sales_load_clients", {"count": len(clients_df)})
+                st.success(f"Loaded {len(clients_df)} clients")
+            else:
+                st.warning("No clients found for this agent")
+
+        clients_df = session_get("sales_clients_data")
+        if clients_df is not None:
+            st.dataframe(clients_df, use_container_width=True, height=400)
+            render_client_status_editor()
+            render_client_matches(clients_df)
+
+    with tab3:
+        link_finder = PropertyLinkFinder()
+        link_finder.render_interface()
+
+# ============================================
+# PROPERTY SEARCH FRAGMENT - FILTERS + KEYWORD + RESULTS + EXPORT
+# ============================================
+@st.fragment
+@perf.timed("fragment_property_search")
+def render_property_search(handle: DatasetHandle):
+    """Reruns on its own when a filter or the keyword box changes"""
+    df = handle.frame()
+    if df is None:
+        st.warning("Property data expired from the cache - please reload")
+        return
+
+    # ORIGINAL FILTER WIDGETS -> CANONICAL SIGNATURE -> SHARED RESULT CACHE
+    filters_box = st.container(border=True)
+    filters_box.markdown("#### 🎛️ الفلاتر")
+    signature = render_filter_widgets(df, filters_box)
+
+    # Keyword Search
+    st.markdown("### 🔍 ابحث عن كلمات مميزة (مثل: بحري، مرخصة، قسط، ناصية)")
+    search_query = st.text_input("ادخل الكلمات الدليلية هنا...", placeholder="مثلاً: جراج، عداد كهرباء، الترا سوبر لوكس")
+    signature = signature.with_keyword(search_query)
+    if search_query:
+        track_activity("keyword_search", {"query": search_query})
+
+    filtered_df = FILTER_CACHE.filtered(handle, signature)
+    if filtered_df is None:
+        st.warning("Property data expired from the cache - please reload")
+        return
+
+    # Display Results - address / notes are decoded only when asked for
+    st.subheader(f"📈 وجدنا لك {len(filtered_df)} وحدة مطابقة لطلبك")
+    if st.checkbox("📝 عرض العنوان والملاحظات", key="sales_show_notes"):
+        with_text = with_columns(handle, WIDE_TEXT_COLUMNS)
+        if with_text is not None:
+            filtered_df = with_text.loc[filtered_df.index]
+    with perf.timed("render_dataframe"):
+        st.dataframe(visible(filtered_df, "properties", "sales"), use_container_width=True)
+
+    # Export - full rows, fetched on click
+    if not filtered_df.empty:
+        labels = filtered_df.index
+        if st.download_button(
+            label="📥 تحميل الوحدات المختارة للعميل (Excel)",
+            data=excel_download_data(lambda: full_rows(handle, labels), "sales_filtered"),
+            file_name=f"ابانوب_للعقارات_المفلترة_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            mime=XLSX_MIME,
+            use_container_width=True
+        ):
+            track_activity("export", {"rows": len(filtered_df)})
+
+    # Save this search (name + optional share with all agents)
+    with st.expander("💾 حفظ هذا البحث"):
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            search_name = st.text_input("اسم البحث", key="save_search_name", placeholder="مثلاً: شقق المعادي تحت 3 مليون")
+        with col2:
+            shared = st.checkbox("مشاركة مع الفريق", key="save_search_shared")
+        with col3:
+            if st.button("💾 حفظ", key="save_search", use_container_width=True) and search_name.strip():
+                SAVED_SEARCHES.save(search_name, st.session_state.user['username'], signature, shared)
+                track_activity("save_search", {"name": search_name.strip(), "shared": shared})
+                st.rerun()
+        st.caption(signature.describe())
+
+# ============================================
+# COMPARABLES FRAGMENT - SIMILAR UNITS FOR ONE UNIT ID
+# ============================================
+@st.fragment
+@perf.timed("fragment_comparables")
+def render_comparables(handle: DatasetHandle):
+    """Top-k similar units (price, area, floor, rooms, bathrooms) for a unit ID"""
+    st.markdown("### 🏘️ وحدات مشابهة")
+    index = get_index(handle)
+    if index is None:
+        st.warning("Property data expired from the cache - please reload")
+        return
+
+    col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+    with col1:
+        unit_id = st.text_input("كود الوحدة", placeholder="مثلاً: U0000123", key="comp_unit")
+    with col2:
+        k = st.number_input("عدد النتائج", min_value=5, max_value=100, value=20, step=5, key="comp_k")
+    with col3:
+        same_area = st.checkbox("نفس المنطقة", value=True, key="comp_same_area")
+    with col4:
+        same_type = st.checkbox("نفس النوع", value=True, key="comp_same_type")
+
+    if not unit_id:
+        return
+    position = index.position_of(unit_id)
+    if position is None:
+        st.warning(f"Unit {unit_id} not found")
+        return
+
+    comparables = find_comparables(handle, position, int(k), same_area, same_type)
+    track_activity("comparables", {"unit_id": unit_id, "results": len(comparables)})
+    st.dataframe(handle.frame().iloc[[position]], use_container_width=True, hide_index=True)
+    if comparables.empty:
+        st.info("No comparable units found - try relaxing the area / type constraints")
+    else:
+        st.dataframe(comparables, use_container_width=True, hide_index=True)
+
+# ============================================
+# MY CLIENTS - AGENT FILTER + RELOAD AFTER EVICTION
+# ============================================
+def agent_clients(mother_df, username: str):
+    """Mother-sheet rows assigned to username, None without an assigned/agent column"""
+    assigned_col = None
+    for col in mother_df.columns:
+        if 'assigned_to' in col.lower() or 'agent' in col.lower():
+            assigned_col = col
+            break
+    if assigned_col is None:
+        return None
+    return mother_df[mother_df[assigned_col].astype(str).str.contains(username, case=False, na=False)]
+
+def clients_reload(url: str, sheet_type: str, username: str):
+    """Rebuild My Clients from the shared registry - latest version first, so
+    optimistic status edits survive an eviction"""
+    def reload():
+        handle = DATASETS.latest(sheet_type) if sheet_type == "mother_clients" else None
+        if handle is None:
+            handle = load_sheet_handle(url, sheet_type, trigger_tracking=False)
+        df = full_rows(handle) if handle is not None else None
+        if df is None or sheet_type != "mother_clients":
+            return df
+        return agent_clients(df, username)
+    return reload
+
+def sales_units(url: str, trigger_tracking: bool = True):
+    """The sales view of the inventory - this session's loaded version if still cached"""
+    handle = st.session_state.get('sales_property_handle')
+    if handle is None or handle.frame() is None:
+        handle = load_sheet_handle(url, "properties", trigger_tracking=trigger_tracking, view="sales")
+    return handle.frame() if handle is not None else None
+
+def matches_reload(url: str):
+    """Recompute the client matches against the session's clients and inventory"""
+    def reload():
+        from erp.matching import match_clients, match_details
+        clients_df = session_get("sales_clients_data")
+        units_df = sales_units(url, trigger_tracking=False) if clients_df is not None else None
+        if units_df is None:
+            return None
+        return match_details(match_clients(clients_df, units_df), clients_df, units_df)
+    return reload
+
+# ============================================
+# MY CLIENTS - MATCHING UNITS PER CLIENT
+# ============================================
+@st.fragment
+@perf.timed("fragment_client_matches")
+def render_client_matches(clients_df):
+    """Top units from the inventory for each of this agent's clients"""
+    from erp.matching import detect_client_columns, match_clients, match_details
+
+    st.markdown("### 🎯 وحدات مناسبة لعملائي")
+    if st.button("🎯 Find Matching Units", key="sales_match_clients", use_container_width=True):
+        url = st.session_state.sheets_urls.get('properties', '')
+        units_df = sales_units(url)
+        if units_df is None:
+            st.warning("No property data available")
+        else:
+            matches = match_clients(clients_df, units_df)
+            session_put("sales_client_matches", match_details(matches, clients_df, units_df), matches_reload(url))
+            track_activity("sales_match_clients", {"clients": len(clients_df), "matches": len(matches)})
+
+    details = session_get("sales_client_matches")
+    if details is None:
+        return
+    if details.empty:
+        st.info("No matching units for your clients right now")
+        return
+
+    name_col = detect_client_columns(clients_df)["name"] or detect_client_columns(clients_df)["id"]
+    if name_col and name_col in details.columns:
+        per_client = details.groupby(name_col, sort=False).agg(
+            matches=("score", "size"), best_score=("score", "max")
+        ).reset_index()
+        st.dataframe(per_client, use_container_width=True, hide_index=True)
+        client = st.selectbox("العميل", ["الكل"] + per_client[name_col].astype(str).tolist(), key="sales_match_client")
+        if client != "الكل":
+            details = details[details[name_col].astype(str) == client]
+    st.dataframe(details, use_container_width=True, hide_index=True)
+
+# ============================================
+# SAVED SEARCHES FRAGMENT - OWN + SHARED, SERVED FROM THE RESULT CACHE
+# ============================================
+@st.fragment
+@perf.timed("fragment_saved_searches")
+def render_saved_searches(handle: DatasetHandle):
+    """Reopen a saved search against the loaded properties version"""
+    username = st.session_state.user['username']
+    searches = SAVED_SEARCHES.visible_to(username)
+    st.markdown("### 📂 البحوث المحفوظة")
+    if not searches:
+        st.info("No saved searches yet - save one from the filters above")
+        return
+
+    labels = [s.name if s.owner == username else f"{s.name} ({s.owner})" for s in searches]
+    picked = st.selectbox("اختر بحث", range(len(searches)), format_func=lambda i: labels[i], key="saved_search_pick")
+    search = searches[picked]
+    st.caption(search.signature.describe())
+
+    results = FILTER_CACHE.filtered(handle, search.signature, cache_name="saved_search_results")
+    if results is None:
+        st.warning("Property data expired from the cache - please reload")
+        return
+    st.markdown(f"**{len(results)}** وحدة مطابقة")
+    st.dataframe(visible(results, "properties", "sales"), use_container_width=True)
+
+    if search.owner == username and st.button("🗑️ حذف البحث", key="delete_saved_search"):
+        SAVED_SEARCHES.delete(username, search.name)
+        track_activity("delete_search", {"name": search.name})
+        st.rerun()
+
+# ============================================
+# CHANGE FEED NOTIFICATIONS - NEW UNITS MATCHING MY SAVED SEARCHES
+# ============================================
+@st.fragment
+@perf.timed("fragment_match_notifications")
+def render_match_notifications():
+    """🔔 units added / updated since the last properties refresh, per saved search"""
+    username = st.session_state.user['username']
+    unread = FEED.notifications_for(username, unread_only=True)
+    if not unread:
+        return
+
+    total = sum(n.count for n in unread)
+    with st.expander(f"🔔 {total} وحدة جديدة / محدثة تطابق بحوثك المحفوظة", expanded=True):
+        latest = DATASETS.latest("properties")
+        df = latest.frame() if latest is not None else None
+        id_col = next((c for c in df.columns if 'unit_id' in c.lower()), None) if df is not None else None
+
+        for n in unread:
+            st.markdown(f"**{n.search_name}** — {len(n.new_units)} جديدة، {len(n.updated_units)} محدثة  ·  *{n.created_at}*")
+            if df is not None and id_col and n.version == latest.version:
+                units = df[df[id_col].astype(str).str.strip().isin(n.new_units + n.updated_units)]
+                st.dataframe(units, use_container_width=True, hide_index=True)
+            else:
+                st.caption(", ".join((n.new_units + n.updated_units)[:50]))
+
+        if st.button("✔️ تم الاطلاع", key="ack_match_notifications"):
+            FEED.mark_read(username)
+            track_activity("ack_match_notifications", {"count": total})
+            st.rerun()
+
+# ============================================
+# WRITE-BACK - STATUS EDITS QUEUED TO THE SHEET, SHOWN IMMEDIATELY
+# ============================================
+def render_writeback_status(sheet_url: str):
+    """Pending + failed write-back edits for this agent"""
+    from erp.loaders import extract_sheet_id
+
+    username = st.session_state.user['username']
+    pending = WRITEBACK.pending(extract_sheet_id(sheet_url or "") or "")
+    if pending:
+        st.caption(f"⏳ {pending} تعديل في انتظار الحفظ في الشيت")
+    failed = WRITEBACK.failed(username)
+    if failed:
+        with st.expander(f"⚠️ {len(failed)} تعديل لم يتم حفظه في الشيت"):
+            st.dataframe(
+                [{"id": e.key, "column": e.column, "value": e.value, "cell": e.a1, "error": e.error} for e in failed],
+                use_container_width=True, hide_index=True
+            )
+
+
+@st.fragment
+@perf.timed("fragment_unit_status_editor")
+def render_unit_status_editor(handle: DatasetHandle):
+    """Update a unit's unit_status - written back to the properties sheet"""
+    from erp.change_feed import detect_id_column
+
+    st.markdown("### ✏️ تحديث حالة وحدة")
+    df = handle.frame()
+    if df is None:
+        st.warning("Property data expired from the cache - please reload")
+        return
+    id_col = detect_id_column(df)
+    status_col = next((c for c in df.columns if 'unit_status' in c.lower()), None) \
+        or next((c for c in df.columns if 'status' in c.lower()), None)
+    if id_col is None or status_col is None:
+        st.info("Properties sheet has no unit ID / status column")
+        return
+
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        unit_id = st.text_input("كود الوحدة", placeholder="مثلاً: U0000123", key="status_unit")
+    with col2:
+        statuses = sorted(df[status_col].dropna().astype(str).unique())
+        new_status = st.selectbox("الحالة الجديدة", statuses, key="status_value")
+    with col3:
+        st.write("")
+        clicked = st.button("💾 تحديث", key="update_unit_status", use_container_width=True)
+
+    url = st.session_state.sheets_urls.get('properties', '')
+    if clicked and unit_id.strip() and new_status is not None:
+        labels = df.index[(df[id_col].astype(str).str.strip() == unit_id.strip()).to_numpy()]
+        if labels.empty:
+            st.warning(f"Unit {unit_id} not found")
+        else:
+            edits = cell_edits(url, "properties", df, labels[-1:], status_col, [new_status],
+                               id_col, st.session_state.user['username'])
+            if not edits:
+                st.warning("Properties sheet URL has no sheet ID")
+            else:
+                WRITEBACK.submit(edits)
+                updated = publish_optimistic(handle, edits)
+                if updated is not None:
+                    st.session_state.sales_property_handle = updated
+                track_activity("update_unit_status", {"unit_id": unit_id.strip(), "status": new_status})
+                st.rerun()
+    render_writeback_status(url)
+
+
+@st.fragment
+@perf.timed("fragment_client_status_editor")
+def render_client_status_editor():
+    """Update one of my clients' status - written back to the clients sheet"""
+    from erp.matching import detect_client_columns
+
+    clients_df = session_get("sales_clients_data")
+    url, sheet_type = st.session_state.get('sales_clients_source', ("", ""))
+    if clients_df is None:
+        return
+    columns = detect_client_columns(clients_df)
+    status_col = next((c for c in clients_df.columns if 'status' in c.lower()), None)
+    label_col = columns["name"] or columns["id"]
+    if status_col is None or label_col is None or clients_df.empty:
+        return
+
+    st.markdown("### ✏️ تحديث حالة عميل")
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        label = st.selectbox("العميل", clients_df.index.tolist(), key="status_client",
+                             format_func=lambda i: str(clients_df.at[i, label_col]))
+    with col2:
+        statuses = sorted(clients_df[status_col].dropna().astype(str).unique())
+        new_status = st.selectbox("الحالة الجديدة", statuses, key="client_status_value")
+    with col3:
+        st.write("")
+        clicked = st.button("💾 تحديث", key="update_client_status", use_container_width=True)
+
+    if clicked and label is not None and new_status is not None:
+        edits = cell_edits(url, sheet_type, clients_df, [label], status_col, [new_status],
+                           columns["id"] or label_col, st.session_state.user['username'])
+        if not edits:
+            st.warning("Clients sheet URL has no sheet ID")
+        else:
+            WRITEBACK.submit(edits)
+            session_put("sales_clients_data", apply_edits(clients_df, edits),
+                        clients_reload(url, sheet_type, st.session_state.user['username']))
+            latest = DATASETS.latest(sheet_type) if sheet_type == "mother_clients" else None
+            frame = latest.frame() if latest is not None else None
+            if frame is not None:
+                # Rows of this slice's own parse - matched to the shared version by client ID
+                rebased = rebase_edits(frame, edits)
+                if rebased:
+                    publish_optimistic(latest, rebased)
+            track_activity("update_client_status", {"client": edits[0].key, "status": new_status})
+            st.rerun()
+    render_writeback_status(url)
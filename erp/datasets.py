@@ -0,0 +1,163 @@
+"""
+PROCESS-WIDE DATASET REGISTRY - VERSIONED, SHARED BY ALL SESSIONS
+A parsed sheet is published once per content version (hash of the export
+bytes); sessions and fragments hold a lightweight DatasetHandle instead of
+their own DataFrame copy. Frames returned here are shared - treat as read-only.
+
+Optimistic edits publish overlays: a shallow copy of a version with a few
+cells set, which shares every untouched column with its base. Overlays do
+not count against MAX_VERSIONS; past MAX_OVERLAYS per sheet type the oldest
+is dropped and its handles resolve to a newer overlay (edits stack, so it
+holds theirs too), and all go when the fetched version under them is evicted.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Parsed versions kept in memory (least recently used evicted first)
+MAX_VERSIONS = 16
+# Optimistic-edit overlays kept per sheet type (handles of dropped ones follow to a newer one)
+MAX_OVERLAYS = 32
+# Dropped overlay → newer overlay redirects remembered
+MAX_REDIRECTS = 1024
+
+@dataclass(frozen=True)
+class DatasetHandle:
+    """Cheap, hashable reference to one parsed sheet version"""
+    sheet_type: str
+    version: str
+    rows: int
+
+    def frame(self) -> Optional[pd.DataFrame]:
+        """The shared DataFrame, or None if this version was evicted"""
+        return REGISTRY.get(self.version)
+
+
+@dataclass(frozen=True)
+class Overlay:
+    """What an optimistic version changed relative to its parent"""
+    parent: str
+    positions: np.ndarray       # row positions edited
+    columns: Tuple[str, ...]    # columns edited
+
+
+def content_version(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()[:16]
+
+
+class DatasetRegistry:
+    """Thread-safe LRU of parsed frames keyed by content version"""
+
+    def __init__(self, max_versions: int = MAX_VERSIONS):
+        self.max_versions = max_versions
+        self._lock = threading.Lock()
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._latest = {}
+        self._listeners: List[Callable[[Optional[str], DatasetHandle], None]] = []
+        # overlay version → (sheet type, fetched base version, what it changed); insertion order = age
+        self._overlays: "OrderedDict[str, Tuple[str, str, Overlay]]" = OrderedDict()
+        self._redirects: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, version: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            if version not in self._frames:
+                # Redirect targets are kept pointing at a live overlay - one hop
+                version = self._redirects.get(version, version)
+            df = self._frames.get(version)
+            if df is not None:
+                self._frames.move_to_end(version)
+            return df
+
+    def overlay(self, version: str) -> Optional[Overlay]:
+        """The edits an optimistic version applied to its parent, None for fetched versions"""
+        with self._lock:
+            entry = self._overlays.get(version)
+            return entry[2] if entry is not None else None
+
+    def add_listener(self, listener: Callable[[Optional[str], DatasetHandle], None]):
+        """listener(previous_version, handle) after a sheet type gets a new version"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def publish(self, sheet_type: str, version: str, df: pd.DataFrame,
+                overlay: Optional[Overlay] = None) -> DatasetHandle:
+        """overlay: df is overlay.parent with a few cells edited (optimistic write-back)"""
+        with self._lock:
+            self._frames[version] = df
+            self._frames.move_to_end(version)
+            previous = self._latest.get(sheet_type)
+            self._latest[sheet_type] = version
+            if overlay is not None:
+                base = self._overlays[overlay.parent][1] if overlay.parent in self._overlays else overlay.parent
+                self._overlays[version] = (sheet_type, base, overlay)
+                self._drop_overlays(sheet_type, version)
+            self._evict()
+            listeners = list(self._listeners) if previous != version else []
+        handle = DatasetHandle(sheet_type, version, len(df))
+        # Outside the lock - listeners may read frames back
+        for listener in listeners:
+            try:
+                listener(previous, handle)
+            except Exception:
+                logger.exception("Dataset listener failed")
+        return handle
+
+    def nbytes(self) -> int:
+        """Deep size of every cached version - held once for all sessions
+
+        An overlay shares its untouched columns with its base, so only the
+        edited ones are counted for it.
+        """
+        with self._lock:
+            frames = [(df, self._overlays.get(v)) for v, df in self._frames.items()]
+        total = 0
+        for df, entry in frames:
+            if entry is not None:
+                df = df[[c for c in entry[2].columns if c in df.columns]]
+            total += int(df.memory_usage(index=entry is None, deep=True).sum())
+        return total
+
+    def _evict(self):
+        """LRU over fetched versions only - overlays go with their base"""
+        fetched = [v for v in self._frames if v not in self._overlays]
+        for version in fetched[:max(0, len(fetched) - self.max_versions)]:
+            del self._frames[version]
+            for overlay in [v for v, (_, base, _) in self._overlays.items() if base == version]:
+                del self._overlays[overlay]
+                self._frames.pop(overlay, None)
+
+    def _drop_overlays(self, sheet_type: str, newest: str):
+        """Keep MAX_OVERLAYS per sheet type; handles of dropped ones follow to `newest`"""
+        mine = [v for v, (kind, _, _) in self._overlays.items() if kind == sheet_type]
+        dropped = set(mine[:max(0, len(mine) - MAX_OVERLAYS)])
+        if not dropped:
+            return
+        for version in dropped:
+            del self._overlays[version]
+            self._frames.pop(version, None)
+            self._redirects[version] = newest
+        for version, target in self._redirects.items():
+            if target in dropped:
+                self._redirects[version] = newest
+        while len(self._redirects) > MAX_REDIRECTS:
+            self._redirects.popitem(last=False)
+
+    def latest(self, sheet_type: str) -> Optional[DatasetHandle]:
+        """Most recently published version of a sheet type, if still cached"""
+        with self._lock:
+            version = self._latest.get(sheet_type)
+            df = self._frames.get(version) if version else None
+        return DatasetHandle(sheet_type, version, len(df)) if df is not None else None
+
+
+REGISTRY = DatasetRegistry()
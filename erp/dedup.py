@@ -0,0 +1,428 @@
+"""
+NEAR-DUPLICATE LISTINGS - MINHASH / LSH WITH BLOCKING
+The same unit often appears several times with slightly different notes,
+address or price. Pipeline, all vectorized over the whole sheet:
+  1. normalize Arabic address + notes (diacritics, alef/ya/ta marbuta, digits)
+  2. character shingles -> rolling hashes -> MinHash signatures
+  3. LSH bands, keyed together with a block of (area, unit_type, area_sqm band)
+  4. rows sharing a band key are candidates; verify on signature
+     agreement, price / sqm tolerance and equal rooms, bathrooms, floor;
+     union-find the verified pairs into clusters
+Cost is O(rows × shingles), never rows². Results are cached per dataset
+version. A refresh keeps the sorted band keys and verified pairs of
+unchanged rows, re-hashes only rows whose address / notes text changed and
+probes only the changed rows' buckets.
+"""
+
+import string
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import DatasetHandle
+
+TEXT_COLUMNS = ["address", "notes"]
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16                       # 16 bands x 4 rows -> candidates from ~0.5 Jaccard
+ROWS_PER_BAND = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.5       # MinHash agreement needed to confirm a pair
+PRICE_TOLERANCE = 0.15           # max relative price difference inside a cluster
+SQM_BAND = 10.0                  # area_sqm block width (two grids, offset by half)
+SQM_TOLERANCE = 0.05             # max relative area_sqm difference inside a cluster
+# The same apartment keeps these even when the text / price is re-typed
+EXACT_COLUMNS = ["rooms", "bathrooms", "floor_number"]
+SHINGLE_CHUNK = 200_000          # shingles per MinHash batch (bounds memory)
+MAX_BUCKET_LINKS = 64            # bucket members a refreshed row is compared with
+# Above this share of changed rows a refresh rebuilds from scratch
+INCREMENTAL_MAX_CHANGED = 0.3
+
+# Indexes kept in memory (one per properties version, ~n x 256 bytes each)
+MAX_CACHED = 3
+
+# One random XOR mask per "permutation" over well-mixed 32-bit shingle hashes
+_PERM_MASKS = np.random.default_rng(20240601).integers(0, 2**32, NUM_PERM, dtype=np.uint64).astype(np.uint32)
+_ROLL = np.uint64(1_000_003)
+_MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5],
+                dtype=np.uint64)
+
+# ============================================
+# ARABIC TEXT NORMALIZATION
+# ============================================
+_DIACRITICS = "[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]"
+_TRANSLATION = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+    **{chr(0x0660 + d): str(d) for d in range(10)},   # Arabic-Indic digits
+    **{chr(0x06F0 + d): str(d) for d in range(10)},   # Persian digits
+    # Punctuation -> space via translate: pyarrow's regex \w is ASCII-only
+    **{ch: " " for ch in string.punctuation + "،؛؟«»…–—٪٫٬"},
+})
+
+
+def normalize_arabic(series: pd.Series) -> pd.Series:
+    """Lower-cased, diacritic-free, unified letter forms, punctuation -> space"""
+    text = series.astype(str).where(series.notna(), "")
+    text = text.str.replace(_DIACRITICS, "", regex=True).str.translate(_TRANSLATION).str.lower()
+    return text.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def listing_text(df: pd.DataFrame) -> pd.Series:
+    """Normalized address + notes, joined before normalizing (one pass)"""
+    parts = [df[col].astype(str).where(df[col].notna(), "") for col in TEXT_COLUMNS if col in df.columns]
+    if not parts:
+        return pd.Series("", index=df.index)
+    text = parts[0]
+    for part in parts[1:]:
+        text = text + " " + part
+    return normalize_arabic(text)
+
+# ============================================
+# SHINGLES + MINHASH - ONE PASS OVER ALL ROWS
+# ============================================
+def shingle_hashes(texts: List[str], k: int = SHINGLE_SIZE):
+    """(row index, 32-bit hash) for every character k-gram of every text"""
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    joined = "".join(texts)
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if codes.size < k:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.uint64)
+
+    # Rolling polynomial hash of every window in the joined string (wraps mod 2^64)
+    windows = codes.size - k + 1
+    rolled = np.zeros(windows, dtype=np.uint64)
+    for j in range(k):
+        rolled = rolled * _ROLL + codes[j:j + windows]
+    # Finalizer so low bits depend on every character (splitmix64 style)
+    rolled ^= rolled >> np.uint64(31)
+    rolled *= _MIX[1]
+    rolled ^= rolled >> np.uint64(29)
+
+    # Keep windows that sit entirely inside one text; short texts hash as one shingle
+    counts = np.maximum(lengths - k + 1, 0)
+    starts = np.cumsum(lengths) - lengths
+    row_ids = np.repeat(np.arange(len(texts)), counts)
+    window_pos = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+    hashes = rolled[window_pos]
+
+    short = np.flatnonzero((lengths > 0) & (lengths < k))
+    if short.size:
+        short_hashes = np.array([zlib.crc32(texts[i].encode("utf-8")) for i in short], dtype=np.uint64)
+        row_ids = np.concatenate([row_ids, short])
+        hashes = np.concatenate([hashes, short_hashes])
+        order = np.argsort(row_ids, kind="stable")
+        row_ids, hashes = row_ids[order], hashes[order]
+    return row_ids, hashes & np.uint64(0xFFFFFFFF)
+
+
+def minhash_signatures(texts: List[str]) -> np.ndarray:
+    """(len(texts), NUM_PERM) uint32; rows without text stay all-max"""
+    signatures = np.full((len(texts), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    row_ids, hashes = shingle_hashes(texts)
+    if row_ids.size == 0:
+        return signatures
+
+    # Batches end on row boundaries so reduceat never splits a row
+    boundaries = np.flatnonzero(np.r_[True, row_ids[1:] != row_ids[:-1]])
+    batch_starts = boundaries[np.searchsorted(boundaries, np.arange(0, row_ids.size, SHINGLE_CHUNK))]
+    batch_starts = np.unique(np.r_[batch_starts, row_ids.size])
+    for lo, hi in zip(batch_starts[:-1], batch_starts[1:]):
+        ids, x = row_ids[lo:hi], hashes[lo:hi].astype(np.uint32)
+        # (perm, shingle) layout keeps each row's shingles contiguous for reduceat
+        permuted = _PERM_MASKS[:, None] ^ x[None, :]
+        seg = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        signatures[ids[seg]] = np.minimum.reduceat(permuted, seg, axis=1).T
+    return signatures
+
+# ============================================
+# BLOCKING + LSH CANDIDATES + UNION-FIND
+# ============================================
+def _codes(df: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    return pd.factorize(df[column].astype(str).str.strip())[0].astype(np.int64)
+
+
+def block_keys(df: pd.DataFrame) -> np.ndarray:
+    """(rows, 2) uint64 block keys - one per shifted area_sqm grid"""
+    sqm = pd.to_numeric(df["area_sqm"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) \
+        if "area_sqm" in df.columns else np.full(len(df), np.nan)
+    base = (_codes(df, "area") * 1_000_003 + _codes(df, "unit_type")).astype(np.uint64) * _MIX[0]
+    keys = np.empty((len(df), 2), dtype=np.uint64)
+    for grid in (0, 1):
+        band = np.where(np.isfinite(sqm), np.floor(sqm / SQM_BAND + 0.5 * grid), -1).astype(np.int64)
+        keys[:, grid] = base ^ (band.astype(np.uint64) * _MIX[1]) ^ np.uint64((grid * int(_MIX[2])) & 0xFFFFFFFFFFFFFFFF)
+    return keys
+
+
+def lsh_keys(signatures: np.ndarray, blocks: np.ndarray, rows: np.ndarray):
+    """(keys, rows) - one key per row x band x sqm grid, unsorted"""
+    sig = signatures[rows].astype(np.uint64)
+    keys = []
+    for band in range(BANDS):
+        chunk = sig[:, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        band_hash = np.zeros(rows.size, dtype=np.uint64)
+        for j in range(ROWS_PER_BAND):
+            band_hash = (band_hash ^ chunk[:, j]) * _MIX[j % len(_MIX)]
+        band_hash ^= np.uint64((band * int(_MIX[3])) & 0xFFFFFFFFFFFFFFFF)
+        for grid in (0, 1):
+            keys.append(band_hash ^ blocks[rows, grid])
+    return np.concatenate(keys), np.tile(rows, BANDS * 2)
+
+
+def _pair_array(a: np.ndarray, b: np.ndarray, n: int) -> np.ndarray:
+    """Unique (min, max) pairs, self-pairs dropped"""
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    pair_keys = np.unique((lo * n + hi)[lo != hi])
+    return np.stack([pair_keys // n, pair_keys % n], axis=1)
+
+
+def chained_pairs(sorted_keys: np.ndarray, sorted_rows: np.ndarray, n: int) -> np.ndarray:
+    """Equal keys are adjacent after sorting: link neighbours within each bucket"""
+    same = sorted_keys[1:] == sorted_keys[:-1]
+    return _pair_array(sorted_rows[:-1][same], sorted_rows[1:][same], n)
+
+
+def probe_pairs(sorted_keys: np.ndarray, sorted_rows: np.ndarray, keys: np.ndarray,
+                rows: np.ndarray, n: int) -> np.ndarray:
+    """Pairs between `rows` and up to MAX_BUCKET_LINKS existing members of each bucket"""
+    lo = np.searchsorted(sorted_keys, keys, side="left")
+    counts = np.minimum(np.searchsorted(sorted_keys, keys, side="right") - lo, MAX_BUCKET_LINKS)
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    at = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+    return _pair_array(np.repeat(rows, counts), sorted_rows[at], n)
+
+
+def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _within(a: np.ndarray, b: np.ndarray, tolerance: float) -> np.ndarray:
+    """Relative closeness; a missing value on either side passes"""
+    known = np.isfinite(a) & np.isfinite(b)
+    return ~known | (np.abs(a - b) <= tolerance * np.maximum(np.maximum(np.abs(a), np.abs(b)), 1.0))
+
+
+def verify_pairs(pairs: np.ndarray, signatures: np.ndarray, df: pd.DataFrame) -> np.ndarray:
+    """Keep pairs with enough MinHash agreement and matching unit attributes"""
+    if pairs.size == 0:
+        return pairs
+    u, v = pairs[:, 0], pairs[:, 1]
+    ok = (signatures[u] == signatures[v]).mean(axis=1) >= SIMILARITY_THRESHOLD
+    price, sqm = _numeric(df, "price_total"), _numeric(df, "area_sqm")
+    ok &= _within(price[u], price[v], PRICE_TOLERANCE) & _within(sqm[u], sqm[v], SQM_TOLERANCE)
+    for column in EXACT_COLUMNS:
+        values = _numeric(df, column)
+        ok &= _within(values[u], values[v], 0.0)
+    return pairs[ok]
+
+
+class UnionFind:
+    """Disjoint sets with path halving + union by size"""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+
+
+def cluster_labels(n: int, pairs: np.ndarray) -> np.ndarray:
+    """Cluster id per row (-1 = no duplicate), ids dense from 0"""
+    labels = np.full(n, -1, dtype=np.int64)
+    if pairs.size == 0:
+        return labels
+    involved = np.unique(pairs)
+    local = {int(row): i for i, row in enumerate(involved)}
+    uf = UnionFind(involved.size)
+    for a, b in pairs.tolist():
+        uf.union(local[a], local[b])
+    roots = np.fromiter((uf.find(i) for i in range(involved.size)), dtype=np.int64, count=involved.size)
+    labels[involved] = np.unique(roots, return_inverse=True)[1]
+    return labels
+
+# ============================================
+# PER-VERSION INDEX - CACHED, INCREMENTAL ON REFRESH
+# ============================================
+@dataclass
+class DedupIndex:
+    version: str
+    ids: pd.Index               # unit IDs (row order of this version)
+    row_hash: np.ndarray        # whole-row hash - rows equal here keep keys + pairs
+    text_hash: np.ndarray       # address+notes hash - rows equal here keep signatures
+    signatures: np.ndarray
+    pairs: np.ndarray           # verified duplicate pairs (row positions)
+    labels: np.ndarray
+    stats: Dict
+    # Sorted LSH keys + their rows; only the newest cached index keeps them
+    bucket_keys: Optional[np.ndarray] = None
+    bucket_rows: Optional[np.ndarray] = None
+
+    def clusters(self, df: pd.DataFrame) -> pd.DataFrame:
+        """One row per cluster: size, unit IDs, area, type, price range"""
+        rows = np.flatnonzero(self.labels >= 0)
+        if rows.size == 0:
+            return pd.DataFrame(columns=["cluster", "size", "unit_ids", "area", "unit_type", "price_min", "price_max"])
+        members = df.iloc[rows].assign(cluster=self.labels[rows], unit_key=self.ids[rows])
+        agg = {"size": ("unit_key", "size"), "unit_ids": ("unit_key", lambda s: ", ".join(s.astype(str)))}
+        for col in ("area", "unit_type"):
+            if col in members.columns:
+                agg[col] = (col, "first")
+        if "price_total" in members.columns:
+            agg["price_min"] = ("price_total", "min")
+            agg["price_max"] = ("price_total", "max")
+        return members.groupby("cluster").agg(**agg).reset_index().sort_values("size", ascending=False)
+
+
+def _unit_ids(df: pd.DataFrame) -> pd.Index:
+    id_col = next((c for c in df.columns if 'unit_id' in c.lower()), None) \
+        or next((c for c in df.columns if 'id' in c.lower()), None)
+    if id_col is None:
+        return pd.Index(np.arange(len(df)).astype(str))
+    return pd.Index(df[id_col].astype(str).str.strip().to_numpy())
+
+
+def _text_hash(df: pd.DataFrame) -> np.ndarray:
+    cols = [c for c in TEXT_COLUMNS if c in df.columns]
+    if not cols:
+        return np.zeros(len(df), dtype=np.uint64)
+    return pd.util.hash_pandas_object(df[cols].astype(str), index=False).to_numpy()
+
+
+def _signatures(df: pd.DataFrame, rows: np.ndarray) -> np.ndarray:
+    with perf.timed("dedup_minhash"):
+        signatures = minhash_signatures(listing_text(df.iloc[rows]).tolist())
+    perf.record_rows("dedup_minhash", int(rows.size))
+    return signatures
+
+
+def _has_text(signatures: np.ndarray) -> np.ndarray:
+    return (signatures != np.iinfo(np.uint32).max).any(axis=1)
+
+
+@perf.timed("dedup_build")
+def build_index(version: str, df: pd.DataFrame, previous: Optional[DedupIndex] = None) -> DedupIndex:
+    """Dedup index for df - incremental against `previous` when few rows changed"""
+    start = time.perf_counter()
+    ids = _unit_ids(df)
+    row_hash = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    text_hash = _text_hash(df)
+    n = len(df)
+
+    at_old = None
+    if previous is not None and previous.bucket_keys is not None and previous.ids.is_unique and ids.is_unique:
+        at_old = previous.ids.get_indexer(ids)
+        stable = (at_old >= 0) & (previous.row_hash[np.maximum(at_old, 0)] == row_hash)
+        if (~stable).sum() > INCREMENTAL_MAX_CHANGED * n:
+            at_old = None
+
+    blocks = block_keys(df)
+    if at_old is None:
+        # FULL BUILD
+        signatures = _signatures(df, np.arange(n))
+        with perf.timed("dedup_candidates"):
+            keys, rows = lsh_keys(signatures, blocks, np.flatnonzero(_has_text(signatures)))
+            order = np.argsort(keys)
+            bucket_keys, bucket_rows = keys[order], rows[order]
+            candidates = chained_pairs(bucket_keys, bucket_rows, n)
+            pairs = verify_pairs(candidates, signatures, df)
+        rows_hashed = n
+    else:
+        # INCREMENTAL: stable rows keep signatures, bucket keys and verified pairs
+        signatures = np.empty((n, NUM_PERM), dtype=np.uint32)
+        same_text = (at_old >= 0) & (previous.text_hash[np.maximum(at_old, 0)] == text_hash)
+        signatures[same_text] = previous.signatures[at_old[same_text]]
+        rows_to_hash = np.flatnonzero(~same_text)
+        if rows_to_hash.size:
+            signatures[rows_to_hash] = _signatures(df, rows_to_hash)
+        rows_hashed = int(rows_to_hash.size)
+
+        with perf.timed("dedup_candidates"):
+            old_to_new = np.full(len(previous.ids), -1, dtype=np.int64)
+            old_to_new[at_old[stable]] = np.flatnonzero(stable)
+            kept = old_to_new[previous.bucket_rows]
+            base_keys, base_rows = previous.bucket_keys[kept >= 0], kept[kept >= 0]
+
+            changed = np.flatnonzero(~stable & _has_text(signatures))
+            new_keys, new_rows = lsh_keys(signatures, blocks, changed)
+            order = np.argsort(new_keys)
+            new_keys, new_rows = new_keys[order], new_rows[order]
+            candidates = np.concatenate([
+                chained_pairs(new_keys, new_rows, n),
+                probe_pairs(base_keys, base_rows, new_keys, new_rows, n),
+            ])
+            carried = old_to_new[previous.pairs] if previous.pairs.size else previous.pairs
+            carried = carried[(carried >= 0).all(axis=1)] if carried.size else carried.reshape(0, 2)
+            pairs = np.concatenate([carried, verify_pairs(candidates, signatures, df)])
+
+            insert_at = np.searchsorted(base_keys, new_keys)
+            bucket_keys = np.insert(base_keys, insert_at, new_keys)
+            bucket_rows = np.insert(base_rows, insert_at, new_rows)
+
+    labels = cluster_labels(n, pairs)
+    clustered = labels >= 0
+    n_clusters = int(labels.max()) + 1 if clustered.any() else 0
+    stats = {
+        "mode": "full" if at_old is None else "incremental",
+        "rows": n, "rows_hashed": rows_hashed, "rows_reused": n - rows_hashed,
+        "candidate_pairs": int(len(candidates)), "verified_pairs": int(len(pairs)),
+        "clusters": n_clusters, "duplicate_rows": int(clustered.sum() - n_clusters),
+        "seconds": time.perf_counter() - start,
+    }
+    return DedupIndex(version, ids, row_hash, text_hash, signatures, pairs, labels, stats,
+                      bucket_keys, bucket_rows)
+
+
+_lock = threading.Lock()
+_indexes: "OrderedDict[str, DedupIndex]" = OrderedDict()
+
+
+def get_dedup(handle: DatasetHandle) -> Optional[DedupIndex]:
+    """Cached index for this version; a miss builds on the newest built one"""
+    with _lock:
+        index = _indexes.get(handle.version)
+        if index is not None:
+            _indexes.move_to_end(handle.version)
+        previous = None if index is not None else next(
+            (i for i in reversed(_indexes.values()) if i.bucket_keys is not None), None)
+    perf.record_cache("dedup_index", index is not None)
+    if index is not None:
+        return index
+
+    df = handle.frame()
+    if df is None:
+        return None
+    index = build_index(handle.version, df, previous)
+    with _lock:
+        # Sorted bucket keys are only needed on the newest index (~12 bytes x rows x 32)
+        for older in _indexes.values():
+            older.bucket_keys = older.bucket_rows = None
+        _indexes[handle.version] = index
+        while len(_indexes) > MAX_CACHED:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,30 @@
+"""
+EXCEL EXPORT - TIMED PER EXPORT
+"""
+
+from io import BytesIO
+from typing import Callable, Union
+
+import pandas as pd
+
+from erp import perf
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def to_excel_bytes(df: pd.DataFrame, export_name: str) -> bytes:
+    """Serialize a DataFrame to xlsx bytes for st.download_button"""
+    with perf.timed(f"export_{export_name}"):
+        buffer = BytesIO()
+        df.to_excel(buffer, index=False, engine='openpyxl')
+    perf.record_rows(f"export_{export_name}", len(df))
+    return buffer.getvalue()
+
+def excel_download_data(df: Union[pd.DataFrame, Callable[[], pd.DataFrame]], export_name: str) -> Callable[[], bytes]:
+    """Deferred xlsx for st.download_button - built only when clicked, not on every rerun
+
+    df may be a callable, e.g. projection.full_rows, so full rows are fetched on click too.
+    """
+    def build() -> bytes:
+        data = df() if callable(df) else df
+        return to_excel_bytes(data if data is not None else pd.DataFrame(), export_name)
+    return build
@@ -0,0 +1,232 @@
+"""
+ORIGINAL FILTER ENGINE + KEYWORD SEARCH
+"""
+
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from erp import perf
+from erp.xlsx_reader import SHEET_COLUMNS_ATTR
+
+# ============================================
+# FILTER SIGNATURE - CANONICAL, HASHABLE, JSON-SAFE
+# ============================================
+@dataclass(frozen=True)
+class FilterSignature:
+    """Everything that decides a filter result, in canonical form
+
+    ranges:     (column, low, high) - None for an open end, i.e. the widget
+                still sits on the dataset min / max
+    selections: (column, sorted values) - None when every option is picked
+                ("الكل"), so the same search matches across dataset versions
+    keyword:    stripped, lower-cased keyword query ("" for none)
+
+    An open range / "الكل" still drops empty cells, as the widgets always did.
+    """
+    ranges: Tuple[Tuple[str, Optional[float], Optional[float]], ...] = ()
+    selections: Tuple[Tuple[str, Optional[Tuple[str, ...]]], ...] = ()
+    keyword: str = ""
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Every column the signature reads - a frame must carry all of them to be filtered"""
+        names = [col for col, _, _ in self.ranges] + [col for col, _ in self.selections]
+        if self.keyword:
+            names += KEYWORD_COLUMNS
+        return tuple(dict.fromkeys(names))
+
+    def with_keyword(self, query: Optional[str]) -> "FilterSignature":
+        return replace(self, keyword=(query or "").strip().lower())
+
+    def to_dict(self) -> Dict:
+        return {
+            "ranges": [list(r) for r in self.ranges],
+            "selections": [[col, list(values) if values is not None else None] for col, values in self.selections],
+            "keyword": self.keyword,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FilterSignature":
+        return cls(
+            ranges=tuple((col, lo, hi) for col, lo, hi in data.get("ranges", [])),
+            selections=tuple((col, tuple(values) if values is not None else None)
+                             for col, values in data.get("selections", [])),
+            keyword=data.get("keyword", ""),
+        )
+
+    def describe(self) -> str:
+        """Short summary of the non-default parts, for lists and notifications"""
+        parts = []
+        for col, lo, hi in self.ranges:
+            if lo is not None or hi is not None:
+                parts.append(f"{col}: {lo if lo is not None else '…'} - {hi if hi is not None else '…'}")
+        for col, values in self.selections:
+            if values is not None:
+                parts.append(f"{col}: {', '.join(values) if values else '—'}")
+        if self.keyword:
+            parts.append(f"🔍 {self.keyword}")
+        return " | ".join(parts) or "الكل"
+
+
+def _range(df, column, low, high) -> Tuple[str, Optional[float], Optional[float]]:
+    """Canonical range: widget values at the dataset bounds become open ends"""
+    low = None if low <= df[column].min() else float(low)
+    high = None if high >= df[column].max() else float(high)
+    return (column, low, high)
+
+
+def _selection(column, options, selected) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    chosen = tuple(sorted(set(str(v) for v in selected)))
+    return (column, None if set(chosen) == set(options) else chosen)
+
+
+def _filter_column(df: pd.DataFrame, column: str) -> Optional[pd.Series]:
+    """df[column]; None when the sheet has no such column (every cell empty)
+
+    A column the sheet has but df was projected without raises KeyError -
+    filtering on it silently would match every row.
+    """
+    if column in df.columns:
+        return df[column]
+    if column in (df.attrs.get(SHEET_COLUMNS_ATTR) or ()):
+        raise KeyError(f"Filter column {column!r} is not loaded in this frame (see erp.projection.with_columns)")
+    return None
+
+
+@perf.timed("apply_filters")
+def apply_filters(df: pd.DataFrame, signature: FilterSignature) -> np.ndarray:
+    """Row positions of df matching the signature (same semantics as the widgets)
+
+    df must carry every column in signature.columns the sheet has. A column
+    the sheet lacks counts as empty, so a range / selection on it matches nothing.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for column, low, high in signature.ranges:
+        values = _filter_column(df, column)
+        if values is None:
+            mask[:] = False
+            continue
+        mask &= values.notna().to_numpy()
+        if low is not None:
+            mask &= (values >= low).to_numpy(dtype=bool, na_value=False)
+        if high is not None:
+            mask &= (values <= high).to_numpy(dtype=bool, na_value=False)
+    for column, chosen in signature.selections:
+        values = _filter_column(df, column)
+        if values is None:
+            mask[:] = False
+        elif chosen is None:
+            mask &= values.notna().to_numpy()
+        else:
+            mask &= values.astype(str).isin(chosen).to_numpy(dtype=bool, na_value=False)
+    if signature.keyword:
+        mask &= keyword_mask(df, signature.keyword)
+    perf.record_rows("apply_filters", len(df))
+    return np.flatnonzero(mask)
+
+# ============================================
+# ORIGINAL FILTER ENGINE - SAME WIDGETS, NOW RETURNS A SIGNATURE
+# ============================================
+@perf.timed("render_filter_widgets")
+def render_filter_widgets(df, container=None) -> FilterSignature:
+    """ORIGINAL FILTER WIDGETS - DO NOT MODIFY THE UI
+
+    container: where the widgets go (default st.sidebar). Fragments cannot
+    write to the sidebar, so the search fragment passes its own column.
+    Returns the canonical signature instead of filtering, so results can
+    be served from the shared cache (erp.searches).
+    """
+    container = container if container is not None else st.sidebar
+    ranges: List = []
+    selections: List = []
+
+    # --- 1. فلاتر الأرقام (Manual Input بدلاً من Slider) ---
+    container.subheader("💰 الميزانية والمساحة")
+
+    # فلتر السعر
+    if "price_total" in df.columns:
+        min_p = float(df["price_total"].min())
+        max_p = float(df["price_total"].max())
+        container.write("**السعر الإجمالي**")
+        col_p1, col_p2 = container.columns(2)
+        p_from = col_p1.number_input("من", value=min_p, step=50000.0, key="p_from")
+        p_to = col_p2.number_input("إلى", value=max_p, step=50000.0, key="p_to")
+        ranges.append(_range(df, "price_total", p_from, p_to))
+
+    # فلتر المساحة
+    if "area_sqm" in df.columns:
+        min_a = float(df["area_sqm"].min())
+        max_a = float(df["area_sqm"].max())
+        container.write("**المساحة (م²)**")
+        col_a1, col_a2 = container.columns(2)
+        a_from = col_a1.number_input("من", value=min_a, step=5.0, key="a_from")
+        a_to = col_a2.number_input("إلى", value=max_a, step=5.0, key="a_to")
+        ranges.append(_range(df, "area_sqm", a_from, a_to))
+
+    # فلتر الأدوار
+    if "floor_number" in df.columns:
+        container.write("**رقم الدور**")
+        col_f1, col_f2 = container.columns(2)
+        f_from = col_f1.number_input("من دور", value=int(df["floor_number"].min()), step=1, key="f_from")
+        f_to = col_f2.number_input("إلى دور", value=int(df["floor_number"].max()), step=1, key="f_to")
+        ranges.append(_range(df, "floor_number", f_from, f_to))
+
+    container.divider()
+
+    # --- 2. فلاتر الاختيار المتعدد (مع Select All) ---
+    def sales_multiselect(column, label):
+        if column in df.columns:
+            options = sorted([str(x) for x in df[column].dropna().unique().tolist()])
+            if options:
+                container.write(f"**{label}**")
+                select_all = container.checkbox(f"الكل ({label})", value=True, key=f"all_{column}")
+                default_vals = options if select_all else []
+                selected = container.multiselect(label, options, default=default_vals, key=f"ms_{column}", label_visibility="collapsed")
+                selections.append(_selection(column, options, selected))
+
+    sales_multiselect("area", "المنطقة")
+    sales_multiselect("unit_type", "نوع الوحدة")
+    sales_multiselect("listing_type", "نوع العرض")
+    sales_multiselect("rooms", "الغرف")
+    sales_multiselect("bathrooms", "الحمامات")
+    sales_multiselect("unit_status", "الحالة")
+
+    # 3. المرافق
+    with container.expander("➕ مرافق إضافية"):
+        for util in ["electricity", "water", "gas", "elevator", "garage"]:
+            sales_multiselect(util, util.capitalize())
+
+    return FilterSignature(ranges=tuple(ranges), selections=tuple(selections))
+
+
+@perf.timed("render_original_filters")
+def render_original_filters(df, container=None):
+    """ORIGINAL FILTER ENGINE - widgets + filtered DataFrame, uncached"""
+    perf.record_rows("render_original_filters", len(df))
+    signature = render_filter_widgets(df, container)
+    return df.iloc[apply_filters(df, signature)]
+
+# ============================================
+# KEYWORD SEARCH - NOTES + ADDRESS
+# ============================================
+KEYWORD_COLUMNS = ["notes", "address"]
+
+def keyword_mask(df: pd.DataFrame, search_query: str) -> np.ndarray:
+    """Boolean mask: notes or address contain the query (case-insensitive)"""
+    mask = np.zeros(len(df), dtype=bool)
+    for col in KEYWORD_COLUMNS:
+        values = _filter_column(df, col)
+        if values is not None:
+            mask |= values.astype(str).str.contains(search_query, case=False, na=False).to_numpy(dtype=bool)
+    return mask
+
+
+@perf.timed("keyword_search")
+def keyword_search(df: pd.DataFrame, search_query: str) -> pd.DataFrame:
+    """Rows whose notes or address contain the query (case-insensitive)"""
+    perf.record_rows("keyword_search", len(df))
+    return df[keyword_mask(df, search_query)]
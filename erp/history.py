@@ -0,0 +1,610 @@
+"""
+INVENTORY HISTORY - PARQUET APPEND LOG OF SHEET SNAPSHOTS
+Every new properties / transactions version is diffed against the last
+recorded state by ID and appended as one Parquet segment holding only the
+changed cells: an unchanged cell is a null (a bit in Parquet's definition
+levels) and a per-row bitmask tells a real blank from "unchanged". Every
+CHECKPOINT_EVERY segments - or when most rows changed, or the columns did -
+a full checkpoint is written instead, so rebuilding the sheet at any past
+moment reads one checkpoint plus at most CHECKPOINT_EVERY deltas.
+
+Price and status changes also go to a per-unit event index, and per-area
+price medians to the manifest, so a unit's price history or an area's trend
+is answered without replaying snapshots. Recording runs on one background
+thread fed by the DatasetRegistry publish listener that main.py installs.
+Files live under ERP_HISTORY_DIR (default "history"; empty disables it).
+"""
+
+import fcntl
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import REGISTRY as DATASETS, DatasetHandle, DatasetRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_DIR = "history"
+# Deltas between two full checkpoints
+CHECKPOINT_EVERY = 24
+# A delta touching more than this share of rows is written as a checkpoint
+CHECKPOINT_CHANGED_SHARE = 0.5
+COMPRESSION = "zstd"
+# Rebuilt past snapshots kept for re-renders (a full inventory each)
+MAX_CACHED_SNAPSHOTS = 2
+
+# Sheets recorded, and their (price, status, area) columns for the event index / trends
+HISTORY_SHEETS: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]] = {
+    "properties": ("price_total", "unit_status", "area"),
+    "transactions": (None, None, None),
+}
+SOLD_STATUSES = {"مباع", "sold", "تم البيع"}
+
+ID_FIELD = "_id"
+OP_FIELD = "_op"
+MASK_PREFIX = "_mask"
+MASK_BITS = 63
+OP_CHANGED, OP_ADDED, OP_REMOVED = 0, 1, 2
+
+MANIFEST_NAME = "manifest.json"
+INDEX_NAME = "index.parquet"
+LOCK_NAME = ".lock"
+
+
+def detect_key_column(sheet_type: str, df: pd.DataFrame) -> Optional[str]:
+    """transaction_id for transactions, else the unit ID detection the dashboards use"""
+    from erp.change_feed import detect_id_column
+
+    if sheet_type == "transactions":
+        found = next((c for c in df.columns if 'transaction' in c.lower() and 'id' in c.lower()), None)
+        if found:
+            return found
+    return detect_id_column(df)
+
+# ============================================
+# STATE - LAST RECORDED SNAPSHOT, INDEXED BY ID
+# ============================================
+class SheetState:
+    """One snapshot keyed by stripped ID (last row wins) + one hash per row"""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+    @classmethod
+    def of(cls, df: pd.DataFrame, id_col: str) -> "SheetState":
+        ids = df[id_col].astype(str).str.strip()
+        keep = ~ids.duplicated(keep="last").to_numpy()
+        frame = df[keep].set_axis(pd.Index(ids.to_numpy()[keep], name=ID_FIELD))
+        return cls(frame)
+
+
+def _mask_columns(n_columns: int) -> List[str]:
+    return [f"{MASK_PREFIX}{k}" for k in range((n_columns + MASK_BITS - 1) // MASK_BITS)]
+
+
+def _cell_hashes(series: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+# ============================================
+# HISTORY STORE
+# ============================================
+class HistoryStore:
+    """Segments + manifest + event index per sheet type, under one directory"""
+
+    def __init__(self, root: str, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.root = root
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.RLock()
+        self._states: Dict[str, SheetState] = {}
+        self._events: Dict[str, pd.DataFrame] = {}
+        # Manifest seq the cached state / events reflect - another worker
+        # recording into the same directory moves it on and voids them
+        self._cached_seq: Dict[str, int] = {}
+        # (sheet type, seq, taken at) → rebuilt sheet - segments never change once written
+        self._snapshots: "OrderedDict[Tuple[str, int, str], pd.DataFrame]" = OrderedDict()
+
+    def _dir(self, sheet_type: str) -> str:
+        path = os.path.join(self.root, sheet_type)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    # --- manifest ---
+    @contextmanager
+    def _locked(self, sheet_type: str):
+        """Host-wide lock on a sheet type - every worker records into the same directory"""
+        with open(os.path.join(self._dir(sheet_type), LOCK_NAME), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync(self, sheet_type: str, manifest: Dict):
+        """Drop cached state / events written against an older manifest"""
+        if self._cached_seq.get(sheet_type) != manifest["seq"]:
+            self._states.pop(sheet_type, None)
+            self._events.pop(sheet_type, None)
+            self._cached_seq[sheet_type] = manifest["seq"]
+
+    def manifest(self, sheet_type: str) -> Dict:
+        try:
+            with open(os.path.join(self._dir(sheet_type), MANIFEST_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"seq": 0, "columns": [], "id_column": None, "segments": [], "trend": [], "index_parts": []}
+
+    def _save_manifest(self, sheet_type: str, manifest: Dict):
+        fd, tmp = tempfile.mkstemp(dir=self._dir(sheet_type), prefix=".manifest.")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self._dir(sheet_type), MANIFEST_NAME))
+
+    def segments(self, sheet_type: str) -> List[Dict]:
+        return self.manifest(sheet_type)["segments"]
+
+    # --- parquet ---
+    def _write(self, sheet_type: str, name: str, table) -> int:
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self._dir(sheet_type), name)
+        fd, tmp = tempfile.mkstemp(dir=self._dir(sheet_type), prefix=f".{name}.")
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp, compression=COMPRESSION)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return os.path.getsize(path)
+
+    def _read(self, sheet_type: str, name: str):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(os.path.join(self._dir(sheet_type), name))
+
+    # --- recording ---
+    @perf.timed("history_record")
+    def record(self, sheet_type: str, version: str, df: pd.DataFrame,
+               taken_at: Optional[datetime] = None) -> Optional[Dict]:
+        """Append one snapshot; returns its manifest entry (None if unchanged / no ID column)"""
+        id_col = detect_key_column(sheet_type, df)
+        if id_col is None or df.empty:
+            return None
+        taken_at = (taken_at or datetime.now()).isoformat(timespec="seconds")
+        new = SheetState.of(df, id_col)
+
+        with self._lock, self._locked(sheet_type):
+            manifest = self.manifest(sheet_type)
+            if any(s["version"] == version for s in manifest["segments"][-self.checkpoint_every:]):
+                return None
+            self._sync(sheet_type, manifest)
+            old = self._state(sheet_type, manifest)
+            columns = list(new.frame.columns)
+            seq = manifest["seq"] + 1
+            since_checkpoint = next((i for i, s in enumerate(reversed(manifest["segments"]))
+                                     if s["kind"] == "checkpoint"), None)
+
+            if old is None or list(old.frame.columns) != columns:
+                table, kind = self._checkpoint_table(new), "checkpoint"
+                counts = {"added": len(new.frame), "changed": 0, "removed": 0}
+            else:
+                table, counts = self._delta(old, new)
+                touched = counts["added"] + counts["changed"] + counts["removed"]
+                if touched == 0:
+                    return None
+                if since_checkpoint is None or since_checkpoint + 1 >= self.checkpoint_every \
+                        or touched > CHECKPOINT_CHANGED_SHARE * len(new.frame):
+                    table, kind = self._checkpoint_table(new), "checkpoint"
+                else:
+                    kind = "delta"
+            events = self._events_for(sheet_type, old, new, seq, taken_at)
+
+            name = f"{kind}-{seq:08d}.parquet"
+            size = self._write(sheet_type, name, table)
+            entry = {"seq": seq, "kind": kind, "version": version, "taken_at": taken_at, "file": name,
+                     "rows": len(new.frame), "bytes": size, **counts}
+            manifest["seq"] = seq
+            manifest["columns"] = columns
+            manifest["id_column"] = id_col
+            manifest["segments"].append(entry)
+            manifest["trend"].extend(self._trend_rows(sheet_type, new.frame, seq, taken_at))
+            self._append_events(sheet_type, manifest, events, seq, compact=kind == "checkpoint")
+            self._save_manifest(sheet_type, manifest)
+            self._states[sheet_type] = new
+            self._cached_seq[sheet_type] = seq
+        perf.record_rows("history_record", len(new.frame))
+        perf.record_bytes(f"history_{sheet_type}", size)
+        return entry
+
+    def _state(self, sheet_type: str, manifest: Dict) -> Optional[SheetState]:
+        state = self._states.get(sheet_type)
+        if state is None and manifest["segments"]:
+            # First record since the process started - rebuild from disk
+            frame = self._reconstruct(sheet_type, manifest, manifest["segments"][-1]["seq"])
+            state = SheetState(frame) if frame is not None else None
+        return state
+
+    @staticmethod
+    def _checkpoint_table(state: SheetState):
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(state.frame, preserve_index=True)
+
+    def _delta(self, old: SheetState, new: SheetState):
+        """Changed cells only: one row per touched ID, nulls for unchanged cells"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        at_old = old.frame.index.get_indexer(new.frame.index)
+        is_added = at_old < 0
+        is_changed = ~is_added & (old.hashes[np.maximum(at_old, 0)] != new.hashes)
+        removed_ids = old.frame.index[~old.frame.index.isin(new.frame.index)]
+
+        changed_pos = np.flatnonzero(is_changed)
+        added_pos = np.flatnonzero(is_added)
+        rows = np.concatenate([changed_pos, added_pos])
+        columns = list(new.frame.columns)
+        changed_cols = np.zeros((changed_pos.size, len(columns)), dtype=bool)
+        for j, col in enumerate(columns):
+            if changed_pos.size:
+                changed_cols[:, j] = _cell_hashes(new.frame[col].iloc[changed_pos]) != \
+                    _cell_hashes(old.frame[col].iloc[at_old[changed_pos]])
+        bits = np.vstack([changed_cols, np.ones((added_pos.size, len(columns)), dtype=bool)])
+        bits = np.vstack([bits, np.zeros((removed_ids.size, len(columns)), dtype=bool)])
+
+        arrays = {
+            ID_FIELD: pa.array(np.concatenate([new.frame.index.to_numpy()[rows].astype(object),
+                                               removed_ids.to_numpy().astype(object)]), type=pa.string()),
+            OP_FIELD: pa.array(np.concatenate([np.full(changed_pos.size, OP_CHANGED), np.full(added_pos.size, OP_ADDED),
+                                               np.full(removed_ids.size, OP_REMOVED)]).astype(np.int8)),
+        }
+        for k, name in enumerate(_mask_columns(len(columns))):
+            block = bits[:, k * MASK_BITS:(k + 1) * MASK_BITS]
+            arrays[name] = pa.array((block * (1 << np.arange(block.shape[1], dtype=np.int64))).sum(axis=1)
+                                    .astype(np.int64))
+        for j, col in enumerate(columns):
+            values = pa.Array.from_pandas(new.frame[col].iloc[rows].reset_index(drop=True))
+            if not bits[:rows.size, j].all():
+                values = pc.if_else(pa.array(bits[:rows.size, j]), values, pa.scalar(None, values.type))
+            arrays[col] = pa.concat_arrays([values, pa.nulls(removed_ids.size, values.type)]) \
+                if removed_ids.size else values
+        counts = {"added": int(added_pos.size), "changed": int(changed_pos.size), "removed": int(removed_ids.size)}
+        return pa.table(arrays), counts
+
+    # --- event index ---
+    def _events_for(self, sheet_type: str, old: Optional[SheetState], new: SheetState,
+                    seq: int, taken_at: str) -> Optional[pd.DataFrame]:
+        """listed / price / status / removed events of this snapshot for the unit index
+
+        Price is compared as a number and status as text, so a dtype change
+        between parses is not mistaken for a price move.
+        """
+        price_col, status_col, _ = HISTORY_SHEETS.get(sheet_type, (None, None, None))
+        if price_col is None and status_col is None:
+            return None
+        frame = new.frame
+
+        def price(df, positions):
+            if price_col not in df.columns:
+                return np.full(len(positions), np.nan)
+            return pd.to_numeric(df[price_col].iloc[positions], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+        def status(df, positions):
+            if status_col not in df.columns:
+                return np.full(len(positions), None, dtype=object)
+            values = df[status_col].iloc[positions]
+            return values.astype(str).str.strip().where(values.notna(), None).to_numpy(dtype=object)
+
+        parts = []
+        if old is None:
+            parts.append(("listed", np.arange(len(frame))))
+        else:
+            at_old = frame.index.get_indexer(old.frame.index)
+            at_new = old.frame.index.get_indexer(frame.index)
+            parts.append(("listed", np.flatnonzero(at_new < 0)))
+            common = np.flatnonzero(at_new >= 0)
+            new_price, old_price = price(frame, common), price(old.frame, at_new[common])
+            moved = ~((new_price == old_price) | (np.isnan(new_price) & np.isnan(old_price)))
+            parts.append(("price", common[moved]))
+            parts.append(("status", common[status(frame, common) != status(old.frame, at_new[common])]))
+            parts.append(("removed", np.flatnonzero(at_old < 0)))
+
+        tables = []
+        for event, positions in parts:
+            if not len(positions):
+                continue
+            source = old.frame if event == "removed" else frame
+            tables.append(pd.DataFrame({
+                "id": source.index.to_numpy()[positions].astype(str),
+                "event": event,
+                "price": np.full(len(positions), np.nan) if event == "removed" else price(source, positions),
+                "status": np.full(len(positions), None, dtype=object) if event == "removed" else status(source, positions),
+            }))
+        if not tables:
+            return None
+        events = pd.concat(tables, ignore_index=True)
+        events["status"] = events["status"].astype("str")
+        events["seq"] = np.int64(seq)
+        events["taken_at"] = pd.Timestamp(taken_at)
+        return events
+
+    def _append_events(self, sheet_type: str, manifest: Dict, events: Optional[pd.DataFrame], seq: int, compact: bool):
+        import pyarrow as pa
+
+        if events is not None and len(events):
+            name = f"index-{seq:08d}.parquet"
+            self._write(sheet_type, name, pa.Table.from_pandas(events, preserve_index=False))
+            manifest["index_parts"].append(name)
+            loaded = self._events.get(sheet_type)
+            if loaded is not None:
+                self._events[sheet_type] = _sorted_events(pd.concat([loaded, events], ignore_index=True))
+        if compact and len(manifest["index_parts"]) > 1:
+            # Fold the parts into one file so a cold index load reads two files at most
+            merged = self._load_events(sheet_type, manifest)
+            self._write(sheet_type, INDEX_NAME, pa.Table.from_pandas(merged, preserve_index=False))
+            for name in manifest["index_parts"]:
+                try:
+                    os.unlink(os.path.join(self._dir(sheet_type), name))
+                except FileNotFoundError:
+                    pass
+            manifest["index_parts"] = []
+            manifest["index_compacted"] = True
+
+    def _load_events(self, sheet_type: str, manifest: Dict) -> pd.DataFrame:
+        names = ([INDEX_NAME] if manifest.get("index_compacted") else []) + manifest["index_parts"]
+        frames = [self._read(sheet_type, name).to_pandas() for name in names]
+        if not frames:
+            return pd.DataFrame(columns=["id", "event", "price", "status", "seq", "taken_at"])
+        return _sorted_events(pd.concat(frames, ignore_index=True))
+
+    def events(self, sheet_type: str = "properties") -> pd.DataFrame:
+        """Every indexed event, sorted by (id, seq) - reloaded only when the manifest moved on"""
+        with self._lock, self._locked(sheet_type):
+            manifest = self.manifest(sheet_type)
+            self._sync(sheet_type, manifest)
+            loaded = self._events.get(sheet_type)
+            if loaded is None:
+                with perf.timed("history_index_load"):
+                    loaded = self._load_events(sheet_type, manifest)
+                self._events[sheet_type] = loaded
+            return loaded
+
+    @perf.timed("history_unit_query")
+    def unit_history(self, unit_id: str, sheet_type: str = "properties") -> pd.DataFrame:
+        """Listing, price, status and removal events of one unit, oldest first"""
+        events = self.events(sheet_type)
+        ids = events["id"].to_numpy()
+        key = str(unit_id).strip()
+        lo, hi = np.searchsorted(ids, key, side="left"), np.searchsorted(ids, key, side="right")
+        out = events.iloc[lo:hi].reset_index(drop=True)
+        if not out.empty:
+            price = out["price"].ffill()
+            out["price_change_pct"] = (price.pct_change() * 100).round(2)
+        return out
+
+    def days_on_market(self, unit_id: str, sheet_type: str = "properties") -> Optional[float]:
+        """First listing until sold / removed (or now when still listed)"""
+        events = self.unit_history(unit_id, sheet_type)
+        if events.empty:
+            return None
+        start = events.loc[events["event"] == "listed", "taken_at"].min()
+        done = events[(events["event"] == "removed") | events["status"].isin(SOLD_STATUSES)]
+        end = done["taken_at"].min() if not done.empty else pd.Timestamp(datetime.now())
+        return float((end - start) / pd.Timedelta(days=1)) if pd.notna(start) else None
+
+    # --- trends ---
+    @staticmethod
+    def _trend_rows(sheet_type: str, frame: pd.DataFrame, seq: int, taken_at: str) -> List[Dict]:
+        price_col, _, area_col = HISTORY_SHEETS.get(sheet_type, (None, None, None))
+        if price_col not in frame.columns or area_col not in frame.columns:
+            return []
+        price = pd.to_numeric(frame[price_col], errors="coerce")
+        sqm = pd.to_numeric(frame["area_sqm"], errors="coerce") if "area_sqm" in frame.columns else None
+        grouped = pd.DataFrame({
+            "area": frame[area_col].astype(str).str.strip().to_numpy(),
+            "price": price.to_numpy(dtype=np.float64, na_value=np.nan),
+            "price_sqm": (price / sqm.where(sqm > 0)).to_numpy(dtype=np.float64, na_value=np.nan)
+            if sqm is not None else np.nan,
+        }).groupby("area", sort=True).agg(units=("price", "size"), median_price=("price", "median"),
+                                          median_price_sqm=("price_sqm", "median"))
+        return [{"seq": seq, "taken_at": taken_at, "area": area, "units": int(row.units),
+                 "median_price": None if pd.isna(row.median_price) else float(row.median_price),
+                 "median_price_sqm": None if pd.isna(row.median_price_sqm) else float(row.median_price_sqm)}
+                for area, row in grouped.iterrows()]
+
+    def area_trend(self, sheet_type: str = "properties") -> pd.DataFrame:
+        """Per-area unit count + median price (and per m²) at every recorded snapshot"""
+        trend = pd.DataFrame(self.manifest(sheet_type)["trend"])
+        if not trend.empty:
+            trend["taken_at"] = pd.to_datetime(trend["taken_at"])
+        return trend
+
+    # --- point in time ---
+    def _reconstruct(self, sheet_type: str, manifest: Dict, seq: int) -> Optional[pd.DataFrame]:
+        segments = [s for s in manifest["segments"] if s["seq"] <= seq]
+        base = next((i for i in range(len(segments) - 1, -1, -1) if segments[i]["kind"] == "checkpoint"), None)
+        if base is None:
+            return None
+        frame = self._read(sheet_type, segments[base]["file"]).to_pandas()
+        columns = [c for c in frame.columns]
+        for segment in segments[base + 1:]:
+            frame = _apply_delta(frame, self._read(sheet_type, segment["file"]), columns)
+        return frame
+
+    @perf.timed("history_snapshot_at")
+    def snapshot_at(self, sheet_type: str, when: Optional[datetime] = None,
+                    seq: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """The sheet as last recorded at `when` (or segment `seq`); rows in first-seen order
+
+        Rebuilt frames are cached by segment and shared - do not modify them.
+        """
+        manifest = self.manifest(sheet_type)
+        segments = manifest["segments"]
+        if seq is None:
+            cutoff = (when or datetime.now()).isoformat(timespec="seconds")
+            eligible = [s["seq"] for s in segments if s["taken_at"] <= cutoff]
+            if not eligible:
+                return None
+            seq = eligible[-1]
+        segment = next((s for s in segments if s["seq"] == seq), None)
+        if segment is None:
+            return None
+        key = (sheet_type, seq, segment["taken_at"])
+        with self._lock:
+            frame = self._snapshots.get(key)
+            if frame is not None:
+                self._snapshots.move_to_end(key)
+        perf.record_cache("history_snapshots", frame is not None)
+        if frame is not None:
+            return frame
+
+        frame = self._reconstruct(sheet_type, manifest, seq)
+        if frame is None:
+            return None
+        frame = frame.reset_index(drop=True)
+        with self._lock:
+            self._snapshots[key] = frame
+            while len(self._snapshots) > MAX_CACHED_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+        return frame
+
+    def stats(self) -> List[Dict]:
+        rows = []
+        for sheet_type in HISTORY_SHEETS:
+            manifest = self.manifest(sheet_type)
+            segments = manifest["segments"]
+            if not segments:
+                continue
+            rows.append({
+                "sheet": sheet_type,
+                "snapshots": len(segments),
+                "checkpoints": sum(s["kind"] == "checkpoint" for s in segments),
+                "disk_mb": sum(s["bytes"] for s in segments) / 1e6,
+                "first": segments[0]["taken_at"],
+                "last": segments[-1]["taken_at"],
+            })
+        return rows
+
+
+def _sorted_events(events: pd.DataFrame) -> pd.DataFrame:
+    return events.sort_values(["id", "seq"], kind="stable").reset_index(drop=True)
+
+
+def _apply_delta(frame: pd.DataFrame, table, columns: List[str]) -> pd.DataFrame:
+    """frame (indexed by ID) with one delta segment applied"""
+    ids = pd.Index(table.column(ID_FIELD).to_numpy(zero_copy_only=False), name=ID_FIELD)
+    ops = table.column(OP_FIELD).to_numpy()
+    masks = [table.column(name).to_numpy() for name in _mask_columns(len(columns))]
+
+    removed = ids[ops == OP_REMOVED]
+    if removed.size:
+        frame = frame.drop(index=removed)
+    changed = np.flatnonzero(ops == OP_CHANGED)
+    for j, col in enumerate(columns):
+        if not changed.size:
+            break
+        rows = changed[((masks[j // MASK_BITS][changed] >> (j % MASK_BITS)) & 1) == 1]
+        if not rows.size:
+            continue
+        values = table.column(col).take(rows).to_pandas().set_axis(ids[rows])
+        # concat settles the common dtype; reindex restores the row order
+        kept = frame[col].drop(index=values.index)
+        frame = frame.assign(**{col: pd.concat([kept, values]).reindex(frame.index)})
+    added = np.flatnonzero(ops == OP_ADDED)
+    if added.size:
+        rows = table.take(added).select(columns).to_pandas().set_axis(ids[added])
+        frame = pd.concat([frame, rows])
+    return frame
+
+# ============================================
+# RECORDER - BACKGROUND THREAD FED BY THE REGISTRY
+# ============================================
+class HistoryRecorder:
+    """Queues published versions; one thread widens and records them in order"""
+
+    def __init__(self):
+        self._queue: "queue.Queue[DatasetHandle]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.skipped = 0
+
+    def on_publish(self, previous_version: Optional[str], handle: DatasetHandle):
+        if handle.sheet_type not in HISTORY_SHEETS or get_history() is None:
+            return
+        # Optimistic write-back edits are not confirmed yet - only fetched versions are history
+        if DATASETS.overlay(handle.version) is not None:
+            return
+        self._queue.put(handle)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="history-recorder", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            handle = self._queue.get()
+            try:
+                self.record(handle)
+            except Exception:
+                logger.exception("History record failed for %s", handle.sheet_type)
+            finally:
+                self._queue.task_done()
+
+    def record(self, handle: DatasetHandle) -> Optional[Dict]:
+        from erp.projection import add_columns, sheet_columns
+
+        store = get_history()
+        df = handle.frame()
+        if store is None or df is None:
+            self.skipped += 1
+            return None
+        # Projected views carry a subset - history keeps every column
+        header = sheet_columns(df)
+        df = add_columns(df, handle.version, header, cache=False)
+        if list(df.columns) != header:
+            self.skipped += 1
+            return None
+        entry = store.record(handle.sheet_type, handle.version, df)
+        self.recorded += entry is not None
+        return entry
+
+    def flush(self):
+        """Block until every queued version is recorded"""
+        self._queue.join()
+
+
+_history: Optional[HistoryStore] = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> Optional[HistoryStore]:
+    """The store under ERP_HISTORY_DIR, None when set to an empty value"""
+    global _history
+    root = os.environ.get("ERP_HISTORY_DIR", DEFAULT_HISTORY_DIR).strip()
+    if not root:
+        return None
+    with _history_lock:
+        if _history is None or _history.root != root:
+            _history = HistoryStore(root)
+        return _history
+
+
+RECORDER = HistoryRecorder()
+
+
+def install(registry: DatasetRegistry = DATASETS):
+    """Record every version registry publishes from now on - idempotent"""
+    registry.add_listener(RECORDER.on_publish)
@@ -0,0 +1,113 @@
+"""
+PROPERTY LINK FINDER - ORIGINAL, NO CHANGES
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from erp import perf
+from erp.datasets import DatasetHandle
+from erp.exports import XLSX_MIME, excel_download_data
+from erp.loaders import load_sheet_handle
+from erp.projection import full_rows
+from erp.state import track_activity
+
+class PropertyLinkFinder:
+    """Property Link Finder - EXACT SAME UI"""
+
+    def render_interface(self):
+        st.markdown("### Property Link Finder")
+
+        # Reuse the sales search dataset when loaded, else fetch once per session
+        handle = st.session_state.get('sales_property_handle') or st.session_state.get('link_finder_handle')
+        if handle is None or handle.frame() is None:
+            handle = load_sheet_handle(
+                st.session_state.sheets_urls.get('properties', ''),
+                "properties",
+                view="sales"
+            )
+            if handle is None:
+                st.warning("No property data available")
+                return
+            st.session_state.link_finder_handle = handle
+
+        render_link_search(handle)
+
+# ============================================
+# LINK SEARCH FRAGMENT - RERUNS WITHOUT THE DASHBOARD
+# ============================================
+@st.fragment
+@perf.timed("fragment_link_finder")
+def render_link_search(handle: DatasetHandle):
+    """Unit ID search + links + export over a cached properties version"""
+    df = handle.frame()
+    if df is None:
+        st.warning("No property data available")
+        return
+
+    link_col = None
+    id_col = None
+
+    for col in df.columns:
+        col_lower = col.lower()
+        if 'link' in col_lower or 'url' in col_lower:
+            link_col = col
+        if 'unit_id' in col_lower or 'id' in col_lower:
+            id_col = col
+
+    if not id_col:
+        st.warning("No ID column found")
+        return
+
+    col1, col2 = st.columns([3, 1])
+
+    with col1:
+        search_term = st.text_input(
+            "Search by Unit ID",
+            placeholder="Enter partial or full Unit ID...",
+            key="link_search"
+        )
+
+    with col2:
+        st.write("")
+        st.write("")
+        search_clicked = st.button("🔍 Search", use_container_width=True)
+
+    if search_term or search_clicked:
+        with perf.timed("link_finder_search"):
+            mask = df[id_col].astype(str).str.contains(search_term, case=False, na=False)
+            results = df[mask]
+        perf.record_rows("link_finder_search", len(df))
+
+        if not results.empty:
+            st.success(f"Found {len(results)} matching properties")
+            track_activity("link_finder_search", {"term": search_term, "results": len(results)})
+
+            for idx, row in results.iterrows():
+                unit_id = row[id_col]
+                link = row[link_col] if link_col else ""
+
+                col1, col2, col3 = st.columns([3, 2, 1])
+
+                with col1:
+                    st.write(f"**{unit_id}**")
+
+                with col2:
+                    if link and pd.notna(link) and str(link).strip():
+                        st.write(f"🔗 [Open Link]({link})")
+
+                with col3:
+                    if link and pd.notna(link) and str(link).strip():
+                        st.code(link, language="text")
+
+            st.download_button(
+                label="📥 Export Search Results (Excel)",
+                data=excel_download_data(lambda: full_rows(handle, results.index), "link_finder"),
+                file_name=f"property_links_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                mime=XLSX_MIME,
+                use_container_width=True
+            )
+        else:
+            st.warning("No matching properties found")
@@ -0,0 +1,144 @@
+"""
+DYNAMIC GOOGLE SHEETS LOADER - LAZY LOADING
+"""
+
+import os
+import re
+from typing import Optional
+from urllib.request import urlopen
+
+import pandas as pd
+import streamlit as st
+
+from erp import datasets, perf, projection
+from erp.datasets import DatasetHandle, content_version
+from erp.shared_store import get_store
+from erp.xlsx_reader import Columns, read_columns
+from erp.state import track_activity
+
+# Export host - override to point at a local stand-in (bench/fake_sheets.py)
+SHEETS_EXPORT_BASE = os.environ.get("ERP_SHEETS_BASE_URL", "https://docs.google.com").rstrip("/")
+
+SHEET_ID_PATTERNS = [
+    r'/spreadsheets/d/([a-zA-Z0-9-_]+)',
+    r'id=([a-zA-Z0-9-_]+)',
+    r'spreadsheets/d/([a-zA-Z0-9-_]+)/edit'
+]
+
+def extract_sheet_id(url: str) -> Optional[str]:
+    """Sheet ID from any Google Sheets URL form"""
+    for pattern in SHEET_ID_PATTERNS:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+def fetch_sheet_export(url: str, sheet_type: str = None, trigger_tracking: bool = True) -> Optional[bytes]:
+    """Download the xlsx export bytes - None when the URL has no sheet ID"""
+    sheet_id = extract_sheet_id(url)
+
+    if not sheet_id:
+        return None
+
+    # Track sheet access
+    if trigger_tracking and st.session_state.user:
+        track_activity("sheet_load", {
+            "sheet_type": sheet_type,
+            "sheet_id": sheet_id[:8] + "...",
+            "url_masked": url[:50] + "..."
+        })
+
+    # Public export URL
+    export_url = f"{SHEETS_EXPORT_BASE}/spreadsheets/d/{sheet_id}/export?format=xlsx"
+
+    with perf.timed("sheet_fetch"):
+        with urlopen(export_url, timeout=60) as response:
+            content = response.read()
+    perf.record_bytes(sheet_type, len(content))
+    return content
+
+def parse_sheet_export(content: bytes, columns: Columns = None) -> pd.DataFrame:
+    """Parse the export - only `columns` (names or a header → names callable) when given"""
+    with perf.timed("sheet_parse"):
+        df = read_columns(content, columns)
+    perf.record_rows("sheet_parse", len(df))
+    perf.record_rows("sheet_parse_cells", len(df) * len(df.columns))
+    return df
+
+def parse_or_attach(content: bytes, sheet_type: str, version: str, columns: Columns = None,
+                    share: bool = True) -> pd.DataFrame:
+    """Attach the host-wide shared copy of this version, else parse and share it
+
+    An attached copy may hold another view's columns - callers add what
+    they miss with projection.add_columns. share=False (credentials) keeps
+    the parse inside this process whatever the sheet type is called.
+    """
+    store = get_store() if share else None
+    if store is not None:
+        df = store.attach(version, sheet_type)
+        perf.record_cache("shared_store", df is not None)
+        if df is not None:
+            return df
+    df = parse_sheet_export(content, columns)
+    if store is not None and not df.empty:
+        df = store.share(sheet_type, version, df)
+    return df
+
+@perf.timed("load_google_sheet")
+def load_google_sheet(url: str, sheet_type: str = None, trigger_tracking: bool = True,
+                      share: bool = True):
+    """Load Google Sheet data - LAZY LOADING, ALWAYS FRESH
+
+    share=False for credentials: never written to or attached from the shared store.
+    """
+    if not url:
+        return pd.DataFrame()
+
+    try:
+        # Read with error handling - fetch and parse timed separately
+        content = fetch_sheet_export(url, sheet_type, trigger_tracking)
+        if content is None:
+            return pd.DataFrame()
+
+        return parse_or_attach(content, sheet_type, content_version(content), share=share)
+
+    except Exception as e:
+        return pd.DataFrame()
+
+@perf.timed("load_sheet_handle")
+def load_sheet_handle(url: str, sheet_type: str, trigger_tracking: bool = True,
+                      view: Optional[str] = None) -> Optional[DatasetHandle]:
+    """Always-fresh fetch, but parse only when the content version is new
+
+    view: role whose column projection to parse (erp.projection.VIEWS) -
+    None / "owner" parse every column. A version already cached with fewer
+    columns is widened in place; its lazy columns stay unparsed.
+
+    Returns a handle into the shared dataset registry, or None when the
+    sheet is missing, unreachable or empty.
+    """
+    if not url:
+        return None
+
+    try:
+        content = fetch_sheet_export(url, sheet_type, trigger_tracking)
+        if content is None:
+            return None
+
+        version = content_version(content)
+        projection.SOURCES.remember(version, content)
+        spec = projection.view_spec(sheet_type, view)
+        pick = spec.columns if spec is not None else None
+
+        df = datasets.REGISTRY.get(version)
+        perf.record_cache("dataset_parse", df is not None)
+        if df is None:
+            df = parse_or_attach(content, sheet_type, version, pick)
+        if df.empty:
+            return None
+        wanted = projection.sheet_columns(df) if pick is None else pick(projection.sheet_columns(df))
+        df = projection.add_columns(df, version, wanted, cache=False)
+        return datasets.REGISTRY.publish(sheet_type, version, df)
+
+    except Exception as e:
+        return None
@@ -0,0 +1,326 @@
+"""
+CLIENT ↔ INVENTORY MATCHING - VECTORIZED RANGE JOIN
+Units are sorted once by (area, unit_type, price). Each client's budget
+becomes a [lo, hi) slice of that order via searchsorted, so every
+client × unit candidate is produced with array arithmetic - no double loop.
+Candidates are filtered on rooms, scored, and the top k kept per client.
+Client sheets are split into chunks by the candidates they produce (a
+blank budget with no area / type is a candidate per unit), and large
+sheets are scored in a process pool.
+"""
+
+import multiprocessing as mp
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import DatasetHandle
+
+# Client values meaning "no preference"
+WILDCARDS = {"", "nan", "none", "الكل", "any", "all", "-"}
+
+DEFAULT_TOP_K = 10
+# Candidate pairs one chunk may materialize (~100 bytes each across the scoring arrays)
+CHUNK_CANDIDATES = 2_000_000
+# Clients per chunk at most - bounds the client × (area, type) block matrix
+CHUNK_CLIENTS = 1_000
+# Below this many clients the pool start-up costs more than it saves
+PARALLEL_MIN_CLIENTS = 3_000
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Match tables kept in memory (one per clients/properties version pair)
+MAX_CACHED = 4
+
+# ============================================
+# COLUMN DETECTION - CLIENT SHEETS VARY
+# ============================================
+def _find_col(columns, *needles, exclude: Tuple[str, ...] = ()) -> Optional[str]:
+    for needle in needles:
+        for col in columns:
+            col_lower = col.lower()
+            if needle in col_lower and not any(x in col_lower for x in exclude):
+                return col
+    return None
+
+
+def detect_client_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """Requirement columns of a clients sheet (None when absent)"""
+    cols = list(df.columns)
+    return {
+        "id": _find_col(cols, "client_id", "id"),
+        "name": _find_col(cols, "client_name", "name"),
+        "agent": _find_col(cols, "assigned_to", "agent"),
+        "budget_min": _find_col(cols, "budget_min", "min_budget", "budget_from"),
+        "budget_max": _find_col(cols, "budget_max", "max_budget", "budget_to", "budget", exclude=("min", "from")),
+        "area": _find_col(cols, "preferred_area", "area", exclude=("sqm",)),
+        "unit_type": _find_col(cols, "unit_type", "type"),
+        "rooms": _find_col(cols, "rooms", "room"),
+    }
+
+# ============================================
+# UNIT SIDE - BUILT ONCE PER PROPERTIES VERSION
+# ============================================
+def _labels(series: pd.Series) -> np.ndarray:
+    values = series.astype(str).str.strip().where(series.notna(), "")
+    return values.where(~values.str.lower().isin(WILDCARDS), "").to_numpy(dtype=object)
+
+
+class UnitIndex:
+    """Units sorted by (area code, type code, price rank) - plain arrays, cheap to pickle"""
+
+    def __init__(self, units: pd.DataFrame):
+        n = len(units)
+        price = pd.to_numeric(units["price_total"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) \
+            if "price_total" in units.columns else np.zeros(n)
+        rooms = pd.to_numeric(units["rooms"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) \
+            if "rooms" in units.columns else np.full(n, np.nan)
+        area = _labels(units["area"]) if "area" in units.columns else np.full(n, "", dtype=object)
+        unit_type = _labels(units["unit_type"]) if "unit_type" in units.columns else np.full(n, "", dtype=object)
+
+        valid = np.isfinite(price)
+        self.area_labels, area_codes = np.unique(area[valid].astype(str), return_inverse=True)
+        self.type_labels, type_codes = np.unique(unit_type[valid].astype(str), return_inverse=True)
+        self.unique_prices, price_rank = np.unique(price[valid], return_inverse=True)
+
+        self.n_types = len(self.type_labels)
+        self.span = len(self.unique_prices) + 1
+        block = area_codes.astype(np.int64) * self.n_types + type_codes
+        composite = block * self.span + price_rank
+        order = np.argsort(composite, kind="stable")
+
+        self.composite = composite[order]
+        self.positions = np.flatnonzero(valid)[order]
+        self.price = price[valid][order]
+        self.rooms = rooms[valid][order]
+
+    def codes(self, labels: np.ndarray, known: np.ndarray) -> np.ndarray:
+        """Client labels -> unit codes; -1 wildcard, -2 unknown value (matches nothing)"""
+        labels = labels.astype(str)
+        if len(known) == 0:
+            return np.where(labels == "", -1, -2)
+        idx = np.minimum(np.searchsorted(known, labels), len(known) - 1)
+        return np.where(labels == "", -1, np.where(known[idx] == labels, idx, -2))
+
+# ============================================
+# CLIENT SIDE - ONE CHUNK, RUNS IN A WORKER OR INLINE
+# ============================================
+def _candidate_slices(units: UnitIndex, area_codes: np.ndarray, type_codes: np.ndarray,
+                      budget_min: np.ndarray, budget_max: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(client index, first unit, unit count) per client × block pair - the slices to materialize"""
+    n_areas, n_types = len(units.area_labels), units.n_types
+    # Client × block pairs - wildcards expand to every area / type
+    block_area = np.repeat(np.arange(n_areas), n_types)
+    block_type = np.tile(np.arange(n_types), n_areas)
+    allowed = ((area_codes[:, None] == -1) | (area_codes[:, None] == block_area[None, :])) & \
+              ((type_codes[:, None] == -1) | (type_codes[:, None] == block_type[None, :]))
+    pair_client, pair_block = np.nonzero(allowed)
+
+    # Budget -> price rank window, then -> slice of the sorted unit order
+    rank_lo = np.searchsorted(units.unique_prices, budget_min[pair_client], side="left")
+    rank_hi = np.searchsorted(units.unique_prices, budget_max[pair_client], side="right")
+    base = pair_block.astype(np.int64) * units.span
+    lo = np.searchsorted(units.composite, base + rank_lo, side="left")
+    hi = np.searchsorted(units.composite, base + rank_hi, side="left")
+    return pair_client, lo, np.maximum(hi - lo, 0)
+
+
+def _match_chunk(units: UnitIndex, client_ids: np.ndarray, area_codes: np.ndarray, type_codes: np.ndarray,
+                 budget_min: np.ndarray, budget_max: np.ndarray, rooms: np.ndarray,
+                 top_k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(client index, unit position, score) for the top_k matches of each client in the chunk"""
+    if len(units.area_labels) == 0 or units.n_types == 0 or len(client_ids) == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float32)
+
+    pair_client, lo, counts = _candidate_slices(units, area_codes, type_codes, budget_min, budget_max)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float32)
+    starts = np.cumsum(counts) - counts
+    cand_client = np.repeat(pair_client, counts)
+    cand_unit = np.arange(total) - np.repeat(starts, counts) + np.repeat(lo, counts)
+
+    # Rooms: at least what the client asked for (missing on either side passes)
+    want_rooms = rooms[cand_client]
+    unit_rooms = units.rooms[cand_unit]
+    keep = ~(np.isfinite(want_rooms) & np.isfinite(unit_rooms) & (unit_rooms < want_rooms))
+    cand_client, cand_unit = cand_client[keep], cand_unit[keep]
+    if cand_client.size == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float32)
+
+    # Score 0-100: closeness to the budget midpoint, minus a little per extra room
+    lo_b, hi_b = budget_min[cand_client], budget_max[cand_client]
+    half_width = np.where(np.isfinite(hi_b - lo_b), (hi_b - lo_b) / 2, np.inf)
+    mid = np.where(np.isfinite(half_width), lo_b + half_width, units.price[cand_unit])
+    price_dev = np.abs(units.price[cand_unit] - mid) / np.maximum(half_width, 1.0)
+    extra_rooms = np.nan_to_num(units.rooms[cand_unit] - rooms[cand_client], nan=0.0).clip(0, 4)
+    score = (100 * (1 - 0.75 * np.clip(price_dev, 0, 1) - 0.25 * extra_rooms / 4)).astype(np.float32)
+
+    # Top k per client: sort by (client, -score), keep the first k of each run
+    order = np.lexsort((-score, cand_client))
+    cand_client, cand_unit, score = cand_client[order], cand_unit[order], score[order]
+    run_start = np.r_[0, np.flatnonzero(np.diff(cand_client)) + 1]
+    rank = np.arange(cand_client.size) - np.repeat(run_start, np.diff(np.r_[run_start, cand_client.size]))
+    keep = rank < top_k
+    return client_ids[cand_client[keep]], units.positions[cand_unit[keep]], score[keep]
+
+
+_worker_units: Optional[UnitIndex] = None
+
+
+def _init_worker(units: UnitIndex):
+    global _worker_units
+    _worker_units = units
+
+
+def _match_chunk_in_worker(args):
+    return _match_chunk(_worker_units, *args)
+
+# ============================================
+# PUBLIC API
+# ============================================
+def _client_arrays(clients: pd.DataFrame, cols: Dict[str, Optional[str]], units: UnitIndex):
+    n = len(clients)
+    numeric = lambda col, fill: pd.to_numeric(clients[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) \
+        if col else np.full(n, fill)
+    budget_min = np.nan_to_num(numeric(cols["budget_min"], 0.0), nan=0.0)
+    budget_max = np.nan_to_num(numeric(cols["budget_max"], np.inf), nan=np.inf)
+    rooms = numeric(cols["rooms"], np.nan)
+    area = units.codes(_labels(clients[cols["area"]]), units.area_labels) if cols["area"] else np.full(n, -1)
+    unit_type = units.codes(_labels(clients[cols["unit_type"]]), units.type_labels) if cols["unit_type"] else np.full(n, -1)
+    return area, unit_type, budget_min, budget_max, rooms
+
+
+def _client_candidates(units: UnitIndex, area_codes: np.ndarray, type_codes: np.ndarray,
+                       budget_min: np.ndarray, budget_max: np.ndarray) -> np.ndarray:
+    """Candidate pairs each client would materialize (before the rooms filter)"""
+    n = len(area_codes)
+    if len(units.area_labels) == 0 or units.n_types == 0:
+        return np.zeros(n, dtype=np.int64)
+    counts = np.zeros(n, dtype=np.int64)
+    for start in range(0, n, CHUNK_CLIENTS):
+        sl = slice(start, start + CHUNK_CLIENTS)
+        pair_client, _, pair_counts = _candidate_slices(units, area_codes[sl], type_codes[sl],
+                                                        budget_min[sl], budget_max[sl])
+        counts[sl] = np.bincount(pair_client, weights=pair_counts, minlength=len(area_codes[sl]))
+    return counts
+
+
+def _chunk_bounds(counts: np.ndarray):
+    """[start, end) client ranges of at most CHUNK_CANDIDATES candidates and CHUNK_CLIENTS clients
+
+    A single client over the budget gets a chunk of its own (at most one candidate per unit).
+    """
+    cumulative = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        done = cumulative[start - 1] if start else 0
+        end = int(np.searchsorted(cumulative, done + CHUNK_CANDIDATES, side="right"))
+        end = min(max(end, start + 1), start + CHUNK_CLIENTS)
+        yield start, end
+        start = end
+
+
+@perf.timed("match_clients")
+def match_clients(clients: pd.DataFrame, units: pd.DataFrame, top_k: int = DEFAULT_TOP_K,
+                  workers: Optional[int] = None) -> pd.DataFrame:
+    """Ranked matches: one row per (client, unit) with client_row, unit_row, score, rank"""
+    cols = detect_client_columns(clients)
+    with perf.timed("match_unit_index"):
+        unit_index = UnitIndex(units)
+    area, unit_type, budget_min, budget_max, rooms = _client_arrays(clients, cols, unit_index)
+
+    chunks = []
+    for start, end in _chunk_bounds(_client_candidates(unit_index, area, unit_type, budget_min, budget_max)):
+        sl = slice(start, end)
+        chunks.append((np.arange(len(clients))[sl], area[sl], unit_type[sl],
+                       budget_min[sl], budget_max[sl], rooms[sl], top_k))
+
+    workers = MAX_WORKERS if workers is None else workers
+    if workers > 1 and len(clients) >= PARALLEL_MIN_CLIENTS and len(chunks) > 1:
+        # spawn: never fork a threaded Streamlit server
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=mp.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(unit_index,)) as pool:
+            parts = list(pool.map(_match_chunk_in_worker, chunks))
+    else:
+        parts = [_match_chunk(unit_index, *chunk) for chunk in chunks]
+
+    client_row = np.concatenate([p[0] for p in parts]) if parts else np.array([], dtype=np.int64)
+    unit_row = np.concatenate([p[1] for p in parts]) if parts else np.array([], dtype=np.int64)
+    score = np.concatenate([p[2] for p in parts]) if parts else np.array([], dtype=np.float32)
+    perf.record_rows("match_clients", len(clients) * len(units))
+
+    matches = pd.DataFrame({"client_row": client_row, "unit_row": unit_row, "score": score.astype(np.float64).round(1)})
+    matches["rank"] = matches.groupby("client_row").cumcount() + 1
+    return matches
+
+
+def match_details(matches: pd.DataFrame, clients: pd.DataFrame, units: pd.DataFrame) -> pd.DataFrame:
+    """Matches joined with client name/agent and the unit columns agents need"""
+    cols = detect_client_columns(clients)
+    client_cols = [c for c in (cols["id"], cols["name"], cols["agent"]) if c]
+    unit_cols = [c for c in ("unit_id", "area", "unit_type", "price_total", "area_sqm", "rooms", "link")
+                 if c in units.columns]
+    left = clients.iloc[matches["client_row"].to_numpy()][client_cols].reset_index(drop=True)
+    right = units.iloc[matches["unit_row"].to_numpy()][unit_cols].reset_index(drop=True)
+    right = right.rename(columns={"area": "unit_area", "rooms": "unit_rooms"})
+    return pd.concat([left, matches[["rank", "score"]].reset_index(drop=True), right], axis=1)
+
+
+def agent_summary(matches: pd.DataFrame, clients: pd.DataFrame) -> pd.DataFrame:
+    """Per agent: clients, clients with at least one match, matches, average best score"""
+    agent_col = detect_client_columns(clients)["agent"]
+    agents = clients[agent_col].astype(str).str.strip() if agent_col else pd.Series("-", index=clients.index)
+    agents = agents.reset_index(drop=True)
+
+    best = matches[matches["rank"] == 1].set_index("client_row")["score"]
+    per_client = pd.DataFrame({
+        "agent": agents,
+        "matches": matches.groupby("client_row").size().reindex(agents.index, fill_value=0),
+        "best_score": best.reindex(agents.index),
+    })
+    summary = per_client.groupby("agent").agg(
+        clients=("matches", "size"),
+        matched_clients=("matches", lambda s: int((s > 0).sum())),
+        matches=("matches", "sum"),
+        avg_best_score=("best_score", "mean"),
+    ).reset_index()
+    summary["match_rate"] = (summary["matched_clients"] / summary["clients"]).round(3)
+    return summary.sort_values("matched_clients", ascending=False)
+
+# ============================================
+# PER-VERSION CACHE - OWNER SUMMARY SHARED BY ALL SESSIONS
+# ============================================
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[str, str, int], pd.DataFrame]" = OrderedDict()
+
+
+def cached_matches(clients: DatasetHandle, units: DatasetHandle,
+                   top_k: int = DEFAULT_TOP_K) -> Optional[pd.DataFrame]:
+    """match_clients() for two dataset versions, computed once per process"""
+    key = (clients.version, units.version, top_k)
+    with _lock:
+        matches = _cache.get(key)
+        if matches is not None:
+            _cache.move_to_end(key)
+    perf.record_cache("client_matches", matches is not None)
+    if matches is not None:
+        return matches
+
+    clients_df, units_df = clients.frame(), units.frame()
+    if clients_df is None or units_df is None:
+        return None
+    matches = match_clients(clients_df, units_df, top_k)
+    with _lock:
+        _cache[key] = matches
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return matches
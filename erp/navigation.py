@@ -0,0 +1,45 @@
+"""
+NAVIGATION - MANAGER/SALES HAVE NO CONFIG
+"""
+
+import streamlit as st
+
+from erp.session_memory import forget_session
+from erp.state import track_activity
+
+def render_navigation():
+    """Navigation sidebar - NO CONFIG for Manager/Sales"""
+    with st.sidebar:
+        user = st.session_state.user
+
+        st.markdown(f"### {user['full_name']}")
+        st.markdown(f"*{user['role'].title()}*")
+
+        st.markdown("---")
+        st.markdown("### Navigation")
+
+        if user['role'] == 'owner':
+            if st.button("🏢 Executive Dashboard", use_container_width=True):
+                st.session_state.current_page = "owner"
+                st.rerun()
+
+        elif user['role'] == 'manager':
+            if st.button("👨‍💼 Management Dashboard", use_container_width=True):
+                st.session_state.current_page = "manager"
+                st.rerun()
+
+        elif user['role'] == 'sales':
+            if st.button("🔍 Sales Dashboard", use_container_width=True):
+                st.session_state.current_page = "sales"
+                st.rerun()
+
+        st.markdown("---")
+
+        if st.button("🚪 Logout", type="primary", use_container_width=True):
+            track_activity("logout", {"username": user['username']})
+            forget_session()
+            # Clear session state
+            for key in list(st.session_state.keys()):
+                if key not in ['users_sheet_configured', 'activity_log']:
+                    del st.session_state[key]
+            st.rerun()
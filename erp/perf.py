@@ -0,0 +1,270 @@
+"""
+PERFORMANCE INSTRUMENTATION - PROCESS-WIDE STAGE TIMERS
+Histograms per stage (p50/p95/p99), bytes fetched, rows processed,
+cache hit rates and a Prometheus text exporter.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Prometheus-style latency buckets (seconds)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Samples kept per stage for exact percentiles
+SAMPLE_WINDOW = 2048
+
+# ============================================
+# HISTOGRAM
+# ============================================
+class Histogram:
+    """Cumulative bucket counts plus a bounded window of recent samples"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window: int = SAMPLE_WINDOW):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.bucket_counts[i] += 1
+                break
+
+    def percentile(self, q: float) -> float:
+        """Linear-interpolated percentile (numpy's default) - no numpy import"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        pos = (len(ordered) - 1) * q / 100
+        lower = int(pos)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+    def cumulative_buckets(self) -> List[Tuple[str, int]]:
+        running = 0
+        out = []
+        for upper, n in zip(self.buckets, self.bucket_counts):
+            running += n
+            out.append((repr(upper), running))
+        out.append(("+Inf", self.count))
+        return out
+
+# ============================================
+# REGISTRY
+# ============================================
+class PerfRegistry:
+    """Thread-safe store shared by every Streamlit session in the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.stages: Dict[str, Histogram] = {}
+        self.bytes_fetched: Dict[str, int] = {}
+        self.rows_processed: Dict[str, int] = {}
+        self.cache: Dict[str, List[int]] = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = Histogram()
+            hist.observe(seconds)
+
+    def add_bytes(self, label: str, n: int):
+        with self._lock:
+            self.bytes_fetched[label] = self.bytes_fetched.get(label, 0) + int(n)
+
+    def add_rows(self, stage: str, n: int):
+        with self._lock:
+            self.rows_processed[stage] = self.rows_processed.get(stage, 0) + int(n)
+
+    def record_cache(self, name: str, hit: bool):
+        with self._lock:
+            counts = self.cache.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stages.clear()
+            self.bytes_fetched.clear()
+            self.rows_processed.clear()
+            self.cache.clear()
+
+    def stage_summary(self) -> List[Dict]:
+        """One row per stage - milliseconds for display"""
+        with self._lock:
+            items = list(self.stages.items())
+            rows = []
+            for stage, hist in items:
+                rows.append({
+                    "stage": stage,
+                    "count": hist.count,
+                    "p50_ms": hist.percentile(50) * 1000,
+                    "p95_ms": hist.percentile(95) * 1000,
+                    "p99_ms": hist.percentile(99) * 1000,
+                    "mean_ms": (hist.total / hist.count * 1000) if hist.count else 0.0,
+                    "total_s": hist.total,
+                    "rows": self.rows_processed.get(stage, 0),
+                })
+        return sorted(rows, key=lambda r: r["total_s"], reverse=True)
+
+    def cache_summary(self) -> List[Dict]:
+        with self._lock:
+            rows = []
+            for name, (hits, misses) in self.cache.items():
+                total = hits + misses
+                rows.append({
+                    "cache": name,
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / total if total else 0.0,
+                })
+        return sorted(rows, key=lambda r: r["cache"])
+
+    def bytes_summary(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.bytes_fetched)
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP erp_stage_duration_seconds Wall-clock duration of instrumented stages.",
+            "# TYPE erp_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items())
+            for stage, hist in stages:
+                label = _escape(stage)
+                for le, n in hist.cumulative_buckets():
+                    lines.append(f'erp_stage_duration_seconds_bucket{{stage="{label}",le="{le}"}} {n}')
+                lines.append(f'erp_stage_duration_seconds_sum{{stage="{label}"}} {hist.total!r}')
+                lines.append(f'erp_stage_duration_seconds_count{{stage="{label}"}} {hist.count}')
+
+            lines.append("# HELP erp_stage_duration_quantile_seconds Recent-window quantiles per stage.")
+            lines.append("# TYPE erp_stage_duration_quantile_seconds gauge")
+            for stage, hist in stages:
+                label = _escape(stage)
+                for q in (50, 95, 99):
+                    lines.append(
+                        f'erp_stage_duration_quantile_seconds{{stage="{label}",quantile="{q / 100}"}} '
+                        f'{hist.percentile(q)!r}'
+                    )
+
+            lines.append("# HELP erp_bytes_fetched_total Bytes downloaded from Google Sheets.")
+            lines.append("# TYPE erp_bytes_fetched_total counter")
+            for sheet, n in sorted(self.bytes_fetched.items()):
+                lines.append(f'erp_bytes_fetched_total{{sheet="{_escape(sheet)}"}} {n}')
+
+            lines.append("# HELP erp_rows_processed_total Rows processed per stage.")
+            lines.append("# TYPE erp_rows_processed_total counter")
+            for stage, n in sorted(self.rows_processed.items()):
+                lines.append(f'erp_rows_processed_total{{stage="{_escape(stage)}"}} {n}')
+
+            lines.append("# HELP erp_cache_requests_total Cache lookups by result.")
+            lines.append("# TYPE erp_cache_requests_total counter")
+            for name, (hits, misses) in sorted(self.cache.items()):
+                label = _escape(name)
+                lines.append(f'erp_cache_requests_total{{cache="{label}",result="hit"}} {hits}')
+                lines.append(f'erp_cache_requests_total{{cache="{label}",result="miss"}} {misses}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = PerfRegistry()
+
+# ============================================
+# TIMERS - CONTEXT MANAGER + DECORATOR
+# ============================================
+class timed(ContextDecorator):
+    """Time a block or function into the stage histogram
+
+    with timed("keyword_search"): ...
+    @timed("render_original_filters")
+    """
+
+    def __init__(self, stage: str, registry: Optional[PerfRegistry] = None):
+        self.stage = stage
+        self.registry = registry or REGISTRY
+        self._starts = threading.local()
+
+    def __enter__(self):
+        stack = getattr(self._starts, "stack", None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        start = self._starts.stack.pop()
+        self.registry.observe(self.stage, time.perf_counter() - start)
+        return False
+
+
+def record_bytes(label: str, n: int):
+    REGISTRY.add_bytes(label or "unknown", n)
+
+def record_rows(stage: str, n: int):
+    REGISTRY.add_rows(stage, n)
+
+def record_cache(name: str, hit: bool):
+    REGISTRY.record_cache(name, hit)
+
+# ============================================
+# PROMETHEUS SCRAPE ENDPOINT (OPTIONAL)
+# ============================================
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics on a daemon thread - once per process"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="erp-metrics", daemon=True).start()
+        return _server
+
+
+def start_metrics_server_from_env():
+    """Start the scrape endpoint when ERP_METRICS_PORT is set"""
+    port = os.environ.get("ERP_METRICS_PORT")
+    if port and _server is None:
+        try:
+            start_metrics_server(int(port), os.environ.get("ERP_METRICS_HOST", "127.0.0.1"))
+        except (OSError, ValueError):
+            pass
@@ -0,0 +1,208 @@
+"""
+ROLE-BASED COLUMN PROJECTION - PARSE ONLY WHAT A VIEW READS
+Each role's view of a sheet names the columns it needs up front (eager:
+filters, comparables, matching, IDs / links) and the wide text columns it
+reads only now and then (lazy: notes, address). At ingest only the eager
+columns are decoded (erp.xlsx_reader); lazy columns are decoded from the
+kept export bytes the first time a search, a notes toggle or an export asks,
+and held in a byte-bounded LRU shared by every session on that version.
+Full rows - every sheet column - are assembled only for Excel exports.
+
+Views without a spec (owner, unknown sheets) read every column.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from erp import perf
+from erp.datasets import DatasetHandle
+from erp.xlsx_reader import SHEET_COLUMNS_ATTR, read_columns
+
+logger = logging.getLogger(__name__)
+
+# Export bytes kept per sheet version, to decode lazy columns later
+MAX_SOURCES = 8
+# Decoded lazy columns kept across versions (least recently used evicted first)
+LAZY_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Columns the filter widgets, comparables and client matching read
+SEARCH_COLUMNS = [
+    "price_total", "area_sqm", "floor_number", "area", "unit_type", "listing_type",
+    "rooms", "bathrooms", "unit_status", "electricity", "water", "gas", "elevator", "garage",
+]
+OVERVIEW_COLUMNS = [
+    "area", "unit_type", "listing_type", "price_total", "area_sqm", "floor_number",
+    "rooms", "bathrooms", "unit_status",
+]
+WIDE_TEXT_COLUMNS = ["notes", "address"]
+# Substrings of ID / link / owner columns every view keeps (same detection as the dashboards)
+KEY_MARKERS = ("unit_id", "link", "url", "agent", "assigned_to")
+
+# ============================================
+# VIEW SPECS
+# ============================================
+@dataclass(frozen=True)
+class ViewSpec:
+    eager: Tuple[str, ...]
+    lazy: Tuple[str, ...] = ()
+
+    def columns(self, header: Sequence[str], lazy: bool = False) -> List[str]:
+        """Header columns of this view, in sheet order"""
+        wanted = set(self.eager) | (set(self.lazy) if lazy else set())
+        return [col for col in header
+                if col in wanted or any(marker in col.lower() for marker in KEY_MARKERS)]
+
+
+VIEWS: Dict[str, Dict[str, ViewSpec]] = {
+    "sales": {"properties": ViewSpec(eager=tuple(SEARCH_COLUMNS), lazy=tuple(WIDE_TEXT_COLUMNS))},
+    "manager": {"properties": ViewSpec(eager=tuple(OVERVIEW_COLUMNS), lazy=tuple(WIDE_TEXT_COLUMNS))},
+}
+
+
+def view_spec(sheet_type: str, view: Optional[str]) -> Optional[ViewSpec]:
+    """None means the view reads every column"""
+    return VIEWS.get(view or "", {}).get(sheet_type)
+
+
+def sheet_columns(df: pd.DataFrame) -> List[str]:
+    """Every column of the source sheet, in order - df's own when it was read whole"""
+    return list(df.attrs.get(SHEET_COLUMNS_ATTR) or df.columns)
+
+
+def visible(df: pd.DataFrame, sheet_type: str, view: Optional[str]) -> pd.DataFrame:
+    """df cut down to the view's columns (eager + any lazy ones df already carries)"""
+    spec = view_spec(sheet_type, view)
+    if spec is None:
+        return df
+    return df[[col for col in spec.columns(df.columns, lazy=True)]]
+
+# ============================================
+# SHEET SOURCES - EXPORT BYTES + DECODED LAZY COLUMNS
+# ============================================
+class SheetSources:
+    """Thread-safe LRUs: export bytes per version, decoded columns by bytes
+
+    Optimistic write-back versions are aliased to the version they were
+    built from - their missing columns come from the same export.
+    """
+
+    def __init__(self, max_sources: int = MAX_SOURCES, max_bytes: int = LAZY_CACHE_MAX_BYTES):
+        self.max_sources = max_sources
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._content: "OrderedDict[str, bytes]" = OrderedDict()
+        self._aliases: Dict[str, str] = {}
+        self._columns: "OrderedDict[Tuple[str, str], pd.Series]" = OrderedDict()
+        self._bytes = 0
+
+    def remember(self, version: str, content: bytes):
+        with self._lock:
+            self._content[version] = content
+            self._content.move_to_end(version)
+            while len(self._content) > self.max_sources:
+                evicted, _ = self._content.popitem(last=False)
+                self._aliases = {v: base for v, base in self._aliases.items() if base != evicted}
+
+    def alias(self, version: str, base_version: str):
+        with self._lock:
+            base = self._aliases.get(base_version, base_version)
+            if base in self._content:
+                self._aliases[version] = base
+
+    def source_version(self, version: str) -> str:
+        with self._lock:
+            return self._aliases.get(version, version)
+
+    def columns(self, version: str, names: Sequence[str], cache: bool = True) -> Dict[str, pd.Series]:
+        """Decoded columns of version's export - cached ones, the rest in one read
+
+        cache=False for columns the caller keeps itself (eager view columns).
+        """
+        base = self.source_version(version)
+        found: Dict[str, pd.Series] = {}
+        with self._lock:
+            for name in names:
+                series = self._columns.get((base, name))
+                if series is not None:
+                    self._columns.move_to_end((base, name))
+                    found[name] = series
+            content = self._content.get(base)
+            if content is not None:
+                self._content.move_to_end(base)
+        missing = [name for name in names if name not in found]
+        perf.record_cache("lazy_columns", not missing)
+        if not missing or content is None:
+            return found
+
+        with perf.timed("lazy_column_decode"):
+            decoded = read_columns(content, missing)
+        perf.record_rows("lazy_column_decode", len(decoded) * len(decoded.columns))
+        found.update({name: decoded[name] for name in decoded.columns})
+        if not cache:
+            return found
+        with self._lock:
+            for name in decoded.columns:
+                series = decoded[name]
+                if (base, name) not in self._columns:
+                    self._columns[(base, name)] = series
+                    self._bytes += int(series.memory_usage(deep=True, index=False))
+            while self._bytes > self.max_bytes and len(self._columns) > 1:
+                _, evicted = self._columns.popitem(last=False)
+                self._bytes -= int(evicted.memory_usage(deep=True, index=False))
+        return found
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sources": len(self._content),
+                "source_mb": sum(len(c) for c in self._content.values()) / 1e6,
+                "lazy_columns": len(self._columns),
+                "lazy_mb": self._bytes / 1e6,
+            }
+
+
+SOURCES = SheetSources()
+
+# ============================================
+# FRAMES WITH EXTRA COLUMNS
+# ============================================
+def add_columns(df: pd.DataFrame, version: str, columns: Sequence[str], cache: bool = True) -> pd.DataFrame:
+    """df plus `columns` (those the sheet has) decoded from version's export, in sheet order
+
+    Columns that cannot be decoded any more (export evicted, version
+    attached from another worker) are left out.
+    """
+    header = sheet_columns(df)
+    wanted = set(columns)
+    missing = [col for col in header if col in wanted and col not in df.columns]
+    if not missing:
+        return df
+
+    extra = SOURCES.columns(version, missing, cache=cache)
+    if len(extra) < len(missing):
+        logger.warning("Columns no longer available for %s: %s", version, [c for c in missing if c not in extra])
+    if not extra or any(len(series) != len(df) for series in extra.values()):
+        return df
+    widened = df.assign(**{name: series.set_axis(df.index) for name, series in extra.items()})
+    return widened[[col for col in header if col in widened.columns]]
+
+
+def with_columns(handle: DatasetHandle, columns: Sequence[str]) -> Optional[pd.DataFrame]:
+    """handle's shared frame plus lazy `columns` - the extra columns live only in the result"""
+    df = handle.frame()
+    return add_columns(df, handle.version, columns) if df is not None else None
+
+
+def full_rows(handle: DatasetHandle, labels: Optional[Sequence] = None) -> Optional[pd.DataFrame]:
+    """Every sheet column for the rows `labels` (all rows when None) - for exports"""
+    df = handle.frame()
+    if df is None:
+        return None
+    with perf.timed("projection_full_rows"):
+        full = add_columns(df, handle.version, sheet_columns(df))
+        return full if labels is None else full.loc[labels]
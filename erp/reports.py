@@ -0,0 +1,310 @@
+"""
+BULK CLIENT REPORTS - FORMATTED WORKBOOKS IN A PROCESS POOL
+Month end: one workbook per (client, FilterSignature) pair, with a summary
+sheet (filters, unit count, price range, units per area / type) and the
+matching units formatted for the client (right-to-left, styled header,
+number formats, frozen header row, auto-filter).
+
+Filtering runs in the parent through the shared FILTER_CACHE. The
+dataset's full rows are written once per batch as an Arrow IPC file
+(erp.shared_store, on /dev/shm when there is one) that every worker
+memory-maps, so workers neither re-fetch the sheet nor receive a pickled
+copy per report - a task is just row positions. Workbooks come back as
+bytes and are zipped; progress goes to a callback.
+"""
+
+import multiprocessing as mp
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from io import BytesIO
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import DatasetHandle
+
+if TYPE_CHECKING:
+    # erp.filters pulls in streamlit - kept out of the worker processes
+    from erp.filters import FilterSignature
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Below this many reports the pool start-up costs more than it saves
+PARALLEL_MIN_REPORTS = 16
+
+# Client-facing columns, in this order (internal columns - agent, owner contacts... - left out)
+REPORT_COLUMNS = [
+    "unit_id", "area", "unit_type", "listing_type", "price_total", "area_sqm", "floor_number",
+    "rooms", "bathrooms", "unit_status", "electricity", "water", "gas", "elevator", "garage",
+    "address", "notes", "link",
+]
+MONEY_COLUMNS = {"price_total"}
+WIDE_COLUMNS = {"address": 40, "notes": 50, "link": 36}
+
+HEADER_FILL = "1F4E78"
+TITLE = "تقرير الوحدات المقترحة"
+
+
+@dataclass(frozen=True)
+class ReportRequest:
+    client: str
+    signature: "FilterSignature"
+    agent: str = ""
+
+
+@dataclass
+class ReportBatch:
+    zip_bytes: bytes
+    reports: int
+    units: int
+    seconds: float
+    workers: int
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def reports_per_second(self) -> float:
+        return self.reports / self.seconds if self.seconds else 0.0
+
+# ============================================
+# REQUESTS - FROM CLIENT REQUIREMENTS OR SAVED SEARCHES
+# ============================================
+def requests_from_clients(clients: pd.DataFrame) -> List[ReportRequest]:
+    """One request per mother-sheet client: budget range, preferred area / type, min rooms"""
+    from erp.filters import FilterSignature
+    from erp.matching import WILDCARDS, detect_client_columns
+
+    cols = detect_client_columns(clients)
+
+    def text(row, key) -> str:
+        value = row.get(cols[key]) if cols[key] else None
+        return "" if value is None or pd.isna(value) else str(value).strip()
+
+    def number(row, key) -> Optional[float]:
+        value = pd.to_numeric(row.get(cols[key]), errors="coerce") if cols[key] else np.nan
+        return float(value) if pd.notna(value) and value > 0 else None
+
+    requests = []
+    for i, row in enumerate(clients.to_dict("records")):
+        ranges = []
+        low, high = number(row, "budget_min"), number(row, "budget_max")
+        if low is not None or high is not None:
+            ranges.append(("price_total", low, high))
+        rooms = number(row, "rooms")
+        if rooms is not None:
+            ranges.append(("rooms", rooms, None))
+        selections = tuple((column, (value,)) for column, value in
+                           (("area", text(row, "area")), ("unit_type", text(row, "unit_type")))
+                           if value.lower() not in WILDCARDS)
+        label = " - ".join(p for p in (text(row, "name"), text(row, "id")) if p) or f"client {i + 1}"
+        requests.append(ReportRequest(label, FilterSignature(ranges=tuple(ranges), selections=selections),
+                                      text(row, "agent")))
+    return requests
+
+
+def requests_from_searches(searches: Sequence) -> List[ReportRequest]:
+    """One request per saved search - agents save one search per client"""
+    return [ReportRequest(search.name, search.signature, search.owner) for search in searches]
+
+# ============================================
+# ONE WORKBOOK
+# ============================================
+def report_columns(df: pd.DataFrame) -> List[str]:
+    columns = [col for col in REPORT_COLUMNS if col in df.columns]
+    return columns or list(df.columns)
+
+
+def _cell_value(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def render_report(units: pd.DataFrame, client: str, agent: str, description: str,
+                  generated_at: str) -> bytes:
+    """Summary sheet + formatted units sheet, as xlsx bytes"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    book = Workbook(write_only=True)
+    summary = book.create_sheet("ملخص")
+    sheet = book.create_sheet("الوحدات")
+    summary.sheet_view.rightToLeft = sheet.sheet_view.rightToLeft = True
+    bold = Font(bold=True)
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill("solid", fgColor=HEADER_FILL)
+
+    def styled(ws, value, font=None, fill=None, number_format=None):
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if number_format is not None:
+            cell.number_format = number_format
+        return cell
+
+    # SUMMARY
+    prices = pd.to_numeric(units["price_total"], errors="coerce") if "price_total" in units.columns else pd.Series(dtype=float)
+    sqm = pd.to_numeric(units["area_sqm"], errors="coerce") if "area_sqm" in units.columns else pd.Series(dtype=float)
+    per_sqm = (prices / sqm.where(sqm > 0)).median() if len(sqm) else np.nan
+    summary.column_dimensions["A"].width = 24
+    summary.column_dimensions["B"].width = 48
+    summary.append([styled(summary, TITLE, Font(bold=True, size=14))])
+    summary.append([])
+    for label, value, fmt in (
+        ("العميل", client, None), ("الموظف", agent or "-", None), ("التاريخ", generated_at, None),
+        ("الفلاتر", description, None), ("عدد الوحدات", len(units), "#,##0"),
+        ("أقل سعر", prices.min(), "#,##0"), ("متوسط السعر", prices.median(), "#,##0"),
+        ("أعلى سعر", prices.max(), "#,##0"), ("متوسط سعر المتر", per_sqm, "#,##0"),
+    ):
+        summary.append([styled(summary, label, bold), styled(summary, _cell_value(value), number_format=fmt)])
+    for column, label in (("area", "المنطقة"), ("unit_type", "نوع الوحدة")):
+        if column not in units.columns or units.empty:
+            continue
+        summary.append([])
+        summary.append([styled(summary, h, header_font, header_fill) for h in (label, "عدد الوحدات", "متوسط السعر")])
+        groups = units.assign(_price=prices).groupby(column, observed=True)["_price"].agg(["size", "median"])
+        for name, row in groups.sort_values("size", ascending=False).iterrows():
+            summary.append([_cell_value(name), int(row["size"]),
+                            styled(summary, _cell_value(row["median"]), number_format="#,##0")])
+
+    # UNITS
+    columns = report_columns(units)
+    for i, column in enumerate(columns, start=1):
+        sheet.column_dimensions[get_column_letter(i)].width = WIDE_COLUMNS.get(column, 14)
+    sheet.freeze_panes = "A2"
+    sheet.auto_filter.ref = f"A1:{get_column_letter(len(columns))}{len(units) + 1}"
+    sheet.append([styled(sheet, column, header_font, header_fill) for column in columns])
+    money = [i for i, column in enumerate(columns) if column in MONEY_COLUMNS]
+    wrap = Alignment(wrap_text=True, vertical="top")
+    wide = [i for i, column in enumerate(columns) if column in WIDE_COLUMNS]
+    for values in units[columns].itertuples(index=False, name=None):
+        row = [_cell_value(v) for v in values]
+        for i in money:
+            row[i] = styled(sheet, row[i], number_format="#,##0")
+        for i in wide:
+            cell = WriteOnlyCell(sheet, value=row[i])
+            cell.alignment = wrap
+            row[i] = cell
+        sheet.append(row)
+
+    buffer = BytesIO()
+    book.save(buffer)
+    return buffer.getvalue()
+
+
+def report_name(i: int, request: ReportRequest) -> str:
+    """Zip member name: <agent>/<nnn>_<client>.xlsx, safe for every OS"""
+    safe = lambda s: re.sub(r'[\\/:*?"<>|\s]+', "_", s).strip("._") or "-"
+    name = f"{i + 1:03d}_{safe(request.client)[:60]}.xlsx"
+    return f"{safe(request.agent)}/{name}" if request.agent else name
+
+# ============================================
+# WORKERS - FULL ROWS MEMORY-MAPPED ONCE PER PROCESS
+# ============================================
+_worker_units: Optional[pd.DataFrame] = None
+
+
+def _init_worker(store_root: Optional[str], version: str, units: Optional[pd.DataFrame]):
+    global _worker_units
+    if units is None:
+        from erp.shared_store import SharedDatasetStore
+
+        units = SharedDatasetStore(store_root).attach(version)
+    _worker_units = units
+
+
+def _render_task(units: pd.DataFrame, task) -> Tuple[int, Optional[bytes], int, str]:
+    i, positions, client, agent, description, generated_at = task
+    try:
+        rows = units.iloc[positions]
+        return i, render_report(rows, client, agent, description, generated_at), len(rows), ""
+    except Exception as e:
+        return i, None, 0, str(e)
+
+
+def _render_in_worker(task):
+    return _render_task(_worker_units, task)
+
+
+@perf.timed("bulk_reports")
+def generate_reports(handle: DatasetHandle, requests: Sequence[ReportRequest],
+                     workers: Optional[int] = None,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Optional[ReportBatch]:
+    """Every request's workbook, zipped - None when the dataset left the cache"""
+    from erp.projection import full_rows
+    from erp.searches import FILTER_CACHE
+    from erp.shared_store import SharedDatasetStore
+
+    start = time.perf_counter()
+    # Full rows once for the whole batch (lazy columns decoded a single time)
+    units = full_rows(handle)
+    if units is None:
+        return None
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+    tasks = []
+    with perf.timed("bulk_reports_filter"):
+        for i, request in enumerate(requests):
+            positions = FILTER_CACHE.positions(handle, request.signature, "report_filters")
+            if positions is None:
+                return None
+            tasks.append((i, positions, request.client, request.agent,
+                          request.signature.describe(), generated_at))
+
+    workers = MAX_WORKERS if workers is None else workers
+    parallel = workers > 1 and len(tasks) >= PARALLEL_MIN_REPORTS
+    results: Dict[int, Tuple[Optional[bytes], int, str]] = {}
+
+    def collect(result):
+        i, data, rows, error = result
+        results[i] = (data, rows, error)
+        if progress is not None:
+            progress(len(results), len(tasks))
+
+    if parallel:
+        # A private store for this batch - the host-wide one drops files its manifest does not list
+        temp_root = tempfile.mkdtemp(prefix="erp_reports_", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+        store = SharedDatasetStore(temp_root)
+        shared = units.reset_index(drop=True)
+        initargs = (temp_root, handle.version, None) if store.write(handle.version, shared) \
+            else (None, handle.version, shared)
+        try:
+            # spawn: never fork a threaded Streamlit server
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=mp.get_context("spawn"),
+                                     initializer=_init_worker, initargs=initargs) as pool:
+                for future in as_completed([pool.submit(_render_in_worker, task) for task in tasks]):
+                    collect(future.result())
+        finally:
+            shutil.rmtree(temp_root, ignore_errors=True)
+    else:
+        for task in tasks:
+            collect(_render_task(units, task))
+
+    buffer = BytesIO()
+    failed = []
+    with perf.timed("bulk_reports_zip"):
+        # xlsx is already deflated - store as is
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            for i, request in enumerate(requests):
+                data, _, error = results[i]
+                if data is None:
+                    failed.append((request.client, error))
+                else:
+                    archive.writestr(report_name(i, request), data)
+    total_units = sum(rows for _, rows, _ in results.values())
+    perf.record_rows("bulk_reports", total_units)
+    perf.record_bytes("bulk_reports", buffer.tell())
+    return ReportBatch(buffer.getvalue(), len(requests) - len(failed), total_units,
+                       time.perf_counter() - start, min(workers, len(tasks)) if parallel else 1, failed)
@@ -0,0 +1,261 @@
+"""
+FILTER RESULT CACHE + SAVED SEARCHES - PROCESS-WIDE, SHARED BY ALL SESSIONS
+Results are row-position arrays keyed by (dataset version, FilterSignature),
+so agents running the same search against the same sheet version reuse one
+computation. Saved searches are named signatures, optionally shared with
+every agent, persisted to a JSON file (ERP_SAVED_SEARCHES_PATH) that every
+worker process reads and writes under a file lock.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import DatasetHandle
+from erp.filters import FilterSignature, apply_filters
+from erp.projection import with_columns
+
+logger = logging.getLogger(__name__)
+
+# Cached position arrays are bounded by total size, not count
+FILTER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+DEFAULT_SAVED_SEARCHES_PATH = "saved_searches.json"
+
+# ============================================
+# FILTER RESULT CACHE - (VERSION, SIGNATURE) → ROW POSITIONS
+# ============================================
+class FilterResultCache:
+    """Thread-safe LRU of row-position arrays, evicted by total bytes"""
+
+    def __init__(self, max_bytes: int = FILTER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, FilterSignature], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+
+    def positions(self, handle: DatasetHandle, signature: FilterSignature,
+                  cache_name: str = "filter_results") -> Optional[np.ndarray]:
+        """Matching row positions for this version, computed at most once"""
+        key = (handle.version, signature)
+        with self._lock:
+            positions = self._entries.get(key)
+            if positions is not None:
+                self._entries.move_to_end(key)
+        perf.record_cache(cache_name, positions is not None)
+        if positions is not None:
+            return positions
+
+        # Whichever view published this version, filter on every signature column
+        # (keyword columns are lazy - decoded on first keyword search)
+        df = with_columns(handle, signature.columns)
+        if df is None:
+            return None
+        try:
+            # int32 halves the footprint; inventories stay far below 2^31 rows
+            positions = apply_filters(df, signature).astype(np.int32)
+        except KeyError as e:
+            # Export evicted / attached from another worker - never cache a partial filter
+            logger.warning("Cannot filter %s %s: %s", handle.sheet_type, handle.version, e)
+            return None
+        positions.setflags(write=False)
+        self.put(key, positions)
+        return positions
+
+    def put(self, key: Tuple[str, FilterSignature], positions: np.ndarray):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = positions
+            self._bytes += positions.nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def filtered(self, handle: DatasetHandle, signature: FilterSignature,
+                 cache_name: str = "filter_results") -> Optional[pd.DataFrame]:
+        positions = self.positions(handle, signature, cache_name)
+        df = handle.frame()
+        if positions is None or df is None:
+            return None
+        return df.iloc[positions]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+FILTER_CACHE = FilterResultCache()
+
+# ============================================
+# SAVED SEARCHES - NAMED, SHAREABLE, PERSISTED
+# ============================================
+@dataclass
+class SavedSearch:
+    name: str
+    owner: str
+    signature: FilterSignature
+    shared: bool = False
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.owner, self.name)
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "owner": self.owner, "shared": self.shared,
+                "created_at": self.created_at, "signature": self.signature.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SavedSearch":
+        return cls(name=data["name"], owner=data["owner"], shared=bool(data.get("shared")),
+                   created_at=data.get("created_at", ""),
+                   signature=FilterSignature.from_dict(data.get("signature", {})))
+
+
+class SavedSearchStore:
+    """Saved searches for every agent, mirrored to a JSON file shared by all workers
+
+    The file is the source of truth: reads reload it when its stamp changed
+    (another worker saved), writes re-read it under an fcntl lock, apply
+    one change and write it back, so no worker overwrites another's saves.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._searches: "OrderedDict[Tuple[str, str], SavedSearch]" = OrderedDict()
+        self._loaded = False
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._listeners: List[Callable[[str, SavedSearch], None]] = []
+
+    def _resolve_path(self) -> str:
+        return self.path or os.environ.get("ERP_SAVED_SEARCHES_PATH", DEFAULT_SAVED_SEARCHES_PATH)
+
+    @contextmanager
+    def _locked(self):
+        """Host-wide lock on the file - held from re-read to write"""
+        path = self._resolve_path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._resolve_path())
+        except FileNotFoundError:
+            return None
+        # os.replace gives every write a new inode, mtime alone can repeat within a tick
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _ensure_loaded(self) -> List[Tuple[str, SavedSearch]]:
+        """Reload the file if it changed since we last read / wrote it
+
+        Returns the ("saved" / "deleted", search) events other workers caused,
+        for the caller to notify once the lock is released.
+        """
+        stamp = self._file_stamp()
+        if self._loaded and stamp == self._stamp:
+            return []
+        searches: "OrderedDict[Tuple[str, str], SavedSearch]" = OrderedDict()
+        if stamp is not None:
+            try:
+                with open(self._resolve_path(), encoding="utf-8") as f:
+                    for item in json.load(f):
+                        search = SavedSearch.from_dict(item)
+                        searches[search.key] = search
+            except Exception:
+                logger.exception("Could not read saved searches")
+                return []
+        events = [("deleted", s) for key, s in self._searches.items() if key not in searches]
+        events += [("saved", s) for key, s in searches.items() if self._searches.get(key) != s]
+        self._searches = searches
+        self._loaded = True
+        self._stamp = stamp
+        return events
+
+    def _persist(self):
+        path = self._resolve_path()
+        payload = [s.to_dict() for s in self._searches.values()]
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".saved_searches.")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, path)
+            self._stamp = self._file_stamp()
+        except Exception:
+            logger.exception("Could not write saved searches")
+
+    def add_listener(self, listener: Callable[[str, SavedSearch], None]):
+        """listener(event, search) on "saved" / "deleted" - used by the change feed"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _notify(self, events: List[Tuple[str, SavedSearch]]):
+        for event, search in events:
+            for listener in list(self._listeners):
+                try:
+                    listener(event, search)
+                except Exception:
+                    logger.exception("Saved search listener failed")
+
+    def save(self, name: str, owner: str, signature: FilterSignature, shared: bool = False) -> SavedSearch:
+        """Create or overwrite the owner's search with this name"""
+        search = SavedSearch(name=name.strip(), owner=owner, signature=signature, shared=shared)
+        with self._lock, self._locked():
+            events = self._ensure_loaded()
+            self._searches[search.key] = search
+            self._persist()
+        self._notify(events + [("saved", search)])
+        return search
+
+    def delete(self, owner: str, name: str) -> bool:
+        with self._lock, self._locked():
+            events = self._ensure_loaded()
+            search = self._searches.pop((owner, name), None)
+            if search is not None:
+                self._persist()
+                events.append(("deleted", search))
+        self._notify(events)
+        return search is not None
+
+    def visible_to(self, username: str) -> List[SavedSearch]:
+        """The user's own searches first, then ones shared by other agents"""
+        searches = self.all()
+        own = [s for s in searches if s.owner == username]
+        shared = [s for s in searches if s.owner != username and s.shared]
+        return own + shared
+
+    def all(self) -> List[SavedSearch]:
+        with self._lock:
+            events = self._ensure_loaded()
+            searches = list(self._searches.values())
+        self._notify(events)
+        return searches
+
+
+SAVED_SEARCHES = SavedSearchStore()
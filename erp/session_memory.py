@@ -0,0 +1,421 @@
+"""
+SESSION MEMORY - PER-SESSION BUDGET, LRU EVICTION, IDLE REAPER
+Each session's loaded sheets (owner_properties_data, sales_clients_data ...)
+used to sit in its st.session_state until logout, a full private DataFrame
+per tab per session. They now live in one process-wide registry keyed by
+Streamlit session id, sized with memory_usage(deep=True) and held to a
+per-session and a global budget. Over budget, the least recently used
+frame - in this session first, then in any session - is dropped; its
+reload recipe stays behind, so the next access fetches it again through
+the shared dataset registry instead of keeping a copy. Sessions idle past
+ERP_SESSION_IDLE_MINUTES are emptied the same way by a daemon thread.
+
+    ERP_SESSION_BUDGET_MB     per-session budget (default 256)
+    ERP_SESSION_MEMORY_MB     all sessions together (default 1024)
+    ERP_SESSION_IDLE_MINUTES  idle time before a session is reaped (default 30)
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from erp import perf
+from erp.datasets import DatasetHandle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_BUDGET_MB = 256
+DEFAULT_GLOBAL_BUDGET_MB = 1024
+DEFAULT_IDLE_MINUTES = 30
+
+# Session-state entries measured for the budget but owned by st.session_state
+ACCOUNTED_KEYS = ("activity_log", "mgr_report_batch", "owner_unit_sales_handles")
+
+# A reload returns a private object, a handle into the shared registry, or None
+Reload = Callable[[], Any]
+
+# ============================================
+# DEEP SIZE
+# ============================================
+def deep_size(value: Any, _seen: Optional[set] = None) -> int:
+    """Approximate bytes held by value - DataFrames via memory_usage(deep=True)"""
+    if value is None:
+        return 0
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (bytes, bytearray)):
+        return sys.getsizeof(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(v, seen) for v in value)
+    elif hasattr(value, "__dict__"):
+        size += deep_size(vars(value), seen)
+    elif hasattr(value, "__slots__"):
+        size += sum(deep_size(getattr(value, s, None), seen) for s in value.__slots__)
+    return size
+
+# ============================================
+# REGISTRY
+# ============================================
+@dataclass
+class _Slot:
+    value: Any = None                       # private copy - None once evicted
+    handle: Optional[DatasetHandle] = None  # or a reference into the shared registry
+    reload: Optional[Reload] = None         # None: accounted only, never evicted
+    nbytes: int = 0
+    last_access: float = 0.0
+    evictions: int = 0
+    token: Tuple = ()                       # (id, len) of an accounted value last measured
+
+    @property
+    def resident(self) -> bool:
+        return self.value is not None
+
+    @property
+    def state(self) -> str:
+        if self.reload is None:
+            return "session_state"
+        if self.value is not None:
+            return "cached"
+        return "shared" if self.handle is not None else "evicted"
+
+
+@dataclass
+class _Session:
+    username: str = ""
+    last_seen: float = 0.0
+    slots: "OrderedDict[str, _Slot]" = field(default_factory=OrderedDict)
+
+    def private_bytes(self) -> int:
+        return sum(s.nbytes for s in self.slots.values() if s.resident or s.reload is None)
+
+
+class SessionMemory:
+    """Thread-safe per-session object cache with LRU eviction and reload on miss"""
+
+    def __init__(self, session_budget: int, global_budget: int, idle_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self.evictions = 0
+        self.reaped = 0
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, _Session] = {}
+
+    @classmethod
+    def from_env(cls) -> "SessionMemory":
+        def number(name: str, default: float) -> float:
+            try:
+                return float(os.environ.get(name, "") or default)
+            except ValueError:
+                return default
+        return cls(
+            session_budget=int(number("ERP_SESSION_BUDGET_MB", DEFAULT_SESSION_BUDGET_MB) * 1e6),
+            global_budget=int(number("ERP_SESSION_MEMORY_MB", DEFAULT_GLOBAL_BUDGET_MB) * 1e6),
+            idle_seconds=number("ERP_SESSION_IDLE_MINUTES", DEFAULT_IDLE_MINUTES) * 60,
+        )
+
+    def _session(self, session_id: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(last_seen=self.clock())
+        return session
+
+    # ---------- one session's entries ----------
+    def put(self, session_id: str, key: str, value: Any, reload: Reload):
+        """Keep value for this session; reload rebuilds it after an eviction
+
+        A DatasetHandle is held as a reference into the shared registry - get
+        returns its frame, and only private values count against the budget.
+        """
+        shared = isinstance(value, DatasetHandle)
+        nbytes = deep_size(value.frame() if shared else value)
+        with self._lock:
+            session = self._session(session_id)
+            now = self.clock()
+            session.last_seen = now
+            session.slots[key] = _Slot(value=None if shared else value, handle=value if shared else None,
+                                       reload=reload, nbytes=nbytes, last_access=now)
+            session.slots.move_to_end(key)
+            self._enforce(protect=(session_id, key))
+
+    def get(self, session_id: str, key: str) -> Any:
+        """The stored value, reloaded transparently if it was evicted; None if never put"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            slot = session.slots.get(key) if session is not None else None
+            if slot is None or slot.reload is None:
+                return None
+            now = self.clock()
+            session.last_seen = slot.last_access = now
+            session.slots.move_to_end(key)
+            value = slot.value
+            if value is None and slot.handle is not None:
+                value = slot.handle.frame()
+            reload = slot.reload
+        perf.record_cache("session_memory", value is not None)
+        if value is not None:
+            return value
+
+        with perf.timed("session_memory_reload"):
+            try:
+                fresh = reload()
+            except Exception:
+                logger.exception("Session data reload failed for %s", key)
+                fresh = None
+        if fresh is None or (isinstance(fresh, pd.DataFrame) and fresh.empty):
+            return None
+        shared = isinstance(fresh, DatasetHandle)
+        value = fresh.frame() if shared else fresh
+        nbytes = deep_size(value)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            slot = session.slots.get(key) if session is not None else None
+            if slot is not None and slot.reload is reload:
+                slot.value, slot.handle = (None, fresh) if shared else (fresh, None)
+                slot.nbytes = nbytes
+                if not shared:
+                    self._enforce(protect=(session_id, key))
+        return value
+
+    def has(self, session_id: str, key: str) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            slot = session.slots.get(key) if session is not None else None
+            return slot is not None and slot.reload is not None
+
+    def drop(self, session_id: str, key: str):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.slots.pop(key, None)
+
+    def account(self, session_id: str, key: str, value: Any):
+        """Measure an object st.session_state keeps (activity log ...) without owning it"""
+        token = (id(value), len(value) if hasattr(value, "__len__") else 0)
+        with self._lock:
+            slot = self._session(session_id).slots.get(key)
+            if slot is not None and slot.reload is None and slot.token == token:
+                return
+        nbytes = deep_size(value) if value is not None else 0
+        with self._lock:
+            session = self._session(session_id)
+            if value is None:
+                session.slots.pop(key, None)
+                return
+            slot = session.slots.get(key)
+            if slot is None or slot.reload is not None:
+                slot = session.slots[key] = _Slot(last_access=self.clock())
+            slot.nbytes, slot.token = nbytes, token
+            self._enforce()
+
+    def touch(self, session_id: str, username: str = ""):
+        with self._lock:
+            session = self._session(session_id)
+            session.last_seen = self.clock()
+            session.username = username or ""
+
+    def forget(self, session_id: str):
+        """Drop everything a session holds - logout or a closed browser tab"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    # ---------- eviction ----------
+    def _evict(self, slot: _Slot):
+        slot.value = None
+        slot.nbytes = 0
+        slot.evictions += 1
+        self.evictions += 1
+
+    def _enforce(self, protect: Optional[Tuple[str, str]] = None):
+        """Evict LRU frames - this session over its budget, then anyone over the global one"""
+        def candidates(sessions):
+            return [(slot.last_access, sid, key, slot)
+                    for sid, session in sessions for key, slot in session.slots.items()
+                    if slot.resident and slot.reload is not None and (sid, key) != protect]
+
+        for sid, session in self._sessions.items():
+            if session.private_bytes() <= self.session_budget:
+                continue
+            for _, _, _, slot in sorted(candidates([(sid, session)]), key=lambda c: c[0]):
+                self._evict(slot)
+                if session.private_bytes() <= self.session_budget:
+                    break
+
+        total = sum(s.private_bytes() for s in self._sessions.values())
+        if total <= self.global_budget:
+            return
+        for _, _, _, slot in sorted(candidates(self._sessions.items()), key=lambda c: c[0]):
+            freed = slot.nbytes
+            self._evict(slot)
+            total -= freed
+            if total <= self.global_budget:
+                break
+
+    def reap(self, active: Optional[Callable[[str], bool]] = None) -> Tuple[int, int]:
+        """Empty sessions idle past the timeout - forget them if the browser is gone
+
+        active(session_id): False once the client disconnected. A session still
+        connected keeps its reload recipes and fetches again on its next access.
+        Returns (sessions emptied, sessions forgotten).
+        """
+        emptied = forgotten = 0
+        with self._lock:
+            now = self.clock()
+            for sid in list(self._sessions):
+                session = self._sessions[sid]
+                if now - session.last_seen <= self.idle_seconds:
+                    continue
+                if active is not None and not active(sid):
+                    del self._sessions[sid]
+                    forgotten += 1
+                else:
+                    resident = [s for s in session.slots.values() if s.resident and s.reload is not None]
+                    for slot in resident:
+                        self._evict(slot)
+                    emptied += bool(resident)
+            self.reaped += emptied + forgotten
+        return emptied, forgotten
+
+    # ---------- reporting ----------
+    def breakdown(self) -> List[Dict]:
+        """One row per session entry, largest first"""
+        with self._lock:
+            now = self.clock()
+            rows = [{
+                "session": sid[:8],
+                "user": session.username,
+                "key": key,
+                "state": slot.state,
+                "mb": slot.nbytes / 1e6,
+                "idle_s": round(now - slot.last_access, 1) if slot.reload is not None else round(now - session.last_seen, 1),
+                "evictions": slot.evictions,
+            } for sid, session in self._sessions.items() for key, slot in session.slots.items()]
+        return sorted(rows, key=lambda r: -r["mb"])
+
+    def totals(self) -> Dict:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            return {
+                "sessions": len(sessions),
+                "private_bytes": sum(s.private_bytes() for s in sessions),
+                "shared_bytes": sum(slot.nbytes for s in sessions for slot in s.slots.values()
+                                    if slot.state == "shared"),
+                "evictions": self.evictions,
+                "reaped": self.reaped,
+            }
+
+
+SESSION_MEMORY = SessionMemory.from_env()
+
+# ============================================
+# CURRENT SESSION - STREAMLIT SCRIPT CONTEXT
+# ============================================
+def current_session_id() -> str:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else "local"
+
+def session_put(key: str, value: Any, reload: Reload):
+    SESSION_MEMORY.put(current_session_id(), key, value, reload)
+
+def session_get(key: str) -> Any:
+    return SESSION_MEMORY.get(current_session_id(), key)
+
+def session_has(key: str) -> bool:
+    return SESSION_MEMORY.has(current_session_id(), key)
+
+def shared_reload(url: str, sheet_type: str, version: Optional[str] = None) -> Reload:
+    """Reload recipe: the session's own version from the registry or the host's
+    shared store, else fetch again (then possibly a newer version)"""
+    def reload() -> Any:
+        from erp.datasets import REGISTRY
+        from erp.loaders import load_sheet_handle
+        from erp.projection import add_columns, sheet_columns
+        from erp.shared_store import get_store
+
+        if version is not None:
+            df = REGISTRY.get(version)
+            if df is not None:
+                return DatasetHandle(sheet_type, version, len(df))
+            store = get_store()
+            # Memory-mapped - the pages are the host's one shared copy
+            df = store.attach(version, sheet_type) if store is not None else None
+            if df is not None:
+                # Another worker may have shared a narrower view of this version
+                df = add_columns(df, version, sheet_columns(df))
+                if len(df.columns) == len(sheet_columns(df)):
+                    return df
+        return load_sheet_handle(url, sheet_type, trigger_tracking=False)
+    return reload
+
+def touch_session():
+    """Once per script run - mark this session alive, re-measure its session_state extras"""
+    import streamlit as st
+
+    session_id = current_session_id()
+    user = st.session_state.get("user")
+    SESSION_MEMORY.touch(session_id, user["username"] if user else "")
+    for key in ACCOUNTED_KEYS:
+        SESSION_MEMORY.account(session_id, key, st.session_state.get(key))
+    start_reaper()
+
+def forget_session():
+    SESSION_MEMORY.forget(current_session_id())
+
+# ============================================
+# IDLE REAPER - DAEMON THREAD, ONCE PER PROCESS
+# ============================================
+_reaper_lock = threading.Lock()
+_reaper: Optional[threading.Thread] = None
+
+
+def runtime_active() -> Optional[Callable[[str], bool]]:
+    """Session liveness from the Streamlit server, when there is one"""
+    try:
+        from streamlit.runtime import Runtime
+        if not Runtime.exists():
+            return None
+        runtime = Runtime.instance()
+        return runtime.is_active_session
+    except Exception:
+        return None
+
+
+def _reap_forever(memory: SessionMemory):
+    interval = max(5.0, min(60.0, memory.idle_seconds / 4))
+    while True:
+        time.sleep(interval)
+        try:
+            memory.reap(runtime_active())
+        except Exception:
+            logger.exception("Session reaper failed")
+
+
+def start_reaper(memory: SessionMemory = SESSION_MEMORY) -> threading.Thread:
+    global _reaper
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_forever, args=(memory,), name="erp-session-reaper", daemon=True)
+            _reaper.start()
+        return _reaper
@@ -0,0 +1,233 @@
+"""
+SHARED DATASET STORE - ONE PARSED COPY PER HOST
+With several Streamlit worker processes on one host, each parsed sheet
+version is written once as an uncompressed Arrow IPC file under
+ERP_SHARED_STORE_DIR (a tmpfs such as /dev/shm/erp-datasets). Every worker
+memory-maps that file and builds its DataFrame over the mapped buffers
+(zero-copy: numeric columns are numpy views, strings stay Arrow-backed),
+so the page cache holds the data once however many workers attach.
+
+A manifest.json (replaced atomically, written under a file lock) names the
+latest version per sheet type. A watcher thread in each worker polls it and
+publishes new versions of the sheet types that worker already holds into
+its DatasetRegistry - the registry swap is atomic, sessions holding an
+older handle keep reading the old file until they reload. Sheets a worker
+never loaded (another agent's sales sheet) are left for it to attach on
+first load, so they do not push its own versions out of the registry. Disabled unless ERP_SHARED_STORE_DIR is set.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+
+from erp import perf
+
+logger = logging.getLogger(__name__)
+
+# Sheets with credentials are never written outside the process - matched by
+# prefix, so "users_test" (the login page's probe) and the like stay private too
+PRIVATE_SHEETS = {"users", "login"}
+# Versions kept on disk per sheet type (older files removed; mapped ones live on until unmapped)
+MAX_SHARED_VERSIONS = 4
+WATCH_INTERVAL_SECONDS = 1.0
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+
+
+def is_private(sheet_type: Optional[str]) -> bool:
+    """Credentials sheets - never shared, never attached (unknown types count as private)"""
+    if not sheet_type:
+        return True
+    name = sheet_type.lower()
+    return any(name == p or name.startswith(p + "_") for p in PRIVATE_SHEETS)
+
+class SharedDatasetStore:
+    """Arrow IPC files + manifest in one directory, shared by every worker on the host"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, mode=0o700, exist_ok=True)
+        self._seen: Dict[str, str] = {}
+        self._manifest_stamp = None
+        self._watcher: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def path_for(self, version: str) -> str:
+        return os.path.join(self.root, f"{version}.arrow")
+
+    # --- data files ---
+    def attach(self, version: str, sheet_type: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """DataFrame over the memory-mapped file, or None if it is not (or no longer) there
+
+        sheet_type: refuse credentials sheets outright, whatever the store holds.
+        """
+        import pyarrow as pa
+
+        if sheet_type is not None and is_private(sheet_type):
+            return None
+        try:
+            with perf.timed("shared_store_attach"):
+                table = pa.ipc.open_file(pa.memory_map(self.path_for(version))).read_all()
+                df = table.to_pandas(split_blocks=True)
+        except (OSError, pa.ArrowInvalid):
+            return None
+        perf.record_rows("shared_store_attach", len(df))
+        return df
+
+    def write(self, version: str, df: pd.DataFrame) -> bool:
+        """Write once, atomically (temp file + os.replace); False if df has no Arrow form"""
+        import pyarrow as pa
+
+        path = self.path_for(version)
+        if os.path.exists(path):
+            return True
+        try:
+            with perf.timed("shared_store_write"):
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f".{version}.")
+                try:
+                    with os.fdopen(fd, "wb") as f, pa.ipc.new_file(f, table.schema) as writer:
+                        writer.write_table(table)
+                    os.replace(tmp, path)
+                except BaseException:
+                    os.unlink(tmp)
+                    raise
+        except (pa.ArrowException, OSError) as e:
+            # Mixed-type object columns etc. - this version stays process-local
+            logger.warning("Shared store skipped %s: %s", version, e)
+            return False
+        perf.record_bytes("shared_store", os.path.getsize(path))
+        return True
+
+    def share(self, sheet_type: str, version: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Store + announce a freshly parsed frame; returns the mapped frame to keep instead"""
+        if is_private(sheet_type) or not self.write(version, df):
+            return df
+        self.announce(sheet_type, version, len(df))
+        attached = self.attach(version, sheet_type)
+        return attached if attached is not None else df
+
+    # --- manifest ---
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.root, LOCK_NAME), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def manifest(self) -> Dict:
+        try:
+            with open(os.path.join(self.root, MANIFEST_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"seq": 0, "sheets": {}}
+
+    def announce(self, sheet_type: str, version: str, rows: int):
+        """Make version the latest of sheet_type for every worker, drop old files"""
+        if is_private(sheet_type):
+            return
+        with self._locked():
+            manifest = self.manifest()
+            entry = manifest["sheets"].get(sheet_type, {"history": []})
+            if entry.get("version") == version:
+                return
+            history = [version] + [v for v in entry.get("history", []) if v != version]
+            manifest["sheets"][sheet_type] = {
+                "version": version, "rows": rows, "pid": os.getpid(),
+                "published_at": datetime.now().isoformat(timespec="seconds"),
+                "history": history[:MAX_SHARED_VERSIONS],
+            }
+            manifest["seq"] = manifest.get("seq", 0) + 1
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".manifest.")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp, os.path.join(self.root, MANIFEST_NAME))
+            self._collect(manifest)
+        with self._lock:
+            self._seen[sheet_type] = version
+
+    def _collect(self, manifest: Dict):
+        keep = {v for entry in manifest["sheets"].values() for v in entry.get("history", [])}
+        for name in os.listdir(self.root):
+            if name.endswith(".arrow") and name[:-len(".arrow")] not in keep:
+                try:
+                    os.unlink(os.path.join(self.root, name))
+                except FileNotFoundError:
+                    pass
+
+    # --- version notifications ---
+    def poll(self, registry) -> int:
+        """Publish newer versions of sheet types registry holds, announced by other workers; returns how many"""
+        try:
+            stamp = os.stat(os.path.join(self.root, MANIFEST_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        if stamp == self._manifest_stamp:
+            return 0
+        self._manifest_stamp = stamp
+
+        published = 0
+        for sheet_type, entry in self.manifest()["sheets"].items():
+            version = entry["version"]
+            # Only refresh what this worker holds - every agent's sales sheet would churn the LRU
+            if is_private(sheet_type) or registry.latest(sheet_type) is None:
+                continue
+            with self._lock:
+                if self._seen.get(sheet_type) == version:
+                    continue
+                self._seen[sheet_type] = version
+            df = registry.get(version)
+            if df is None:
+                df = self.attach(version, sheet_type)
+            if df is not None:
+                registry.publish(sheet_type, version, df)
+                published += 1
+        return published
+
+    def watch(self, registry, interval: float = WATCH_INTERVAL_SECONDS):
+        """Start the manifest watcher thread (once per process)"""
+        with self._lock:
+            if self._watcher is not None:
+                return
+
+            def run():
+                while True:
+                    try:
+                        self.poll(registry)
+                    except Exception:
+                        logger.exception("Shared store watcher failed")
+                    time.sleep(interval)
+
+            self._watcher = threading.Thread(target=run, name="shared-store-watch", daemon=True)
+            self._watcher.start()
+
+
+_store: Optional[SharedDatasetStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[SharedDatasetStore]:
+    """The host-wide store when ERP_SHARED_STORE_DIR is set (watcher started on first use)"""
+    global _store
+    root = os.environ.get("ERP_SHARED_STORE_DIR", "").strip()
+    if not root:
+        return None
+    with _store_lock:
+        if _store is None or _store.root != root:
+            from erp.datasets import REGISTRY
+
+            _store = SharedDatasetStore(root)
+            _store.watch(REGISTRY)
+        return _store
@@ -0,0 +1,55 @@
+"""
+SESSION STATE + ACTIVITY TRACKING - IN MEMORY ONLY
+"""
+
+from datetime import datetime
+
+import streamlit as st
+
+# ============================================
+# SESSION STATE INITIALIZATION - ADDED ACTIVITY LOG
+# ============================================
+def init_session_state():
+    """Initialize session state with activity tracking"""
+    if 'user' not in st.session_state:
+        st.session_state.user = None
+    if 'current_page' not in st.session_state:
+        st.session_state.current_page = None
+    if 'sheets_urls' not in st.session_state:
+        st.session_state.sheets_urls = {
+            "users": st.secrets["google_sheets"]["users_sheet_url"],
+            "properties": st.secrets["google_sheets"]["properties_sheet_url"],
+            "mother_clients": st.secrets["google_sheets"]["mother_clients_sheet_url"],
+            "login": st.secrets["google_sheets"]["login_sheet_url"],
+            "transactions": st.secrets["google_sheets"]["transactions_sheet_url"]
+        }
+    if 'sheets_metadata' not in st.session_state:
+        st.session_state.sheets_metadata = {}
+    if 'activity_log' not in st.session_state:
+        st.session_state.activity_log = []
+    if 'users_sheet_configured' not in st.session_state:
+        st.session_state.users_sheet_configured = True
+
+# ============================================
+# ACTIVITY TRACKING - IN MEMORY ONLY
+# ============================================
+def track_activity(action: str, details: dict = None):
+    """Track user activity in session state only"""
+    if st.session_state.user:
+        log_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "username": st.session_state.user['username'],
+            "role": st.session_state.user['role'],
+            "action": action,
+            "details": details or {}
+        }
+        st.session_state.activity_log.append(log_entry)
+        # Keep last 1000 entries
+        if len(st.session_state.activity_log) > 1000:
+            st.session_state.activity_log = st.session_state.activity_log[-1000:]
+
+def get_today_activity():
+    """Get today's activity from session log"""
+    today = datetime.now().date().isoformat()
+    return [log for log in st.session_state.activity_log
+            if log['timestamp'].startswith(today)]
@@ -0,0 +1,79 @@
+"""
+PAGE CONFIGURATION + PROFESSIONAL CSS - EXACTLY AS ORIGINAL
+"""
+
+PAGE_CONFIG = {
+    "page_title": "Real Estate ERP Pro",
+    "page_icon": "🏢",
+    "layout": "wide",
+    "initial_sidebar_state": "expanded",
+}
+
+APP_CSS = """
+    <style>
+    .main-header {
+        font-size: 2.5rem;
+        color: #1E3A8A;
+        font-weight: 700;
+        margin-bottom: 1rem;
+        text-align: center;
+        padding: 1rem;
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        background-clip: text;
+    }
+    .metric-card {
+        background: white;
+        padding: 20px;
+        border-radius: 12px;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+        border: 1px solid #e5e7eb;
+        margin-bottom: 10px;
+    }
+    .data-table {
+        background: white;
+        border-radius: 10px;
+        overflow: hidden;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
+    }
+    .filter-card {
+        background: #f8fafc;
+        padding: 15px;
+        border-radius: 10px;
+        border-left: 4px solid #4F46E5;
+        margin-bottom: 10px;
+    }
+    .success-box {
+        background: #D1FAE5;
+        color: #065F46;
+        padding: 12px;
+        border-radius: 8px;
+        border-left: 4px solid #10B981;
+        margin: 8px 0;
+    }
+    .warning-box {
+        background: #FEF3C7;
+        color: #92400E;
+        padding: 12px;
+        border-radius: 8px;
+        border-left: 4px solid #F59E0B;
+        margin: 8px 0;
+    }
+    .info-box {
+        background: #DBEAFE;
+        color: #1E40AF;
+        padding: 12px;
+        border-radius: 8px;
+        border-left: 4px solid #3B82F6;
+        margin: 8px 0;
+    }
+    .monitor-table {
+        background: white;
+        padding: 15px;
+        border-radius: 10px;
+        border: 1px solid #e5e7eb;
+        margin: 10px 0;
+    }
+    </style>
+"""
@@ -0,0 +1,435 @@
+"""
+TRANSACTIONS ↔ PROPERTIES - INDEXED JOIN FOR SOLD STATUS AND DAYS ON MARKET
+Transactions are reduced once per version to one row per unit (count,
+first / last sale date, last realized amount) in a TransactionIndex keyed
+by unit ID. Joining a properties version is then one hash-table lookup per
+unit (Index.get_indexer) plus array gathers - no merge, no 1M-row copy.
+Results are cached per (properties, transactions) version pair.
+
+A new transactions version is compared with the newest indexed one row by
+row at aligned positions (transactions are appended), and only the units
+whose transactions were added, changed or removed are re-aggregated; a new
+properties version re-looks-up only the
+rows whose ID / price / status / listing date changed or whose unit has new
+transactions. Unit positions in the index never move, so reused rows stay valid.
+
+Listing date: a listed / created date column when the sheet has one, else
+the first time inventory history (erp.history) saw the unit.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import REGISTRY as DATASETS, DatasetHandle
+
+# Share of transactions that may change before an index is rebuilt from scratch
+INCREMENTAL_MAX_CHANGED = 0.3
+# Transaction indexes / joins kept in memory (least recently used evicted first)
+MAX_CACHED_INDEXES = 3
+MAX_CACHED_JOINS = 4
+
+SOLD_STATUSES = {"مباع", "sold", "تم البيع"}
+LISTED_MARKERS = ("listed", "listing_date", "created", "date_added")
+STATUS_SOLD, STATUS_AVAILABLE = "مباع", "متاح"
+
+_NAT = np.iinfo(np.int64).min
+_NO_DATE = np.iinfo(np.int64).max
+_NS_PER_DAY = 86_400 * 10**9
+
+# ============================================
+# COLUMN DETECTION
+# ============================================
+def _find(columns, *needles) -> Optional[str]:
+    for needle in needles:
+        for col in columns:
+            if needle in col.lower():
+                return col
+    return None
+
+
+def detect_transaction_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    """Transaction ID, unit ID, amount and date columns (None when absent)"""
+    cols = list(df.columns)
+    tx_id = next((c for c in cols if "transaction" in c.lower() and "id" in c.lower()), None)
+    return {
+        "id": tx_id,
+        "unit": _find(cols, "unit_id", "unit"),
+        "amount": _find(cols, "amount", "price"),
+        "date": _find(cols, "date"),
+    }
+
+
+def detect_property_columns(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    from erp.change_feed import detect_id_column
+
+    cols = list(df.columns)
+    return {
+        "id": detect_id_column(df),
+        "price": _find(cols, "price_total", "price"),
+        "status": _find(cols, "unit_status", "status"),
+        "listed": _find(cols, *LISTED_MARKERS),
+    }
+
+
+def _dates(series: Optional[pd.Series], n: int) -> np.ndarray:
+    """datetime64[ns] as int64, NaT as _NAT"""
+    if series is None:
+        return np.full(n, _NAT, dtype=np.int64)
+    parsed = series if series.dtype.kind == "M" else pd.to_datetime(series, errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+def _numbers(series: Optional[pd.Series], n: int) -> np.ndarray:
+    if series is None:
+        return np.full(n, np.nan)
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+# ============================================
+# TRANSACTION INDEX - ONE ROW PER UNIT
+# ============================================
+@dataclass
+class TransactionIndex:
+    version: str
+    columns: Dict[str, Optional[str]]
+    units: pd.Index             # stripped unit IDs; positions are stable across incremental builds
+    count: np.ndarray
+    first_sale: np.ndarray      # int64 ns, _NAT when unknown
+    last_sale: np.ndarray
+    last_amount: np.ndarray     # amount of the latest transaction
+    total_amount: np.ndarray
+    unit_codes: np.ndarray      # unit position per transaction row, for the next incremental build
+    # Unit positions re-aggregated relative to base_version (None: full build)
+    base_version: Optional[str] = None
+    changed_units: Optional[np.ndarray] = None
+    stats: Dict = field(default_factory=dict)
+
+
+def _aggregate(codes: np.ndarray, dates: np.ndarray, amounts: np.ndarray, n_units: int):
+    """Per-unit count, first / last sale, latest amount and total of the given rows"""
+    count = np.bincount(codes, minlength=n_units)
+    total = np.bincount(codes, weights=np.nan_to_num(amounts), minlength=n_units)
+    valid = dates != _NAT
+    by_date = np.where(valid, dates, _NO_DATE)
+    order = np.lexsort((by_date, codes))
+    first_sale = np.full(n_units, _NAT, dtype=np.int64)
+    last_sale = np.full(n_units, _NAT, dtype=np.int64)
+    last_amount = np.full(n_units, np.nan)
+    if order.size:
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        units = sorted_codes[starts]
+        # Dated rows sort before undated ones; the latest sale is the last dated row
+        n_valid = np.bincount(codes, weights=valid, minlength=n_units).astype(np.int64)[units]
+        n_rows = count[units]
+        last = starts + np.where(n_valid > 0, n_valid, n_rows) - 1
+        first_sale[units] = np.where(n_valid > 0, by_date[order[starts]], _NAT)
+        last_sale[units] = np.where(n_valid > 0, by_date[order[last]], _NAT)
+        last_amount[units] = amounts[order[last]]
+    return count, first_sale, last_sale, last_amount, total
+
+
+def _equal(a: pd.Series, b: pd.Series) -> np.ndarray:
+    """Elementwise equality, NA equal to NA"""
+    a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+    both_na = (a.isna() & b.isna()).to_numpy()
+    try:
+        return (a == b).to_numpy(dtype=bool, na_value=False) | both_na
+    except TypeError:
+        return both_na
+
+
+def aligned_rows(df: pd.DataFrame, old: pd.DataFrame, columns) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows unchanged between two versions of a log sheet: (new mask, old mask)
+
+    Transactions are appended at the bottom (or top), so rows are compared
+    at aligned positions - column compares in C, no hashing of 1M rows.
+    """
+    n, m = len(df), len(old)
+    k = min(n, m)
+    best = None
+    for new_at, old_at in ((0, 0), (n - k, m - k)):
+        same = np.ones(k, dtype=bool)
+        for col in columns:
+            same &= _equal(df[col].iloc[new_at:new_at + k], old[col].iloc[old_at:old_at + k])
+        if best is None or same.sum() > best[2].sum():
+            best = (new_at, old_at, same)
+        if same.all():
+            break
+    new_at, old_at, same = best
+    new_same, old_same = np.zeros(n, dtype=bool), np.zeros(m, dtype=bool)
+    new_same[new_at:new_at + k], old_same[old_at:old_at + k] = same, same
+    return new_same, old_same
+
+
+def unit_keys(series: pd.Series) -> pd.Index:
+    """Stripped IDs - the join key on both sides"""
+    return pd.Index(series.astype(str).str.strip())
+
+
+@perf.timed("unit_sales_index")
+def build_transaction_index(version: str, df: pd.DataFrame, previous: Optional[TransactionIndex] = None,
+                            previous_df: Optional[pd.DataFrame] = None) -> Optional[TransactionIndex]:
+    """Per-unit sales of df - incremental against `previous` (built from previous_df)
+    when few transactions changed"""
+    start = time.perf_counter()
+    cols = detect_transaction_columns(df)
+    if cols["unit"] is None:
+        return None
+    n = len(df)
+
+    def dates_amounts(rows: Optional[np.ndarray] = None):
+        # Parsed only for the rows being aggregated
+        part = df if rows is None else df.iloc[rows]
+        return (_dates(part[cols["date"]] if cols["date"] else None, len(part)),
+                _numbers(part[cols["amount"]] if cols["amount"] else None, len(part)))
+
+    new_same = None
+    if previous is not None and previous_df is not None and previous.columns == cols:
+        new_same, old_same = aligned_rows(df, previous_df, [c for c in cols.values() if c])
+        if (~new_same).sum() > INCREMENTAL_MAX_CHANGED * n:
+            new_same = None
+
+    if new_same is None:
+        # FULL BUILD
+        codes, uniques = pd.factorize(df[cols["unit"]].astype(str).str.strip())
+        units = pd.Index(uniques)
+        count, first_sale, last_sale, last_amount, total = _aggregate(codes, *dates_amounts(), len(units))
+        changed_units, rows_aggregated = None, n
+    else:
+        # INCREMENTAL: unchanged rows keep their unit code, new units are appended,
+        # only units with an added / changed / removed transaction are re-aggregated
+        codes = np.empty(n, dtype=np.int64)
+        codes[new_same] = previous.unit_codes[old_same]
+        fresh = np.flatnonzero(~new_same)
+        keys = unit_keys(df[cols["unit"]].iloc[fresh])
+        known = previous.units.get_indexer(keys)
+        unseen = keys[known < 0].unique()
+        units = previous.units.append(unseen) if len(unseen) else previous.units
+        codes[fresh] = units.get_indexer(keys) if len(unseen) else known
+        changed_units = np.unique(np.concatenate([codes[fresh], previous.unit_codes[~old_same]]))
+
+        grow = len(units) - len(previous.units)
+        count = np.r_[previous.count, np.zeros(grow, dtype=previous.count.dtype)]
+        first_sale = np.r_[previous.first_sale, np.full(grow, _NAT, dtype=np.int64)]
+        last_sale = np.r_[previous.last_sale, np.full(grow, _NAT, dtype=np.int64)]
+        last_amount = np.r_[previous.last_amount, np.full(grow, np.nan)]
+        total = np.r_[previous.total_amount, np.zeros(grow)]
+
+        affected = np.zeros(len(units), dtype=bool)
+        affected[changed_units] = True
+        rows = np.flatnonzero(affected[codes])
+        part = _aggregate(codes[rows], *dates_amounts(rows), len(units))
+        for target, values in zip((count, first_sale, last_sale, last_amount, total), part):
+            target[changed_units] = values[changed_units]
+        rows_aggregated = int(rows.size)
+
+    stats = {
+        "mode": "full" if new_same is None else "incremental",
+        "transactions": n, "units": len(units), "rows_aggregated": rows_aggregated,
+        "units_changed": None if changed_units is None else int(changed_units.size),
+        "seconds": time.perf_counter() - start,
+    }
+    perf.record_rows("unit_sales_index", rows_aggregated)
+    return TransactionIndex(version, cols, units, count, first_sale, last_sale, last_amount, total,
+                            codes.astype(np.int64), None if new_same is None else previous.version,
+                            changed_units, stats)
+
+# ============================================
+# UNIT SALES - ONE PROPERTIES × TRANSACTIONS VERSION PAIR
+# ============================================
+def _listed_from_history(ids: pd.Series) -> Optional[np.ndarray]:
+    """First time inventory history saw each unit (int64 ns, _NAT when never)"""
+    from erp.history import get_history
+
+    store = get_history()
+    if store is None:
+        return None
+    events = store.events()
+    if events.empty:
+        return None
+    first = events[events["event"] == "listed"].drop_duplicates("id", keep="first")
+    seen = pd.Series(first["taken_at"].to_numpy(dtype="datetime64[ns]").view(np.int64), index=first["id"].to_numpy())
+    at = seen.index.get_indexer(ids.astype(str).str.strip())
+    return np.where(at >= 0, seen.to_numpy()[np.maximum(at, 0)], _NAT)
+
+
+@dataclass
+class UnitSales:
+    properties_version: str
+    transactions_version: str
+    row_keys: pd.Index          # stripped unit ID per properties row
+    row_hash: np.ndarray        # hash of the joined property columns
+    unit_pos: np.ndarray        # position in the TransactionIndex, -1 when never sold
+    listed: np.ndarray          # int64 ns listing date, _NAT when unknown
+    index: TransactionIndex
+    listed_source: Optional[str]
+    stats: Dict = field(default_factory=dict)
+    # Built frame and the day it was built for (days on market of unsold units grow daily)
+    _frame: Optional[pd.DataFrame] = None
+    _frame_day: Optional[pd.Timestamp] = None
+
+    def frame(self, properties: pd.DataFrame, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """One row per unit: status, sale date, realized vs listing price, days on market"""
+        today = (now or pd.Timestamp.now()).normalize()
+        if self._frame is not None and self._frame_day == today:
+            return self._frame
+        cols = detect_property_columns(properties)
+        pos = np.maximum(self.unit_pos, 0)
+        has_tx = (self.unit_pos >= 0) & (self.index.count[pos] > 0)
+        listing_price = _numbers(properties[cols["price"]] if cols["price"] else None, len(properties))
+        sheet_status = properties[cols["status"]].astype(str).str.strip() if cols["status"] else None
+        sheet_sold = sheet_status.isin(SOLD_STATUSES).to_numpy() if sheet_status is not None else np.zeros(len(properties), bool)
+
+        first_sale = np.where(has_tx, self.index.first_sale[pos], _NAT)
+        realized = np.where(has_tx, self.index.last_amount[pos], np.nan)
+        end = np.where(has_tx, first_sale, today.value)
+        known = (self.listed != _NAT) & (end != _NAT)
+        days = np.where(known, (end - np.where(known, self.listed, 0)) / _NS_PER_DAY, np.nan)
+
+        out = pd.DataFrame({
+            "unit_id": properties[cols["id"]].to_numpy() if cols["id"] else np.arange(len(properties)),
+            "status": np.where(has_tx | sheet_sold, STATUS_SOLD, STATUS_AVAILABLE),
+            # Sheet says available but a transaction exists (or the reverse)
+            "status_mismatch": has_tx != sheet_sold,
+            "transactions": np.where(has_tx, self.index.count[pos], 0),
+            "listed_at": pd.to_datetime(self.listed, unit="ns"),
+            "sold_at": pd.to_datetime(first_sale, unit="ns"),
+            "days_on_market": days,
+            "listing_price": listing_price,
+            "realized_price": realized,
+            "price_gap_pct": (realized - listing_price) / np.where(listing_price > 0, listing_price, np.nan) * 100,
+        }, index=properties.index)
+        for col in ("area", "unit_type"):
+            if col in properties.columns:
+                out.insert(1, col, properties[col].to_numpy())
+        self._frame, self._frame_day = out, today
+        return out
+
+
+def summary_by(frame: pd.DataFrame, column: str = "area") -> pd.DataFrame:
+    """Units, sold, conversion, median days on market and realized / listing gap per group"""
+    if column not in frame.columns:
+        return pd.DataFrame()
+    sold = frame["status"] == STATUS_SOLD
+    grouped = frame.assign(sold=sold, sold_days=frame["days_on_market"].where(sold)).groupby(column, observed=True)
+    summary = grouped.agg(units=("unit_id", "size"), sold=("sold", "sum"),
+                          median_days_to_sale=("sold_days", "median"),
+                          median_price_gap_pct=("price_gap_pct", "median"),
+                          realized_total=("realized_price", "sum"))
+    summary["conversion_pct"] = summary["sold"] / summary["units"] * 100
+    return summary.reset_index().sort_values("units", ascending=False)
+
+
+@perf.timed("unit_sales_join")
+def join_units(properties_version: str, properties: pd.DataFrame, index: TransactionIndex,
+               previous: Optional[UnitSales] = None) -> Optional[UnitSales]:
+    """Look every unit up in the index - only changed rows when `previous` is close"""
+    start = time.perf_counter()
+    cols = detect_property_columns(properties)
+    if cols["id"] is None:
+        return None
+    row_keys = unit_keys(properties[cols["id"]])
+    used = [c for c in (cols["id"], cols["price"], cols["status"], cols["listed"]) if c]
+    row_hash = pd.util.hash_pandas_object(properties[used], index=False).to_numpy()
+
+    if cols["listed"]:
+        listed, listed_source = _dates(properties[cols["listed"]], len(properties)), cols["listed"]
+    else:
+        listed = _listed_from_history(properties[cols["id"]])
+        listed_source = "history" if listed is not None else None
+        if listed is None:
+            listed = np.full(len(properties), _NAT, dtype=np.int64)
+
+    # Rows of the previous join are reusable when the index only grew from its version
+    reusable = previous is not None and (
+        previous.index.version == index.version or index.base_version == previous.index.version)
+    if reusable:
+        at_old = previous.row_keys.get_indexer(row_keys) if previous.row_keys.is_unique else None
+        reusable = at_old is not None
+    if reusable:
+        stable = (at_old >= 0) & (previous.row_hash[np.maximum(at_old, 0)] == row_hash)
+        unit_pos = np.where(stable, previous.unit_pos[np.maximum(at_old, 0)], -1)
+        if previous.index.version != index.version:
+            # Units sold for the first time now have a position
+            first_sold = index.units[index.changed_units]
+            stable &= ~((unit_pos < 0) & row_keys.isin(first_sold))
+        lookup = np.flatnonzero(~stable)
+        unit_pos[lookup] = index.units.get_indexer(row_keys[lookup])
+    else:
+        lookup = np.arange(len(properties))
+        unit_pos = index.units.get_indexer(row_keys)
+
+    stats = {
+        "mode": "incremental" if reusable else "full",
+        "units": len(properties), "rows_looked_up": int(lookup.size),
+        "seconds": time.perf_counter() - start,
+    }
+    perf.record_rows("unit_sales_join", int(lookup.size))
+    return UnitSales(properties_version, index.version, row_keys, row_hash, unit_pos.astype(np.int64),
+                     listed, index, listed_source, stats)
+
+# ============================================
+# PROCESS-WIDE CACHES
+# ============================================
+_lock = threading.Lock()
+_indexes: "OrderedDict[str, TransactionIndex]" = OrderedDict()
+_joins: "OrderedDict[tuple, UnitSales]" = OrderedDict()
+
+
+def get_transaction_index(handle: DatasetHandle) -> Optional[TransactionIndex]:
+    """Cached index for this version; a miss builds on the newest built one"""
+    with _lock:
+        index = _indexes.get(handle.version)
+        if index is not None:
+            _indexes.move_to_end(handle.version)
+        previous = None if index is not None else next(reversed(_indexes.values()), None)
+    perf.record_cache("unit_sales_index", index is not None)
+    if index is not None:
+        return index
+
+    df = handle.frame()
+    if df is None:
+        return None
+    # The previous version's frame is needed to diff against; evicted means a full build
+    previous_df = DATASETS.get(previous.version) if previous is not None else None
+    index = build_transaction_index(handle.version, df, previous, previous_df)
+    if index is None:
+        return None
+    with _lock:
+        _indexes[handle.version] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def get_unit_sales(properties: DatasetHandle, transactions: DatasetHandle) -> Optional[UnitSales]:
+    """The joined view of two dataset versions, computed once per process"""
+    key = (properties.version, transactions.version)
+    with _lock:
+        joined = _joins.get(key)
+        if joined is not None:
+            _joins.move_to_end(key)
+        previous = None if joined is not None else next(reversed(_joins.values()), None)
+    perf.record_cache("unit_sales_join", joined is not None)
+    if joined is not None:
+        return joined
+
+    properties_df = properties.frame()
+    index = get_transaction_index(transactions)
+    if properties_df is None or index is None:
+        return None
+    joined = join_units(properties.version, properties_df, index, previous)
+    if joined is None:
+        return None
+    with _lock:
+        _joins[key] = joined
+        while len(_joins) > MAX_CACHED_JOINS:
+            _joins.popitem(last=False)
+    return joined
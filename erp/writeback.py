@@ -0,0 +1,562 @@
+"""
+SHEET WRITE-BACK - COALESCING QUEUE → gspread batch_update
+Cell edits from every session go into one queue per spreadsheet. A single
+background writer drains each queue into batch_update calls: edits to the
+same cell coalesce (last write wins), a short linger window lets bursts
+from many agents share one request, a token bucket keeps the process under
+the Sheets write quota, and failed batches are retried with exponential
+backoff. Edits are applied optimistically to the cached dataset (a new
+registry version), so nobody reloads the sheet to see them.
+gspread is imported only when the first batch is sent.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from erp import perf
+from erp.datasets import REGISTRY as DATASETS, DatasetHandle, Overlay, content_version
+from erp.loaders import extract_sheet_id
+from erp.projection import SOURCES, sheet_columns
+
+logger = logging.getLogger(__name__)
+
+# Sheets API write quota is 60 requests / minute / user - stay just under it
+WRITE_REQUESTS_PER_MINUTE = 55
+WRITE_BURST = 5
+# Edits queued within this window go out in one request
+LINGER_SECONDS = 0.5
+# Cell ranges per batch_update request
+MAX_RANGES_PER_BATCH = 1000
+# Quota windows are a minute long - backoff must be able to outlast one
+MAX_RETRIES = 8
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 64.0
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Failed edits kept for display (oldest dropped first)
+MAX_FAILED = 200
+
+# The sheet row of a parsed frame's row label (one header row, 1-based)
+HEADER_ROWS = 1
+
+# ============================================
+# CELL EDITS + A1 NOTATION
+# ============================================
+@dataclass
+class CellEdit:
+    sheet_id: str
+    sheet_type: str
+    row: int            # 1-based sheet row
+    col: int            # 1-based sheet column
+    column: str
+    key: str            # unit / client ID - re-checked against the sheet at flush
+    value: Any
+    editor: str = ""
+    key_col: int = 0    # 1-based sheet column holding key (0: row label only, not re-checked)
+    queued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    error: str = ""
+
+    @property
+    def cell(self) -> Tuple[int, int]:
+        return (self.row, self.col)
+
+    @property
+    def a1(self) -> str:
+        return a1_notation(self.row, self.col)
+
+
+def a1_notation(row: int, col: int) -> str:
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+
+def _json_value(value: Any) -> Any:
+    """numpy scalars / NA → plain JSON values for the Sheets API"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def cell_edits(sheet_url: str, sheet_type: str, df: pd.DataFrame, labels: Sequence, column: str,
+               values: Sequence, key_column: Optional[str] = None, editor: str = "") -> List[CellEdit]:
+    """Edits for df rows `labels` (index labels of the parsed sheet) in `column`
+
+    Parsed frames keep their RangeIndex through filtering, so a row label
+    maps to its sheet row as of the load. Rows can move by hand since, so
+    with key_column the writer re-reads that column at flush and writes to
+    the row still holding the key (see resolve_rows).
+    """
+    sheet_id = extract_sheet_id(sheet_url or "")
+    header = sheet_columns(df)
+    if not sheet_id or column not in df.columns or column not in header:
+        return []
+    # Position in the sheet, not in a projected frame
+    col = header.index(column) + 1
+    key_col = header.index(key_column) + 1 if key_column in header else 0
+    keys = df.loc[list(labels), key_column].astype(str).tolist() if key_column else [str(l) for l in labels]
+    return [
+        CellEdit(sheet_id, sheet_type, int(label) + HEADER_ROWS + 1, col, column, key, value, editor, key_col=key_col)
+        for label, key, value in zip(labels, keys, values)
+    ]
+
+
+def _norm_key(value: Any) -> str:
+    """'101', 101 and 101.0 are the same ID"""
+    text = str(_json_value(value)).strip()
+    return text[:-2] if text.endswith(".0") and text[:-2].lstrip("-").isdigit() else text
+
+
+def resolve_rows(backend, sheet_id: str, edits: Sequence[CellEdit]) -> Tuple[List[CellEdit], List[CellEdit]]:
+    """(edits to send, conflicts) - each edit re-targeted to the row that holds its key now
+
+    One batch_get of the key column(s) per batch. An edit whose row still
+    holds its key goes out unchanged; one whose row moved (insert, delete,
+    re-sort by hand) goes to the key's current row; a key that is gone or
+    now appears twice is a conflict and is not written. Edits without a
+    key column, and backends that cannot read, are sent as they are.
+    """
+    checked = sorted({e.key_col for e in edits if e.key_col})
+    reader = getattr(backend, "key_columns", None)
+    if not checked or reader is None:
+        return list(edits), []
+    with perf.timed("writeback_resolve_rows"):
+        columns = reader(sheet_id, checked)
+    by_key: Dict[int, Dict[str, List[int]]] = {}
+    send, conflicts = [], []
+    for edit in edits:
+        if not edit.key_col:
+            send.append(edit)
+            continue
+        values = columns.get(edit.key_col, [])
+        key = _norm_key(edit.key)
+        if edit.row - 1 < len(values) and _norm_key(values[edit.row - 1]) == key:
+            send.append(edit)
+            continue
+        if edit.key_col not in by_key:
+            rows: Dict[str, List[int]] = {}
+            for i, value in enumerate(values[HEADER_ROWS:], start=HEADER_ROWS + 1):
+                rows.setdefault(_norm_key(value), []).append(i)
+            by_key[edit.key_col] = rows
+        found = by_key[edit.key_col].get(key, [])
+        if len(found) == 1:
+            # A copy - the queued edit keeps its load-time row for optimistic updates
+            send.append(replace(edit, row=found[0]))
+        else:
+            conflicts.append(edit)
+    return send, conflicts
+
+# ============================================
+# OPTIMISTIC UPDATES - NEW DATASET VERSION, NO RELOAD
+# ============================================
+def apply_edits(df: pd.DataFrame, edits: Sequence[CellEdit]) -> pd.DataFrame:
+    """Copy of df with the edited cells set - shared frames stay untouched"""
+    out = df.copy(deep=False)
+    by_column: Dict[str, Tuple[List[int], List[Any]]] = {}
+    for edit in edits:
+        labels, values = by_column.setdefault(edit.column, ([], []))
+        labels.append(edit.row - HEADER_ROWS - 1)
+        values.append(edit.value)
+    for column, (labels, values) in by_column.items():
+        if column in out.columns:
+            # Copy-on-write: only the edited column is copied
+            out[column] = out[column].copy()
+            out.loc[labels, column] = values
+    return out
+
+
+def _fetched_version(version: str) -> str:
+    """The fetched version an overlay chain starts from - its rows are the sheet's rows"""
+    overlay = DATASETS.overlay(version)
+    while overlay is not None:
+        version = overlay.parent
+        overlay = DATASETS.overlay(version)
+    return version
+
+
+def rebase_edits(df: pd.DataFrame, edits: Sequence[CellEdit]) -> List[CellEdit]:
+    """Copies of edits re-targeted to the df rows (another version) holding their keys
+
+    An edit without a key column, or whose key is gone or doubled in df,
+    is left out: it still goes to the sheet, the next fetch shows it.
+    """
+    header = sheet_columns(df)
+    rows: Dict[int, Dict[str, List[int]]] = {}
+    rebased = []
+    for edit in edits:
+        name = header[edit.key_col - 1] if 0 < edit.key_col <= len(header) else None
+        if name not in df.columns:
+            continue
+        if edit.key_col not in rows:
+            wanted = {_norm_key(e.key) for e in edits if e.key_col == edit.key_col}
+            keys = df[name].astype(str).str.strip().str.replace(r"^(-?\d+)\.0$", r"\1", regex=True)
+            found: Dict[str, List[int]] = {}
+            for label, key in keys[keys.isin(wanted)].items():
+                found.setdefault(key, []).append(int(label))
+            rows[edit.key_col] = found
+        labels = rows[edit.key_col].get(_norm_key(edit.key), [])
+        if len(labels) == 1:
+            rebased.append(replace(edit, row=labels[0] + HEADER_ROWS + 1))
+    return rebased
+
+
+_publish_lock = threading.Lock()
+
+
+def publish_optimistic(handle: DatasetHandle, edits: Sequence[CellEdit]) -> Optional[DatasetHandle]:
+    """Publish the newest version of handle's sheet with the edits applied
+
+    Builds on the latest published version, not the session's own, so edits
+    from two sessions stack instead of replacing each other. Edit rows are
+    the session's; when the latest version was fetched since (rows may have
+    moved), each edit is re-targeted by its key (rebase_edits). Published as
+    an overlay: it takes no registry slot from fetched versions, and
+    listeners (change feed) re-examine only the edited rows.
+    """
+    if not edits:
+        return handle
+    with _publish_lock, perf.timed("writeback_optimistic"):
+        base = DATASETS.latest(handle.sheet_type) or handle
+        df = base.frame()
+        if df is None:
+            return None
+        if _fetched_version(base.version) != _fetched_version(handle.version):
+            edits = rebase_edits(df, edits)
+            if not edits:
+                return base
+        edited = apply_edits(df, edits)
+        tag = "|".join(f"{e.a1}={e.value}" for e in edits)
+        version = content_version(f"{base.version}:{tag}:{time.time_ns()}".encode("utf-8"))
+        # Columns left out by the projection still come from the base export
+        SOURCES.alias(version, base.version)
+        positions = df.index.get_indexer([e.row - HEADER_ROWS - 1 for e in edits])
+        overlay = Overlay(base.version, np.unique(positions[positions >= 0]),
+                          tuple(sorted({e.column for e in edits if e.column in df.columns})))
+        return DATASETS.publish(base.sheet_type, version, edited, overlay=overlay)
+
+# ============================================
+# RATE LIMIT - TOKEN BUCKET
+# ============================================
+class TokenBucket:
+    """`rate` tokens per second, at most `burst` saved up
+
+    Adaptive: a 429 halves the rate (down to 1/16 of the configured one),
+    each success wins back 5% of the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._stamp = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available"""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def penalize(self):
+        """The server said slow down (429) - halve the rate, start from empty"""
+        self._refill()
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+        self._tokens = min(self._tokens, 0.0)
+
+    def reward(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+# ============================================
+# GSPREAD BACKEND - LAZY IMPORT, WORKSHEETS CACHED
+# ============================================
+def default_gspread_client():
+    """Service account from st.secrets["gcp_service_account"], else gspread's default file"""
+    import gspread
+    import streamlit as st
+
+    try:
+        info = dict(st.secrets["gcp_service_account"])
+    except Exception:
+        info = None
+    return gspread.service_account_from_dict(info) if info else gspread.service_account()
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """HTTP status of a gspread APIError (or anything shaped like one)"""
+    code = getattr(error, "code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """429 / 5xx responses, and network failures that never got a response
+
+    requests' ConnectionError / ReadTimeout (what gspread raises) derive from
+    OSError, not the builtin ConnectionError - an HTTPError carrying a 4xx is
+    judged by its status first, so it is not retried.
+    """
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    return isinstance(error, (OSError, TimeoutError)) or _is_request_exception(error)
+
+
+def _is_request_exception(error: Exception) -> bool:
+    try:
+        from requests.exceptions import RequestException
+    except ImportError:
+        return False
+    return isinstance(error, RequestException)
+
+
+class GspreadBackend:
+    """First worksheet of each spreadsheet - the one the xlsx export is parsed from"""
+
+    def __init__(self, client_factory: Callable[[], Any] = default_gspread_client):
+        self.client_factory = client_factory
+        self._client = None
+        self._worksheets: Dict[str, Any] = {}
+
+    def worksheet(self, sheet_id: str):
+        if sheet_id not in self._worksheets:
+            if self._client is None:
+                self._client = self.client_factory()
+            self._worksheets[sheet_id] = self._client.open_by_key(sheet_id).get_worksheet(0)
+        return self._worksheets[sheet_id]
+
+    def batch_update(self, sheet_id: str, edits: Sequence[CellEdit]):
+        data = [{"range": e.a1, "values": [[_json_value(e.value)]]} for e in edits]
+        self.worksheet(sheet_id).batch_update(data, value_input_option="USER_ENTERED")
+
+    def key_columns(self, sheet_id: str, cols: Sequence[int]) -> Dict[int, List[str]]:
+        """Current values of whole sheet columns (index 0 = sheet row 1) - one request"""
+        letters = [a1_notation(1, col)[:-1] for col in cols]
+        ranges = self.worksheet(sheet_id).batch_get([f"{l}:{l}" for l in letters])
+        return {col: [row[0] if row else "" for row in values] for col, values in zip(cols, ranges)}
+
+# ============================================
+# PER-SHEET QUEUE + WRITER THREAD
+# ============================================
+class SheetQueue:
+    """Pending edits of one spreadsheet, one entry per cell (last write wins)"""
+
+    def __init__(self, sheet_id: str):
+        self.sheet_id = sheet_id
+        self.pending: "OrderedDict[Tuple[int, int], CellEdit]" = OrderedDict()
+        self.not_before = 0.0
+        self.attempts = 0
+
+    def add(self, edit: CellEdit) -> bool:
+        """True when the edit replaced a pending one for the same cell"""
+        previous = self.pending.pop(edit.cell, None)
+        if previous is not None:
+            edit.queued_at = previous.queued_at
+        self.pending[edit.cell] = edit
+        return previous is not None
+
+    def take(self, limit: int) -> List[CellEdit]:
+        edits = []
+        while self.pending and len(edits) < limit:
+            edits.append(self.pending.popitem(last=False)[1])
+        return edits
+
+    def put_back(self, edits: Sequence[CellEdit]):
+        """Re-queue a failed batch ahead of newer edits, unless a cell was rewritten since"""
+        newer = self.pending
+        self.pending = OrderedDict((e.cell, e) for e in edits if e.cell not in newer)
+        self.pending.update(newer)
+
+    def due_at(self, linger: float) -> float:
+        oldest = next(iter(self.pending.values())).queued_at
+        ready = oldest if len(self.pending) >= MAX_RANGES_PER_BATCH else oldest + linger
+        return max(ready, self.not_before)
+
+
+class WriteBackQueue:
+    """Process-wide write-back: submit() from any session, one writer thread sends"""
+
+    def __init__(self, backend: Optional[GspreadBackend] = None,
+                 requests_per_minute: float = WRITE_REQUESTS_PER_MINUTE, burst: int = WRITE_BURST,
+                 linger: float = LINGER_SECONDS):
+        self.backend = backend or GspreadBackend()
+        self.linger = linger
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self._cond = threading.Condition()
+        self._queues: Dict[str, SheetQueue] = {}
+        self._in_flight = 0
+        self._flush_requested = False
+        self._thread: Optional[threading.Thread] = None
+        self._failed: Deque[CellEdit] = deque(maxlen=MAX_FAILED)
+        self.counters = {"submitted": 0, "coalesced": 0, "written": 0, "requests": 0,
+                         "retries": 0, "rate_limited": 0, "failed": 0, "conflicts": 0}
+        self.last_error = ""
+
+    def set_backend(self, backend: GspreadBackend):
+        """Swap the sheet backend (bench / local fake) - pending edits are kept"""
+        with self._cond:
+            self.backend = backend
+
+    # --- producer side ---
+    def submit(self, edits: Sequence[CellEdit]) -> int:
+        """Queue edits; returns how many replaced a still-pending edit of the same cell"""
+        coalesced = 0
+        with self._cond:
+            for edit in edits:
+                queue = self._queues.get(edit.sheet_id)
+                if queue is None:
+                    queue = self._queues[edit.sheet_id] = SheetQueue(edit.sheet_id)
+                coalesced += queue.add(edit)
+            self.counters["submitted"] += len(edits)
+            self.counters["coalesced"] += coalesced
+            self._ensure_writer()
+            self._cond.notify_all()
+        return coalesced
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send everything now (no linger); True once nothing is pending or in flight"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._ensure_writer()
+            self._cond.notify_all()
+            while self._pending_count() or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self._flush_requested = False
+            return True
+
+    # --- status ---
+    def _pending_count(self) -> int:
+        return sum(len(q.pending) for q in self._queues.values())
+
+    def pending(self, sheet_id: Optional[str] = None) -> int:
+        with self._cond:
+            if sheet_id is None:
+                return self._pending_count()
+            queue = self._queues.get(sheet_id)
+            return len(queue.pending) if queue else 0
+
+    def failed(self, editor: Optional[str] = None) -> List[CellEdit]:
+        with self._cond:
+            return [e for e in self._failed if editor is None or e.editor == editor]
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {**self.counters, "pending": self._pending_count(), "in_flight": self._in_flight,
+                    "sheets": len(self._queues), "requests_per_minute": self.bucket.rate * 60,
+                    "last_error": self.last_error}
+
+    # --- writer thread ---
+    def _ensure_writer(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="sheet-writeback", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> Tuple[Optional[SheetQueue], List[CellEdit], Optional[float]]:
+        """(queue, edits) ready to send now, else (None, [], seconds to wait)"""
+        now = time.monotonic()
+        linger = 0.0 if self._flush_requested else self.linger
+        queues = [q for q in self._queues.values() if q.pending]
+        if not queues:
+            return None, [], None
+        queue = min(queues, key=lambda q: q.due_at(linger))
+        wait = max(queue.due_at(linger) - now, self.bucket.wait_time())
+        if wait > 0 or not self.bucket.try_acquire():
+            return None, [], max(wait, 0.001)
+        return queue, queue.take(MAX_RANGES_PER_BATCH), None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                queue, edits, wait = self._next_batch()
+                if queue is None:
+                    if not self._queues or not self._pending_count():
+                        self._flush_requested = False
+                    self._cond.notify_all()
+                    self._cond.wait(wait)
+                    continue
+                self._in_flight += len(edits)
+                backend = self.backend
+            error, conflicts = None, []
+            try:
+                send, conflicts = resolve_rows(backend, queue.sheet_id, edits)
+                if send:
+                    with perf.timed("writeback_batch_update"):
+                        backend.batch_update(queue.sheet_id, send)
+            except Exception as e:
+                error, conflicts = e, []
+            with self._cond:
+                self._in_flight -= len(edits)
+                conflicted = {id(e) for e in conflicts}
+                self._settle(queue, [e for e in edits if id(e) not in conflicted], error)
+                self._conflict(conflicts)
+                self._cond.notify_all()
+
+    def _conflict(self, edits: List[CellEdit]):
+        """Key no longer (or no longer uniquely) in the sheet - reported, never written"""
+        for edit in edits:
+            edit.error = f"Conflict: {edit.key} not found in the sheet (row moved or deleted)"
+            self._failed.appendleft(edit)
+        self.counters["conflicts"] += len(edits)
+
+    def _settle(self, queue: SheetQueue, edits: List[CellEdit], error: Optional[Exception]):
+        self.counters["requests"] += 1
+        if error is None:
+            queue.attempts = 0
+            self.bucket.reward()
+            self.counters["written"] += len(edits)
+            perf.record_rows("writeback_batch_update", len(edits))
+            return
+
+        self.last_error = f"{datetime.now().isoformat(timespec='seconds')} {type(error).__name__}: {error}"
+        logger.warning("Sheet write-back failed (%s...): %s", queue.sheet_id[:8], error)
+        if status_code(error) == 429:
+            self.counters["rate_limited"] += 1
+            self.bucket.penalize()
+        queue.attempts += 1
+        if is_retryable(error) and queue.attempts <= MAX_RETRIES:
+            self.counters["retries"] += 1
+            backoff = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (queue.attempts - 1))
+            queue.not_before = time.monotonic() + backoff * random.uniform(0.5, 1.0)
+            for edit in edits:
+                edit.attempts += 1
+            queue.put_back(edits)
+            return
+
+        queue.attempts = 0
+        self.counters["failed"] += len(edits)
+        for edit in edits:
+            edit.error = str(error)
+            self._failed.appendleft(edit)
+
+
+WRITEBACK = WriteBackQueue()
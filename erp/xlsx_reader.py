@@ -0,0 +1,278 @@
+"""
+PROJECTED XLSX READER - DECODE ONLY THE COLUMNS A VIEW NEEDS
+pd.read_excel (openpyxl) builds a Python object for every cell, so asking it
+for 6 of 40 columns (usecols) saves nothing. This reader scans the first
+worksheet's XML with one compiled regex that only matches cells of the
+requested columns (the scan itself runs in C) and decodes just those.
+Shared strings, inline strings, booleans, errors and date-formatted numbers
+are handled; text columns go through read_excel's own TextParser, so dtypes and NA
+handling match. Other columns are coerced the way read_excel infers them:
+booleans mixed with blanks or numbers become numbers, dates are rounded to
+the millisecond as openpyxl does and held as datetime64[us].
+
+Anything unusual - missing / duplicate headers, blank rows, cells without
+a reference, time-only formats, dates before March 1900 - falls back to
+pd.read_excel(usecols=...), so a version reads the same on either path.
+"""
+
+import html
+import logging
+import re
+import zipfile
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Sequence, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from pandas.io.parsers import TextParser
+
+from erp import perf
+
+logger = logging.getLogger(__name__)
+
+# Built-in number formats that are dates (14-17, 22) or times (18-21, 45-47)
+DATE_FORMAT_IDS = {14, 15, 16, 17, 22}
+TIME_FORMAT_IDS = {18, 19, 20, 21, 45, 46, 47}
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+# df.attrs key: every column of the sheet in order, also when only some were read
+SHEET_COLUMNS_ATTR = "sheet_columns"
+
+_ROW = re.compile(rb'<row [^>]*?r="(\d+)"[^>]*?(/>|>)')
+_SHEET = re.compile(rb'<sheet [^>]*?r:id="([^"]+)"')
+_REL = re.compile(rb'<Relationship [^>]*?Id="([^"]+)"[^>]*?Target="([^"]+)"|<Relationship [^>]*?Target="([^"]+)"[^>]*?Id="([^"]+)"')
+_SI = re.compile(rb"<si>(.*?)</si>|<si/>", re.S)
+_T = re.compile(rb"<t(?: [^>]*)?>(.*?)</t>|<t(?: [^>]*)?/>", re.S)
+_RPH = re.compile(rb"<rPh.*?</rPh>", re.S)
+_V = re.compile(rb"<v>(.*?)</v>", re.S)
+_ATTR_T = re.compile(rb' t="(\w+)"')
+_ATTR_S = re.compile(rb' s="(\d+)"')
+_NUMFMT = re.compile(rb'<numFmt [^>]*?numFmtId="(\d+)"[^>]*?formatCode="([^"]*)"')
+_CELLXFS = re.compile(rb"<cellXfs[^>]*>(.*?)</cellXfs>", re.S)
+_XF = re.compile(rb"<xf [^>]*?numFmtId=\"(\d+)\"|<xf (?![^>]*numFmtId)")
+_ANY_CELL = re.compile(rb'<c r="([A-Z]{1,3})(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+
+
+# Column names to read, or a callable picking them from the header
+Columns = Union[None, Sequence[str], Set[str], Callable[[List[str]], Sequence[str]]]
+
+
+class UnsupportedSheet(Exception):
+    """The fast path can't promise read_excel's result - use read_excel"""
+
+# ============================================
+# WORKBOOK PARTS
+# ============================================
+def _text(raw: bytes) -> str:
+    # openpyxl leaves _xHHHH_ escapes as they are - so do we
+    return html.unescape(raw.decode("utf-8"))
+
+
+def _rich_text(inner: bytes) -> str:
+    """Concatenated <t> runs of an <si> / <is> element (phonetic runs dropped)"""
+    if b"<rPh" in inner:
+        inner = _RPH.sub(b"", inner)
+    return "".join(_text(m.group(1) or b"") for m in _T.finditer(inner))
+
+
+def _first_sheet_path(book: zipfile.ZipFile) -> str:
+    sheet = _SHEET.search(book.read("xl/workbook.xml"))
+    if sheet is None:
+        return "xl/worksheets/sheet1.xml"
+    for m in _REL.finditer(book.read("xl/_rels/workbook.xml.rels")):
+        rel_id, target = (m.group(1), m.group(2)) if m.group(1) else (m.group(4), m.group(3))
+        if rel_id == sheet.group(1):
+            target = target.decode()
+            return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    raise UnsupportedSheet("first sheet not found in workbook rels")
+
+
+def _shared_strings(book: zipfile.ZipFile) -> List[str]:
+    try:
+        xml = book.read("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    return [_rich_text(m.group(1)) if m.group(1) is not None else "" for m in _SI.finditer(xml)]
+
+
+def _date_styles(book: zipfile.ZipFile) -> Dict[int, str]:
+    """Style index → "date" / "time" for date- or time-formatted cell styles"""
+    try:
+        xml = book.read("xl/styles.xml")
+    except KeyError:
+        return {}
+    custom = {}
+    for fmt_id, code in _NUMFMT.findall(xml):
+        # Date codes use d / m / y outside quoted text and [colour] sections
+        bare = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', "", html.unescape(code.decode())).lower()
+        if any(ch in bare for ch in "dy"):
+            custom[int(fmt_id)] = "date"
+        elif "h" in bare or "s" in bare:
+            custom[int(fmt_id)] = "time"
+    xfs = _CELLXFS.search(xml)
+    kinds = {}
+    for i, m in enumerate(_XF.finditer(xfs.group(1) if xfs else b"")):
+        fmt_id = int(m.group(1)) if m.group(1) else 0
+        kind = "date" if fmt_id in DATE_FORMAT_IDS else "time" if fmt_id in TIME_FORMAT_IDS else custom.get(fmt_id)
+        if kind:
+            kinds[i] = kind
+    return kinds
+
+# ============================================
+# CELLS → COLUMNS
+# ============================================
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _cell_pattern(letters: Sequence[str]) -> "re.Pattern":
+    alternatives = b"|".join(sorted((l.encode() for l in letters), key=len, reverse=True))
+    return re.compile(rb'<c r="(' + alternatives + rb')(\d+)"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+
+
+def _decode(attrs: bytes, body: Optional[bytes], strings: List[str], styles: Dict[int, str]):
+    if not body:
+        return None
+    kind = _ATTR_T.search(attrs)
+    kind = kind.group(1) if kind else b"n"
+    if kind == b"inlineStr":
+        return _rich_text(body)
+    v = _V.search(body)
+    if v is None:
+        return None
+    raw = v.group(1)
+    if kind == b"s":
+        return strings[int(raw)]
+    if kind == b"str":
+        return _text(raw)
+    if kind == b"b":
+        return raw.strip() == b"1"
+    if kind == b"e":
+        return None
+    number = float(raw) if (b"." in raw or b"E" in raw or b"e" in raw) else int(raw)
+    style = _ATTR_S.search(attrs)
+    if style and styles:
+        fmt = styles.get(int(style.group(1)))
+        if fmt == "time":
+            raise UnsupportedSheet("time-formatted cell")
+        if fmt == "date":
+            day, fraction = divmod(number, 1)
+            if day < 60:
+                # openpyxl's 1900 leap-year shift and time-only values
+                raise UnsupportedSheet("date before March 1900")
+            # openpyxl's from_excel: whole days plus the fraction rounded to the millisecond
+            return EXCEL_EPOCH + pd.Timedelta(days=int(day), milliseconds=round(fraction * 86_400_000))
+    if isinstance(number, float) and number.is_integer():
+        # openpyxl hands read_excel integral floats as int
+        return int(number)
+    return number
+
+
+def _to_series(values: list, name: str) -> pd.Series:
+    """Same dtype read_excel would infer for this column"""
+    present = [v for v in values if v is not None]
+    kinds = {type(v) for v in present}
+    if bool in kinds and kinds <= {bool, int, float} and not (kinds == {bool} and len(present) == len(values)):
+        # read_excel reads booleans beside blanks / numbers as 1 / 0
+        values = [int(v) if isinstance(v, bool) else v for v in values]
+        present = [v for v in values if v is not None]
+        kinds = {type(v) for v in present}
+    if not present:
+        return pd.Series(np.full(len(values), np.nan), name=name)
+    if kinds <= {int}:
+        if len(present) == len(values):
+            return pd.Series(np.array(values, dtype=np.int64), name=name)
+        return pd.Series(np.array([np.nan if v is None else v for v in values], dtype=np.float64), name=name)
+    if kinds <= {int, float}:
+        return pd.Series(np.array([np.nan if v is None else v for v in values], dtype=np.float64), name=name)
+    if str in kinds:
+        # Text goes through the same parser read_excel uses: NA strings,
+        # numeric-looking text ("0100...") and mixed columns come out identical
+        return TextParser([[name]] + [[v] for v in values], header=0, skip_blank_lines=False).read()[name]
+    if kinds <= {pd.Timestamp}:
+        return pd.Series(pd.to_datetime(values), name=name).astype("datetime64[us]")
+    if kinds <= {bool} and len(present) == len(values):
+        return pd.Series(np.array(values, dtype=bool), name=name)
+    return pd.Series(np.array([np.nan if v is None else v for v in values], dtype=object), name=name)
+
+
+def _read_fast(content: bytes, wanted: Columns) -> pd.DataFrame:
+    book = zipfile.ZipFile(BytesIO(content))
+    xml = book.read(_first_sheet_path(book))
+    strings = _shared_strings(book)
+    styles = _date_styles(book)
+
+    # Header: every row must be present and referenced, row 1 first
+    rows = _ROW.findall(xml)
+    if not rows or rows[0][0] != b"1" or any(int(r) != i + 1 or end == b"/>" for i, (r, end) in enumerate(rows)):
+        raise UnsupportedSheet("missing, empty or unreferenced rows")
+    n_rows = len(rows) - 1
+    header_end = xml.find(b"</row>")
+    header = {m.group(1).decode(): _decode(m.group(3), m.group(4), strings, styles)
+              for m in _ANY_CELL.finditer(xml, 0, header_end)}
+    letters = sorted(header, key=lambda l: (len(l), l))
+    names = [header[l].strip() if isinstance(header[l], str) else None for l in letters]
+    if not names or None in names or len(set(names)) != len(names):
+        raise UnsupportedSheet("blank, non-text or duplicate header")
+    if letters != [_column_letter(i) for i in range(len(letters))]:
+        raise UnsupportedSheet("header has gaps")
+
+    if callable(wanted):
+        wanted = set(wanted(names))
+    picked = [(letter, name) for letter, name in zip(letters, names) if wanted is None or name in wanted]
+    columns = {letter: [None] * n_rows for letter, _ in picked}
+    if picked and n_rows:
+        for m in _cell_pattern([letter for letter, _ in picked]).finditer(xml, header_end):
+            row = int(m.group(2)) - 2
+            columns[m.group(1).decode()][row] = _decode(m.group(3), m.group(4), strings, styles)
+    df = pd.DataFrame({name: _to_series(columns[letter], name) for letter, name in picked})
+    df.attrs[SHEET_COLUMNS_ATTR] = names
+    return df
+
+
+def read_header(content: bytes) -> List[str]:
+    """Column names of the first sheet, stripped"""
+    try:
+        return list(_read_fast(content, set()).attrs[SHEET_COLUMNS_ATTR])
+    except Exception:
+        return _header_fallback(content)
+
+
+def _header_fallback(content: bytes) -> List[str]:
+    return [str(c).strip() for c in pd.read_excel(BytesIO(content), nrows=0).columns]
+
+
+def read_columns(content: bytes, columns: Columns = None) -> pd.DataFrame:
+    """The first sheet, only `columns` (all when None), column names stripped
+
+    columns may also pick names from the header, like read_excel's usecols:
+    a callable taking the stripped column names and returning those to read.
+
+    df.attrs["sheet_columns"] lists the whole header, so sheet positions
+    (write-back cells, full-row exports) survive the projection.
+    """
+    wanted = columns if columns is None or callable(columns) else set(columns)
+    try:
+        with perf.timed("xlsx_fast_read"):
+            df = _read_fast(content, wanted)
+        perf.record_cache("xlsx_fast_read", True)
+        return df
+    except Exception as e:
+        perf.record_cache("xlsx_fast_read", False)
+        if not isinstance(e, UnsupportedSheet):
+            logger.warning("Fast xlsx read failed, using read_excel: %s", e)
+    with perf.timed("xlsx_read_excel"):
+        header = None if wanted is None else _header_fallback(content)
+        if callable(wanted):
+            wanted = set(wanted(header))
+        usecols = None if wanted is None else (lambda c: str(c).strip() in wanted)
+        df = pd.read_excel(BytesIO(content), usecols=usecols)
+        df.columns = df.columns.str.strip()
+    df.attrs[SHEET_COLUMNS_ATTR] = header or list(df.columns)
+    return df